@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Latency and hit rate of the local email typo index over a dictionary of 100k learned domains.
+Queries are typos of popular mail domains, the ones email_typo() answers without a request when
+suggest() is confident.
+"""
+import random
+import string
+import time
+from ritetag import TypoIndex
+from ritetag.typos import POPULAR_DOMAINS
+
+random.seed(42)
+
+
+def random_domain():
+    name = ''.join(random.choice(string.ascii_lowercase) for _ in range(random.randint(4, 14)))
+    return '{}.{}'.format(name, random.choice(['com', 'net', 'org', 'io', 'de', 'cz', 'co.uk']))
+
+
+def typo(domain):
+    i = random.randrange(len(domain) - 1)
+    edit = random.choice(['delete', 'insert', 'replace', 'transpose'])
+    if edit == 'delete':
+        return domain[:i] + domain[i + 1:]
+    if edit == 'insert':
+        return domain[:i] + random.choice(string.ascii_lowercase) + domain[i:]
+    if edit == 'replace':
+        return domain[:i] + random.choice(string.ascii_lowercase) + domain[i + 1:]
+    return domain[:i] + domain[i + 1] + domain[i] + domain[i + 2:]
+
+
+domains = [random_domain() for _ in range(100000)]
+
+start = time.time()
+index = TypoIndex()
+for domain in domains:
+    index.add(domain)
+print('Indexed {} domains in {:.1f} s'.format(len(index), time.time() - start))
+
+queries = [(typo(x), x) for x in (random.choice(POPULAR_DOMAINS[:10]) for _ in range(5000))]
+latencies = []
+local = 0
+corrected = 0
+for query, original in queries:
+    start = time.time()
+    suggestions, confident = index.suggest(query)
+    latencies.append(time.time() - start)
+    if confident:
+        local += 1
+        corrected += 1 if suggestions == [original] or query == original else 0
+
+latencies.sort()
+print('Lookups: {}, answered locally: {:.1%}, correct local answers: {:.1%}'.format(
+    len(queries), local / float(len(queries)), corrected / float(max(local, 1))))
+for percentile in [50, 90, 99]:
+    print('p{}: {:.3f} ms'.format(percentile, 1000 * latencies[len(latencies) * percentile // 100]))
@@ -1,6 +1,22 @@
+import sys
+
 from .api import RiteTagApi
-from .builders import ImageBuilder
-from .exceptions import RiteTagException
+from .banned import BannedHashtagIndex
+from .builders import ImageBuilder, ImageTemplate
+from .cache import CachePolicy, MemoryCache, RenderCache, SqliteCache
+from .checkpoint import Checkpoint
+from .domains import DomainIndex
+from .frame import HashtagFrame, HistoryFrame
+from .history import HistoryStore
+from .logos import LogoStore
+from .preprocess import ImagePreprocessor
+from .ratelimit import RateLimiter
+from .retry import RetryBudget, RetryPolicy, RetryStrategy
+from .typos import TypoIndex
+from .exceptions import RiteTagException, PartialResultException, ImageTooLargeException
 from .console import run
 from .others import read_env_file, get_env
 from .enums import *
+
+if sys.version_info >= (3, 7):
+    from .aio import AsyncRiteTagApi
@@ -0,0 +1,1080 @@
+import asyncio
+import collections
+import functools
+import inspect
+import io
+import itertools
+import os
+
+from .api import BaseRiteTagApi, _END, _Groups
+from .response import *
+from .builders import *
+from .frame import HashtagFrame
+from .jsonlib import loads
+from .upload import RequestBody
+from .exceptions import RiteTagException, ImageFormatException, ImageTooLargeException
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+def async_api_call(f):
+    @functools.wraps(f)
+    async def wrapper(self, *args, **kwargs):
+        ret = await f(self, *args, **kwargs)
+        self._check_api_limits()
+        return ret
+
+    return wrapper
+
+
+def async_api_request(f):
+    @functools.wraps(f)
+    async def wrapper(self, *args, **kwargs):
+        ret = await f(self, *args, **kwargs)
+        try:
+            self._set_api_limits(ret.status_code, ret.headers)
+        except BaseException:
+            # a streamed response holds its connection until released
+            ret.release()
+            raise
+        return ret
+
+    return wrapper
+
+
+async def _iterate_body(body):
+    # type: (RequestBody) -> bytes
+    # file reads and encoding run in the default executor, the event loop only sends the chunks
+    loop = asyncio.get_running_loop()
+    chunks = iter(body)
+    while True:
+        chunk = await loop.run_in_executor(None, next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+class AsyncResponse:
+    """
+    Fully read aiohttp response, exposes the parts of requests.Response used by Parser.
+
+    Streamed responses keep the unread aiohttp response in stream and have no content until read().
+    """
+
+    def __init__(self, status_code, headers, content, stream=None):
+        # type: (int, dict, bytes, aiohttp.ClientResponse) -> AsyncResponse
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.stream = stream
+
+    @property
+    def raw(self):
+        # type: () -> io.BytesIO
+        return io.BytesIO(self.content)
+
+    def json(self):
+        # type: () -> dict
+        return loads(self.content)
+
+    async def read(self):
+        # type: () -> bytes
+        if self.content is None:
+            try:
+                self.content = await self.stream.read()
+            finally:
+                self.release()
+        return self.content
+
+    def release(self):
+        # type: () -> None
+        if self.stream is not None:
+            self.stream.release()
+
+
+class AsyncImage(Image):
+    """
+    Image streamed from an aiohttp response, see Image.
+    """
+
+    async def write_to(self, sink, buffer_size=DEFAULT_BUFFER_SIZE):
+        # type: (object, int) -> int
+        """
+        Streams the image to a file-like object with constant memory, returns the number of written bytes.
+        Coroutine write() methods of asynchronous sinks are awaited.
+        """
+        total = 0
+        try:
+            async for chunk in self.content.content.iter_chunked(buffer_size):
+                total += len(chunk)
+                check_size(total, self.max_size)
+                result = sink.write(chunk)
+                if inspect.isawaitable(result):
+                    await result
+        finally:
+            self.close()
+        return total
+
+    async def read(self):
+        # type: () -> bytes
+        buffer = io.BytesIO()
+        await self.write_to(buffer)
+        return buffer.getvalue()
+
+    async def save(self, target_directory, filename_without_ext, buffer_size=DEFAULT_BUFFER_SIZE):
+        # type: (str, str, int) -> str
+        path = '{}/{}.{}'.format(target_directory, filename_without_ext, self.ext)
+        with open(path, 'wb') as out_file:
+            await self.write_to(out_file, buffer_size)
+        return path
+
+    def close(self):
+        # type: () -> None
+        self.content.release()
+
+
+class AsyncCachedImage(AsyncImage):
+    """
+    Image read from a RenderCache file, with the coroutine methods of AsyncImage.
+    """
+
+    async def write_to(self, sink, buffer_size=DEFAULT_BUFFER_SIZE):
+        # type: (object, int) -> int
+        total = 0
+        try:
+            chunk = self.content.read(buffer_size)
+            while chunk:
+                total += len(chunk)
+                check_size(total, self.max_size)
+                result = sink.write(chunk)
+                if inspect.isawaitable(result):
+                    await result
+                chunk = self.content.read(buffer_size)
+        finally:
+            self.close()
+        return total
+
+    def close(self):
+        # type: () -> None
+        self.content.close()
+
+
+class AsyncSingleFlight:
+    """
+    Shares one in-flight coroutine between all tasks calling it with the same key.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        # type: (object, callable, ...) -> object
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn(*args, **kwargs))
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # a cancelled caller must not cancel the call shared with the others
+        return await asyncio.shield(task)
+
+
+class AsyncRiteTagApi(BaseRiteTagApi):
+
+    def __init__(self, client_id, pool_size=100, session=None, concurrency=4, single_flight=False,
+                 cache=None, cache_policy=None, history_store=None, rate_limiter=None, retry=None, json_decoder=None,
+                 image_preprocessor=None, render_cache=None, domain_index=None, typo_index=None,
+                 banned_hashtag_index=None):
+        # type: (str, int, aiohttp.ClientSession, int, bool, MemoryCache, CachePolicy, HistoryStore, RateLimiter, RetryStrategy, object, ImagePreprocessor, RenderCache, DomainIndex, TypoIndex, BannedHashtagIndex) -> AsyncRiteTagApi
+        """
+        Parameters
+        ----------
+        client_id : str
+            Access token
+        pool_size : int
+            Maximum number of simultaneous connections, 0 means no limit
+        session : aiohttp.ClientSession
+            Custom session, it is not closed by close()
+        concurrency : int
+            Maximum number of parallel requests of one batch call
+        single_flight : bool
+            Concurrent identical requests share one in-flight HTTP call
+        cache : MemoryCache
+            Cache of responses, nothing is cached by default
+        cache_policy : CachePolicy
+            Time to live of cached responses per endpoint
+        history_store : HistoryStore
+            Local store extended by history() and used instead of requests when it is up to date
+        rate_limiter : RateLimiter
+            Paces requests to spread the remaining API credits until the limit resets
+        retry : RetryStrategy
+            Retries of failed requests, requests are not retried by default
+        json_decoder : object
+            'orjson', 'msgspec', 'json' or a callable decoding response bytes, the fastest installed one by default
+        image_preprocessor : ImagePreprocessor
+            Downscales local images before hashtag suggestions, images are uploaded unchanged by default
+        render_cache : RenderCache
+            Cache of images rendered by text_to_image, nothing is cached by default
+        domain_index : DomainIndex
+            Local answers of freemail and disposable email detection, the API is asked only for unknown domains
+        typo_index : TypoIndex
+            Local email typo suggestions, the API is asked only when they are not confident
+        banned_hashtag_index : BannedHashtagIndex
+            Local banned Instagram hashtags, the API is asked only about posts with unknown hashtags
+        """
+        if aiohttp is None:
+            raise RiteTagException('AsyncRiteTagApi requires aiohttp, install it with `pip install aiohttp`')
+        super(AsyncRiteTagApi, self).__init__(client_id, concurrency, cache, cache_policy, history_store,
+                                              rate_limiter, retry, json_decoder, image_preprocessor, render_cache,
+                                              domain_index, typo_index, banned_hashtag_index)
+        self.pool_size = pool_size
+        self._own_session = session is None
+        self.session = session
+        self._single_flight = AsyncSingleFlight() if single_flight else None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        # type: () -> None
+        """
+        Closes pooled connections of the client.
+        """
+        if self._own_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        # type: () -> aiohttp.ClientSession
+        # aiohttp sessions have to be created inside of a running event loop
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def _request(self, method, url, stream=False, **kwargs):
+        # type: (str, str, bool, ...) -> AsyncResponse
+        if isinstance(kwargs.get('data'), RequestBody):
+            # a new generator for every attempt, retries send the whole body again
+            kwargs['data'] = _iterate_body(kwargs['data'])
+        if stream:
+            resp = await self._get_session().request(method, url, **kwargs)
+            return AsyncResponse(resp.status, resp.headers, None, resp)
+        async with self._get_session().request(method, url, **kwargs) as resp:
+            content = await resp.read()
+            return AsyncResponse(resp.status, resp.headers, content)
+
+    @staticmethod
+    async def _image(response, external=False, max_size=None):
+        # type: (AsyncResponse, bool, int) -> AsyncImage
+        try:
+            return AsyncImage(response.headers['Content-Type'], response.stream,
+                              Parser._content_length(response), max_size)
+        except ImageFormatException:
+            if external:
+                response.release()
+                raise ImageFormatException
+            # read() releases the response
+            await response.read()
+            raise RiteTagException(response.json()['message'])
+        except BaseException:
+            response.release()
+            raise
+
+    async def _imap_unordered(self, fn, items, window=None, checkpoint=None, return_exceptions=False):
+        # type: (callable, iter, int, Checkpoint, bool) -> AsyncIterator
+        """
+        Yields (item, await fn(item)) in order of completion. Items are taken lazily, at most window run at once.
+        """
+        window = 2 * self.concurrency if window is None else window
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def call(item):
+            async with semaphore:
+                return await fn(item)
+
+        items = iter(items)
+        running = {}
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(running) < window:
+                    item = next(items, _END)
+                    if item is _END:
+                        exhausted = True
+                    elif checkpoint is None or item not in checkpoint:
+                        running[asyncio.ensure_future(call(item))] = item
+                if not running:
+                    return
+                done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    item = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if checkpoint is not None:
+                            checkpoint.add(item)
+                        yield item, task.result()
+                    elif return_exceptions:
+                        yield item, error
+                    else:
+                        raise error
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def _imap_grouped(self, fn, items, key, window=None, return_exceptions=False, max_results=100000):
+        # type: (callable, iter, callable, int, bool, int) -> AsyncIterator
+        """
+        Yields (item, await fn(key(item))) in order of completion, fn is called once per distinct key.
+        See RiteTagApi._imap_grouped.
+        """
+        window = 2 * self.concurrency if window is None else window
+        max_waiting = 64 * window
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def call(k):
+            async with semaphore:
+                return await fn(k)
+
+        groups = _Groups(max_results)
+        items = iter(items)
+        running = {}
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(running) < window and groups.size < max_waiting:
+                    item = next(items, _END)
+                    if item is _END:
+                        exhausted = True
+                        continue
+                    try:
+                        k = key(item)
+                    except Exception as e:
+                        if not return_exceptions:
+                            raise
+                        yield item, e
+                        continue
+                    result = groups.get(k)
+                    if result is not _END:
+                        yield item, result
+                    elif groups.add(item, k):
+                        running[asyncio.ensure_future(call(k))] = k
+                if not running:
+                    return
+                done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    k = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        result = task.result()
+                        for item in groups.done(k, result):
+                            yield item, result
+                    elif return_exceptions:
+                        for item in groups.done(k):
+                            yield item, error
+                    else:
+                        raise error
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def _map_chunks(self, fn, chunks, merge=None):
+        # type: (callable, [list], callable) -> list
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def call(chunk):
+            async with semaphore:
+                return await fn(chunk)
+
+        outcomes = await asyncio.gather(*[call(c) for c in chunks], return_exceptions=True)
+        return self._merge_chunks(chunks, outcomes, merge)
+
+    async def _get_image_from_url(self, url, max_size=None):
+        # type: (str, int) -> AsyncImage
+        img = await self._request('GET', url, stream=True)
+        return await self._image(img, True, max_size)
+
+    @staticmethod
+    def _prepare_params(params):
+        # type: (dict) -> dict
+        if isinstance(params, str):
+            # already encoded query
+            return params
+        # aiohttp accepts only str, int and float query values
+        return {k: v if isinstance(v, (int, float)) else str(v) for k, v in params.items()}
+
+    async def _send(self, method, path, params, data=None, stream=False):
+        # type: (str, str, dict, object, bool) -> AsyncResponse
+        kwargs = {
+            'params': self._prepare_params(params),
+            'stream': stream,
+        }
+        if isinstance(data, RequestBody):
+            kwargs['headers'] = self._body_headers(data)
+            kwargs['data'] = data
+        else:
+            kwargs['headers'] = self._get_headers(json=data is not None)
+            kwargs['json'] = data
+        # streamed bodies can be read only once, they are never shared
+        if stream or isinstance(data, RequestBody) or self._single_flight is None:
+            return await self._execute(method, path, **kwargs)
+        return await self._single_flight.do(self._request_key(method, path, params, data), self._execute,
+                                            method, path, **kwargs)
+
+    async def _execute(self, method, path, **kwargs):
+        # type: (str, str, ...) -> AsyncResponse
+        url = '{}{}'.format(self.base_uri, path)
+        policy = self._retry_policy(path)
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                # the credit is reserved synchronously, waiting callers are queued in order
+                await asyncio.sleep(self.rate_limiter.reserve())
+            try:
+                response = await self._request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                sent = not isinstance(e, aiohttp.ClientConnectorError)
+                delay = None if policy is None else policy.delay(attempt, error=True, sent=sent)
+                if not self._may_retry(delay):
+                    raise
+            else:
+                try:
+                    delay = None if policy is None else policy.delay(attempt, response.status_code, response.headers)
+                    retry = self._may_retry(delay)
+                except BaseException:
+                    response.release()
+                    raise
+                if not retry:
+                    return response
+                response.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @async_api_request
+    async def _get_request(self, path, params, stream=False):
+        # type: (str, dict, bool) -> AsyncResponse
+        return await self._send('GET', path, params, stream=stream)
+
+    @async_api_request
+    async def _post_request(self, path, data, params=None):
+        # type: (str, dict, dict) -> AsyncResponse
+        if params is None:
+            params = {}
+        return await self._send('POST', path, params, data)
+
+    async def _get_content(self, path, params):
+        # type: (str, dict) -> (bytes, dict)
+        key, expires_at, content = self._cached(path, params)
+        data = None
+        if content is None:
+            response = await self._get_request(path, params)
+            content = response.content
+            if key is not None:
+                data = self._cacheable(response)
+                if data is not None:
+                    self.cache.set(key, content, expires_at)
+        return content, data
+
+    async def _get_json(self, path, params):
+        # type: (str, dict) -> dict
+        content, data = await self._get_content(path, params)
+        return self._decode(content) if data is None else data
+
+    @async_api_call
+    async def hashtag_stats(self, hashtags, frame=False):
+        # type: ([str], bool) -> [Hashtag]
+        """
+        Returns real-time stats for hashtags. Stats are updated hourly.
+
+        Duplicate hashtags are requested only once. Lists longer than 100 hashtags are split into chunks
+        which are requested in parallel, results keep the input order. PartialResultException is raised
+        when some of the chunks fail, it holds the successful results and the failed chunks.
+
+        Parameters
+        ----------
+        hashtags : [str]
+             List of hashtag(s) without # mark
+        frame : bool
+            Return HashtagFrame with numpy columns instead of list of Hashtag
+        """
+        chunks = self._hashtag_chunks(hashtags)
+        merge = HashtagFrame.concat if frame else None
+        return await self._map_chunks(lambda c: self._hashtag_stats_chunk(c, frame), chunks, merge)
+
+    async def _hashtag_stats_chunk(self, hashtags, frame=False):
+        # type: ([str], bool) -> [Hashtag]
+        content, data = await self._get_content('/v1/stats/multiple-hashtags', {'tags': ','.join(hashtags)})
+        return self._hashtag_list(content, 'stats', frame, data)
+
+    @async_api_call
+    async def auto_hashtag(self, post, max_hashtags=2,
+                           hashtag_position=HashtagPosition.auto):
+        # type: (str, int, HashtagPosition) -> str
+        """
+        Returns auto-hashtagged text of the post.
+
+        Parameters
+        ----------
+        post : str
+            Text up to 1000 characters into which hashtags should be added.
+        max_hashtags: int
+            Maximum number of hashtags to be added to the text
+        hashtag_position: HashtagPosition
+            Position of hashtags: end => at the end of the text, auto => anywhere in the text or at the end
+        """
+        data = await self._get_json('/v1/stats/auto-hashtag',
+                                    {'post': post, 'maxHashstags': max_hashtags, 'hashtagPosition': hashtag_position})
+        return Parser.get_text(data, 'post')
+
+    @async_api_call
+    async def hashtag_suggestion_for_text(self, text, frame=False):
+        # type: (str, bool) -> [Hashtag]
+        """
+        Returns list of hashtag suggestions for a single-word topic or for short block of text (up to 1000 characters).
+
+        Parameters
+        ----------
+        text : str
+            Text up to 1000 characters for which hashtags should be suggested
+        frame : bool
+            Return HashtagFrame with numpy columns instead of list of Hashtag
+         """
+        content, data = await self._get_content('/v1/stats/hashtag-suggestions', {'text': text})
+        return self._hashtag_list(content, 'data', frame, data)
+
+    @async_api_call
+    async def hashtag_suggestion_for_image(self, image, use_mmap=False, gzip=False):
+        # type: (str, bool, bool) -> [Hashtag]
+        """
+        Returns list of hashtag suggestions for an image. Takes into account both semantic
+        relevancy as well as real-time hashtag engagement.
+
+        Parameters
+        ----------
+        image : str
+            URL or path of an image, local files are streamed with constant memory
+        use_mmap : bool
+            Read local files through a memory map
+        gzip : bool
+            Compress the request body of local files
+        """
+        if self.image_preprocessor is None:
+            body = self._image_body(image, use_mmap, gzip)
+        else:
+            # resizing is CPU bound, it runs outside of the event loop
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(None, self._image_body, image, use_mmap, gzip)
+        return await self._post_image(body)
+
+    async def _post_image(self, body):
+        # type: (object) -> [Hashtag]
+        response = await self._post_request('/v1/stats/hashtag-suggestions-image', body)
+        return self._hashtag_list(response.content, 'data')
+
+    async def _prepare_image(self, image):
+        # type: (str) -> str
+        # hashing of the file for the cache lookup runs in a thread, resizing in a worker process
+        loop = asyncio.get_running_loop()
+        future = await loop.run_in_executor(None, self.image_preprocessor.submit, image)
+        return await asyncio.wrap_future(future)
+
+    async def _suggest_for_prepared_image(self, image, use_mmap, gzip):
+        # type: (str, bool, bool) -> [Hashtag]
+        return await self._post_image(self._image_body(image, use_mmap, gzip, preprocess=False))
+
+    async def hashtag_suggestions_for_images(self, images, checkpoint=None, window=None, return_exceptions=False,
+                                             use_mmap=False, gzip=False):
+        # type: (iter, Checkpoint, int, bool, bool, bool) -> AsyncIterator
+        """
+        Yields (image, [Hashtag]) for many images in order of completion.
+        See RiteTagApi.hashtag_suggestions_for_images.
+        """
+        window = 2 * self.concurrency if window is None else window
+        images = iter(images)
+        preparing = {}
+        ready = collections.deque()
+        uploading = {}
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(preparing) + len(ready) + len(uploading) < window:
+                    image = next(images, _END)
+                    if image is _END:
+                        exhausted = True
+                    elif checkpoint is not None and image in checkpoint:
+                        continue
+                    elif self.image_preprocessor is not None and os.path.isfile(image):
+                        preparing[asyncio.ensure_future(self._prepare_image(image))] = image
+                    else:
+                        ready.append((image, image))
+                while ready and len(uploading) < self.concurrency:
+                    image, prepared = ready.popleft()
+                    task = asyncio.ensure_future(self._suggest_for_prepared_image(prepared, use_mmap, gzip))
+                    uploading[task] = image
+                if not preparing and not uploading:
+                    return
+                done, _ = await asyncio.wait(list(preparing) + list(uploading), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if task in preparing:
+                        image = preparing.pop(task)
+                        if error is None:
+                            ready.append((image, task.result()))
+                            continue
+                    else:
+                        image = uploading.pop(task)
+                    if error is None:
+                        if checkpoint is not None:
+                            checkpoint.add(image)
+                        self._check_api_limits()
+                        yield image, task.result()
+                    elif return_exceptions:
+                        yield image, error
+                    else:
+                        raise error
+        finally:
+            for task in list(preparing) + list(uploading):
+                task.cancel()
+
+    @async_api_call
+    async def history(self, hashtag):
+        # type: (str) -> [HashtagHistory]
+        """
+        Returns historical stats for a given hashtag from the last 30 days.
+        Add hashtag without hash mark to the URL.
+
+        With a history store, the result is stored and stored data up to date are returned without a request.
+
+        Parameters
+        ----------
+        hashtag : str
+            Hashtag without # mark
+        """
+        hashtag = self._sanitize_hashtag(hashtag)
+        stored = None if self.history_store is None else self.history_store.recent(hashtag)
+        if stored is not None:
+            return stored
+        data = await self._get_json('/v1/stats/history/{}'.format(hashtag), {})
+        history = Parser.history(data)
+        if self.history_store is not None:
+            self.history_store.add(history)
+        return history
+
+    @async_api_call
+    async def trending_hashtags(self, green=True, latin=True, frame=False):
+        # type: (bool, bool, bool) -> [Hashtag]
+        """
+        Returns list of hashtags currently trending on Twitter.
+
+        Parameters
+        ----------
+        green : bool
+            restrict results only to green hashtags (hot now).
+        latin : bool
+            restrict results only to hashtags with latin characters
+        frame : bool
+            Return HashtagFrame with numpy columns instead of list of Hashtag
+        """
+        content, data = await self._get_content('/v1/search/trending', {'green': int(green), 'latin': int(latin)})
+        return self._hashtag_list(content, 'tags', frame, data)
+
+    @async_api_call
+    async def banned_instagram_hashtags(self, post):
+        # type: (str) -> InstagramBannedHashtag
+        """
+        Detects and removes hashtags banned on Instagram from a list of hashtags.
+
+        Parameters
+        ----------
+        post : str
+            Text up to 1000 characters from which hashtags banned on Instagram should be removed.
+        """
+        if self.banned_hashtag_index is not None:
+            result = self.banned_hashtag_index.clean(post)
+            if result is not None:
+                return result
+        data = await self._get_json('/v2/instagram/hashtags-cleaner', {'post': post})
+        result = Parser.banned_instagram_hashtags(data)
+        if self.banned_hashtag_index is not None:
+            self.banned_hashtag_index.learn(post, result)
+        return result
+
+    @async_api_call
+    async def emoji_suggestion(self, text):
+        # type: (str) -> [str]
+        """
+        Returns list of emoji suggestions for a short block of text (up to 1000 characters).
+
+        Parameters
+        ----------
+        text : str
+            Text up to 1000 characters for which emojis should be suggested.
+        """
+        data = await self._get_json('/v1/emoji/suggestions', {'text': text})
+        return Parser.emoji(data)
+
+    @async_api_call
+    async def auto_emojify(self, text):
+        # type : (str) -> str
+        """
+        Returns text of the post with emoji added
+
+        Parameters
+        ----------
+        text: str
+            Text up to 1000 characters into which emojis should be added.
+        """
+        data = await self._get_json('/v1/emoji/auto-emojify', {'text': text})
+        return Parser.get_text(data, 'text')
+
+    @async_api_call
+    async def text_to_image(self, image_builder, max_size=None):
+        # type: (ImageBuilder, int) -> AsyncImage
+        """
+        Returns an image created from text according to given style parameters
+
+        Parameters
+        ----------
+        image_builder : ImageBuilder
+            see ImageBuilder
+        max_size : int
+            Maximum size of the image in bytes, unlimited by default
+        """
+        if self.render_cache is None:
+            return await self._render(image_builder, max_size)
+        key = self.render_cache.key(image_builder.build())
+        image = self.render_cache.get(key, max_size, AsyncCachedImage)
+        if image is None:
+            image = await self._render(image_builder, max_size)
+            with self.render_cache.writer(key, image.ext) as f:
+                await image.write_to(f)
+            image = self.render_cache.open(key, max_size, AsyncCachedImage)
+            if image is None:
+                # evicted by a concurrent writer right after it was written
+                image = await self._render(image_builder, max_size)
+        return image
+
+    async def _render(self, image_builder, max_size=None):
+        # type: (ImageBuilder, int) -> AsyncImage
+        response = await self._get_request('/v2/image/quote', image_builder.query(), stream=True)
+        return await self._image(response, max_size=max_size)
+
+    async def text_to_images(self, image_builders, target_directory, filenames=None, window=None,
+                             return_exceptions=False, max_size=None):
+        # type: (iter, str, iter, int, bool, int) -> AsyncIterator
+        """
+        Renders many images concurrently and streams them to a directory.
+        Yields (filename, path) in order of completion, see RiteTagApi.text_to_images.
+        """
+        async def render(item):
+            image = await self.text_to_image(item[1], max_size)
+            return await image.save(target_directory, item[0])
+
+        filenames = (str(i) for i in itertools.count()) if filenames is None else filenames
+        async for (filename, _), result in self._imap_unordered(
+                render, zip(filenames, image_builders), window, None, return_exceptions):
+            yield filename, result
+
+    @async_api_call
+    async def animate_image(self, url, animation_type=AnimationType.glint, max_size=None):
+        # type: (str, AnimationType, int) -> AsyncImage
+        """
+        Returns an animated GIF.
+
+        Parameters
+        ----------
+        url : str
+            URL of the original image
+        animation_type : AnimationType
+            Only "glint" is currently supported.
+        max_size : int
+            Maximum size of the image in bytes, unlimited by default
+        """
+        response = await self._get_request('/v1/images/animate', {'url': url, 'type': animation_type},
+                                           stream=True)
+        return await self._image(response, max_size=max_size)
+
+    @async_api_call
+    async def company_logo(self, domain, generateFallbackLogo=False):
+        # type: (str, bool) -> str
+        """
+        Deprecated
+
+        Returns a company logo based on website domain.
+
+        Parameters
+        ----------
+        domain : str
+            Hostname without http://
+        generateFallbackLogo : bool
+        """
+        domain = self._sanitize_domain(domain)
+        gen = 1 if generateFallbackLogo else 0
+        data = await self._get_json('/v2/company-insights/logo', {'domain': domain, 'generateFallbackLogo': gen})
+        return Parser.company_logo(data)
+
+    @async_api_call
+    async def company_logo_2(self, domain, generateFallbackLogo=False):
+        # type: (str, bool) -> Logo
+        """
+        Returns a company logo based on website domain.
+        If the logo is not in our database yet, it will be extracted from the site on the fly.
+        White logo background is automatically removed to make the logo look better on color backgrounds.
+
+        Parameters
+        ----------
+        domain : str
+            Hostname without http://
+        generateFallbackLogo : bool
+        """
+        domain = self._sanitize_domain(domain)
+        gen = 1 if generateFallbackLogo else 0
+        data = await self._get_json('/v2/company-insights/logo',
+                                    {'domain': domain, 'generateFallbackLogo': gen})
+        return Parser.company_logo_2(data)
+
+    async def company_logos(self, domains, store, generateFallbackLogo=False, square=True, window=None,
+                            checkpoint=None, return_exceptions=False):
+        # type: (iter, LogoStore, bool, bool, int, Checkpoint, bool) -> AsyncIterator
+        """
+        Yields (domain, StoredLogo) for many domains in order of completion.
+        See RiteTagApi.company_logos.
+        """
+        async for result in self._imap_unordered(
+                lambda d: self._store_logo(d, store, generateFallbackLogo, square),
+                domains, window, checkpoint, return_exceptions):
+            yield result
+
+    async def _store_logo(self, domain, store, generateFallbackLogo, square):
+        # type: (str, LogoStore, bool, bool) -> StoredLogo
+        logo = await self.company_logo_2(domain, generateFallbackLogo)
+        if not logo.is_found:
+            return StoredLogo(logo)
+        variants = [False, True] if square else [False]
+        paths = await asyncio.gather(*[self._store_logo_variant(store, logo, x) for x in variants])
+        return StoredLogo(logo, *paths)
+
+    async def _store_logo_variant(self, store, logo, square):
+        # type: (LogoStore, Logo, bool) -> str
+        url, permanent_url, ext = logo.variant(square)
+        key = url if permanent_url is None else permanent_url
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(None, store.get, key)
+        if path is None:
+            # logos are small, they are read whole and written outside of the event loop
+            response = await self._request('GET', url, allow_redirects=True)
+            if response.status_code != 200:
+                raise RiteTagException('Download of {} failed with status {}'.format(url, response.status_code))
+            path = await loop.run_in_executor(None, store.add, key, response.raw, ext)
+        return path
+
+    @async_api_call
+    async def list_of_cta(self):
+        # type: () -> [Cta]
+        """
+        Returns list of available Link Ads for any given Rite.ly user.
+        Requires each user to authenticate with RiteKit.
+        """
+        data = await self._get_json('/v1/link/cta', {})
+        return Parser.cta_list(data)
+
+    @async_api_call
+    async def shorten_url(self, url, cta_id):
+        # type: (str, int) -> Link
+        """
+        Returns a short link with a given Link Ad (a Rite.ly user's advertisements that are iFramed on URLs).
+
+        Parameters
+        ----------
+        url : str
+            URL to be shortened
+        cta_id : int
+            Link Ad ID returned by List of CTAs endpoint
+        """
+        url = self._sanitize_url(url)
+        data = await self._get_json('/v1/link/short-link', {'url': url, 'cta': cta_id})
+        return Parser.link(data)
+
+    async def free_mail_detection(self, domain):
+        # type: (str) -> bool
+        """
+        Returns true for a recognized free email address or domain.
+
+        Parameters
+        ----------
+        domain : str
+            domain or email address
+        """
+        domain = self._sanitize_domain(domain)
+        known = self._indexed('freemail', domain)
+        if known is not None:
+            return known
+        data = await self._get_json('/v2/person-insights/freemail-detection', {'domain': domain})
+        return self._index('freemail', domain, Parser.free_mail_detection(data))
+
+    async def disposable_email_detection(self, email):
+        # type: (str) -> bool
+        """
+        Returns true for a recognized disposable email address
+
+        Parameters
+        ----------
+        email : str
+            domain or email address
+        """
+        email = self._sanitize_domain(email)
+        known = self._indexed('disposable', email)
+        if known is not None:
+            return known
+        data = await self._get_json('/v2/person-insights/disposable-email-detection', {'email': email})
+        return self._index('disposable', email, Parser.disposable_email_detection(data))
+
+    async def email_typo(self, email):
+        # type: (str) -> [str]
+        """
+        Returns an array of most likely corrected email domains.
+
+        Parameters
+        ----------
+        email : str
+            domain or email address
+        """
+        email = self._sanitize_domain(email)
+        if self.typo_index is not None:
+            suggestions, confident = self.typo_index.suggest(self._email_domain(email))
+            if confident:
+                return suggestions
+        data = await self._get_json('/v2/person-insights/email-typo', {'email': email})
+        suggestions = Parser.email_typo(data)
+        if self.typo_index is not None:
+            self.typo_index.learn(self._email_domain(email), suggestions)
+        return suggestions
+
+    async def name_from_email_address(self, email):
+        # type: (str) -> str
+        """
+        Returns name and surname derived from an email address.
+
+        Parameters
+        ----------
+        email : str
+            domain or email address
+        """
+        email = self._sanitize_domain(email)
+        data = await self._get_json('/v2/person-insights/name-from-email-address', {'email': email})
+        return Parser.name_from_email_address(data)
+
+    async def free_mail_detections(self, emails, window=None, return_exceptions=False):
+        # type: (iter, int, bool) -> AsyncIterator
+        """
+        Yields (email, bool) for many email addresses or domains in order of completion.
+        See RiteTagApi.free_mail_detections.
+        """
+        async for result in self._imap_grouped(self.free_mail_detection, emails, self._email_domain, window,
+                                               return_exceptions):
+            yield result
+
+    async def disposable_email_detections(self, emails, window=None, return_exceptions=False):
+        # type: (iter, int, bool) -> AsyncIterator
+        """
+        Yields (email, bool) for many email addresses in order of completion.
+        See RiteTagApi.disposable_email_detections.
+        """
+        async for result in self._imap_grouped(self.disposable_email_detection, emails, self._email_domain,
+                                               window, return_exceptions):
+            yield result
+
+    async def email_typos(self, emails, window=None, return_exceptions=False):
+        # type: (iter, int, bool) -> AsyncIterator
+        """
+        Yields (email, [str]) for many email addresses in order of completion.
+        See RiteTagApi.email_typos.
+        """
+        async for result in self._imap_grouped(self.email_typo, emails, self._email_domain, window,
+                                               return_exceptions):
+            yield result
+
+    async def names_from_email_addresses(self, emails, window=None, return_exceptions=False):
+        # type: (iter, int, bool) -> AsyncIterator
+        """
+        Yields (email, str) for many email addresses in order of completion.
+        See RiteTagApi.names_from_email_addresses.
+        """
+        async for result in self._imap_grouped(self.name_from_email_address, emails, self._email_address, window,
+                                               return_exceptions):
+            yield result
+
+    async def company_name_to_domain(self, name):
+        # type: (str) -> [str]
+        """
+        Returns an array of most probable domains for a given company name.
+
+        Parameters
+        ----------
+        name : str
+            company name
+        """
+        data = await self._get_json('/v2/company-insights/name-to-domain', {'name': name})
+        return data['data']
+
+    async def brand_colors(self, domain):
+        # type: (str) -> [str]
+        """
+        Returns array of brand colors for a given domain.
+
+        Parameters
+        ----------
+        domain : str
+            company name
+        """
+        domain = self._sanitize_domain(domain)
+        data = await self._get_json('/v2/company-insights/brand-colors', {'name': domain})
+        return data['data']
+
+    async def extract_hastags_for_url(self, url, frame=False):
+        # type: (str, bool) -> [Hashtag]
+        """
+        Returns list of hashtag suggestions for any URL. Takes into account both semantic relevancy and
+        real-time hashtag popularity.
+
+        Parameters
+        ----------
+        url : str
+            url
+        frame : bool
+            Return HashtagFrame with numpy columns instead of list of Hashtag
+        """
+        url = self._sanitize_url(url)
+        content, data = await self._get_content('/v2/stats/hashtags-for-url', {'url': url})
+        return self._hashtag_list(content, 'hashtags', frame, data)
+
+    async def extract_article_for_url(self, url):
+        # type: (str) -> ArticleForUrl
+        """
+        Returns a title and a text of an article extracted from a URL (ignoring text in headers, footers, columns etc.).
+
+        Parameters
+        ----------
+        url : str
+            url
+        """
+        url = self._sanitize_url(url)
+        data = await self._get_json('/v2/text/extract-article', {'url': url})
+        return Parser.article_for_url(data)
+
+    async def extract_top_image_for_url(self, url):
+        # type: (str) -> str
+        """
+        Returns an image URL extracted from a page URL
+
+        Parameters
+        ----------
+        url : str
+            url
+        """
+        url = self._sanitize_url(url)
+        data = await self._get_json('/v2/image/extract-image', {'url': url})
+        return data['top_image']
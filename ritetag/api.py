@@ -1,37 +1,157 @@
 import requests
-import base64
+import hashlib
+import json
+import os
 import re
-
+import threading
+import time
+
+from collections import OrderedDict, deque
+from itertools import count
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from requests.adapters import HTTPAdapter
+
+from .banned import BannedHashtagIndex
+from .batching import HashtagStatsCoalescer, SingleFlight
+from .cache import CachePolicy, MemoryCache, RenderCache
+from .checkpoint import Checkpoint
+from .history import HistoryStore
+from .jsonlib import HashtagListDecoder, get_loads, msgspec
+from .logos import LogoStore
+from .preprocess import ImagePreprocessor
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy, RetryStrategy
+from .upload import Base64JsonBody, GzipBody, RequestBody
 from .decorators import api_call, api_request
+from .domains import DomainIndex
+from .typos import TypoIndex
 from .response import *
 from .builders import *
-from .exceptions import RiteTagException, ImageFormatException
+from .builders import param_value
+from .frame import HashtagFrame
+from .exceptions import RiteTagException, ImageFormatException, PartialResultException
 try:
     # python2
+    from itertools import izip as zip
     from urlparse import urlparse
+    from urllib import urlencode
 except:
     # python3
-    from urllib.parse import urlparse
+    from urllib.parse import urlparse, urlencode
+
+# transport errors worth a retry, invalid URLs or headers and redirect loops fail again on every attempt
+RETRIED_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+# marks the end of an iterator
+_END = object()
 
 
-class RiteTagApi:
+def create_session(pool_size=10):
+    # type: (int) -> requests.Session
+    """
+    Returns a session keeping up to pool_size keep-alive connections per host.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
-    def __init__(self, client_id):
-        # type: (str) -> RiteTagApi
+
+class _Groups(object):
+    """
+    Items waiting for the result of their key and the least recently used results of finished keys,
+    so every distinct key is computed once. See RiteTagApi._imap_grouped.
+    """
+
+    def __init__(self, max_results):
+        # type: (int) -> _Groups
+        self.max_results = max_results
+        self.results = OrderedDict()
+        self.waiting = {}
+        self.size = 0
+
+    def get(self, key):
+        # type: (object) -> object
+        """
+        Returns result of a finished key or _END.
+        """
+        result = self.results.pop(key, _END)
+        if result is not _END:
+            # reinserted as the most recently used
+            self.results[key] = result
+        return result
+
+    def add(self, item, key):
+        # type: (object, object) -> bool
+        """
+        Adds an item waiting for its key, returns True for a key that has to be computed.
+        """
+        self.size += 1
+        if key in self.waiting:
+            self.waiting[key].append(item)
+            return False
+        self.waiting[key] = [item]
+        return True
+
+    def done(self, key, result=_END):
+        # type: (object, object) -> list
+        """
+        Returns items waiting for a finished key, a result is kept for the following items.
+        """
+        if result is not _END:
+            self.results[key] = result
+            if len(self.results) > self.max_results:
+                self.results.popitem(last=False)
+        items = self.waiting.pop(key)
+        self.size -= len(items)
+        return items
+
+
+class BaseRiteTagApi(object):
+    """
+    Shared state and input handling of the blocking and the asyncio client.
+    """
+
+    # maximum number of hashtags accepted by /v1/stats/multiple-hashtags
+    HASHTAG_STATS_CHUNK_SIZE = 100
+
+    def __init__(self, client_id, concurrency=4, cache=None, cache_policy=None, history_store=None,
+                 rate_limiter=None, retry=None, json_decoder=None, image_preprocessor=None, render_cache=None,
+                 domain_index=None, typo_index=None, banned_hashtag_index=None):
+        # type: (str, int, MemoryCache, CachePolicy, HistoryStore, RateLimiter, RetryStrategy, object, ImagePreprocessor, RenderCache, DomainIndex, TypoIndex, BannedHashtagIndex) -> BaseRiteTagApi
         self.base_uri = 'https://api.ritekit.com'
         self.client_id = client_id
+        self.concurrency = concurrency
+        self.cache = cache
+        self.cache_policy = CachePolicy() if cache_policy is None else cache_policy
+        self.history_store = history_store
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self.image_preprocessor = image_preprocessor
+        self.render_cache = render_cache
+        self.domain_index = domain_index
+        self.typo_index = typo_index
+        self.banned_hashtag_index = banned_hashtag_index
         self.limit = None
         self.callbacks = []
-
-    def _get_headers(self, json=False):
-        # type (bool) -> dict
-        headers = {
+        self._decode = get_loads(json_decoder)
+        # hashtag lists skip the generic decoder unless a specific one is requested
+        use_typed = msgspec is not None and json_decoder in (None, 'msgspec')
+        self._hashtag_decoder = HashtagListDecoder() if use_typed else None
+        # headers are sent per request, the session is shared with external image hosts
+        self._headers = {
             'User-Agent': 'RiteTag API client 1.0',
             'Authorization': 'Bearer {}'.format(self.client_id)
         }
-        if json:
-            headers['Content-Type'] = 'application/json'
-        return headers
+        self._json_headers = dict(self._headers)
+        self._json_headers['Content-Type'] = 'application/json'
+
+    def _get_headers(self, json=False):
+        # type (bool) -> dict
+        return self._json_headers if json else self._headers
 
     def _set_api_limits(self, code, headers):
         # type: (int, dict) -> None
@@ -47,10 +167,14 @@ class RiteTagApi:
                 headers[keys[1]],
                 headers[keys[2]],
             )
+            if self.rate_limiter is not None:
+                self.rate_limiter.update(self.limit)
         else:
             raise RiteTagException('Something went wrong.')
 
     def _check_api_limits(self):
+        if self.limit is None:
+            return
         for c in self.callbacks:
             if self.limit.usage >= c[0]:
                 c[1](self.limit)
@@ -86,6 +210,30 @@ class RiteTagApi:
         except Exception as e:
             raise RiteTagException('Invalid domain')
 
+    def _email_domain(self, email):
+        # type: (str) -> str
+        return self._sanitize_domain(email.strip().rsplit('@', 1)[-1].lower())
+
+    def _email_address(self, email):
+        # type: (str) -> str
+        local, at, domain = email.strip().rpartition('@')
+        return self._sanitize_domain('{}{}{}'.format(local, at, domain.lower()))
+
+    def _indexed(self, kind, domain):
+        # type: (str, str) -> bool
+        """
+        Returns the answer of the domain index for a sanitized domain or email, None when it is unknown.
+        """
+        if self.domain_index is None:
+            return None
+        return self.domain_index.get(kind, self._email_domain(domain))
+
+    def _index(self, kind, domain, value):
+        # type: (str, str, bool) -> bool
+        if self.domain_index is not None:
+            self.domain_index.add(kind, self._email_domain(domain), value)
+        return value
+
     def _sanitize_url(self, url):
         # type: (str) -> str
         try:
@@ -95,40 +243,430 @@ class RiteTagApi:
         except Exception as e:
             raise RiteTagException('Invalid url')
 
-    def _get_image_from_url(self, url):
-        # type: (str) -> Image
-        img = requests.request('GET', url, stream=True)
-        return Parser.image(img, True)
+    def _hashtag_chunks(self, hashtags):
+        # type: ([str]) -> [[str]]
+        unique = []
+        seen = set()
+        for hashtag in map(self._sanitize_hashtag, hashtags):
+            if hashtag not in seen:
+                seen.add(hashtag)
+                unique.append(hashtag)
+        size = self.HASHTAG_STATS_CHUNK_SIZE
+        return [unique[i:i + size] for i in range(0, len(unique), size)]
+
+    @staticmethod
+    def _merge_chunks(chunks, outcomes, merge=None):
+        # type: ([list], list, callable) -> list
+        parts = []
+        errors = []
+        for chunk, outcome in zip(chunks, outcomes):
+            if isinstance(outcome, Exception):
+                errors.append((chunk, outcome))
+            else:
+                parts.append(outcome)
+        results = [x for part in parts for x in part] if merge is None else merge(parts)
+        if len(errors) == 1 and len(chunks) == 1:
+            raise errors[0][1]
+        if errors:
+            raise PartialResultException(results, errors)
+        return results
+
+    @staticmethod
+    def _request_key(method, path, params, data=None):
+        # type: (str, str, dict, dict) -> tuple
+        params = tuple(sorted((k, param_value(v)) for k, v in params.items())) if params else ()
+        if data is not None:
+            data = hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+        return method, path, params, data
+
+    @staticmethod
+    def _cache_key(path, params):
+        # type: (str, dict) -> str
+        return '{}?{}'.format(path, urlencode(sorted((k, param_value(v)) for k, v in params.items())))
+
+    def _cached(self, path, params):
+        # type: (str, dict) -> (str, float, bytes)
+        """
+        Returns cache key, expiration and cached body of a GET request, key is None when it is not cacheable.
+        """
+        if self.cache is None:
+            return None, None, None
+        expires_at = self.cache_policy.expires_at(path, time.time())
+        if expires_at is None:
+            return None, None, None
+        key = self._cache_key(path, params)
+        return key, expires_at, self.cache.get(key)
+
+    def _cacheable(self, response):
+        # type: (Response) -> dict
+        """
+        Returns the decoded body of a successful response, None for error payloads, which are never cached.
+        """
+        if response.status_code != 200:
+            return None
+        try:
+            data = self._decode(response.content)
+        except Exception:
+            return None
+        return data if isinstance(data, dict) and data.get('result') is True else None
+
+    def _hashtag_list(self, content, key, frame=False, data=None):
+        # type: (bytes, str, bool, dict) -> [Hashtag]
+        # a body decoded already is not decoded again
+        if data is not None:
+            return Parser.hashtag_list(data, key, frame)
+        if not frame and self._hashtag_decoder is not None:
+            result = self._hashtag_decoder.decode(content, key)
+            if result is not None:
+                return result
+        return Parser.hashtag_list(self._decode(content), key, frame)
+
+    def _retry_policy(self, path):
+        # type: (str) -> RetryPolicy
+        if self.retry is None:
+            return None
+        self.retry.budget.deposit()
+        return self.retry.policy(path)
+
+    def _may_retry(self, delay):
+        # type: (float) -> bool
+        return delay is not None and self.retry.budget.withdraw()
+
+    def _image_body(self, image, use_mmap=False, gzip=False, preprocess=True):
+        # type: (str, bool, bool, bool) -> object
+        """
+        Returns body of an image suggestion request, local files are encoded while the request is sent.
+        """
+        if os.path.isfile(image):
+            if preprocess and self.image_preprocessor is not None:
+                image = self.image_preprocessor.process(image)
+            body = Base64JsonBody(image, 'image', use_mmap=use_mmap)
+            return GzipBody(body) if gzip else body
+        return {'image': self._sanitize_url(image)}
+
+    def _body_headers(self, body):
+        # type: (RequestBody) -> dict
+        headers = dict(self._headers)
+        headers['Content-Type'] = body.content_type
+        if body.content_encoding is not None:
+            headers['Content-Encoding'] = body.content_encoding
+        if hasattr(body, '__len__'):
+            headers['Content-Length'] = str(len(body))
+        return headers
+
+    def on_limit(self, percentage, callback):
+        # type: (int, callable) -> None
+        self.callbacks.append(
+            [percentage, callback]
+        )
+
+
+class RiteTagApi(BaseRiteTagApi):
+
+    def __init__(self, client_id, pool_size=10, session=None, concurrency=4,
+                 coalesce=False, coalesce_window=0.005, coalesce_max_batch=100, single_flight=False,
+                 cache=None, cache_policy=None, history_store=None, rate_limiter=None, retry=None, json_decoder=None,
+                 image_preprocessor=None, render_cache=None, domain_index=None, typo_index=None,
+                 banned_hashtag_index=None):
+        # type: (str, int, requests.Session, int, bool, float, int, bool, MemoryCache, CachePolicy, HistoryStore, RateLimiter, RetryStrategy, object, ImagePreprocessor, RenderCache, DomainIndex, TypoIndex, BannedHashtagIndex) -> RiteTagApi
+        """
+        Parameters
+        ----------
+        client_id : str
+            Access token
+        pool_size : int
+            Number of keep-alive connections kept open per host
+        session : requests.Session
+            Custom session, it is not closed by close()
+        concurrency : int
+            Maximum number of parallel requests of one batch call
+        coalesce : bool
+            Merge single hashtag stats lookups from concurrent threads into one request
+        coalesce_window : float
+            Seconds a single hashtag lookup waits for others to be merged with
+        coalesce_max_batch : int
+            Maximum number of merged hashtags, up to 100
+        single_flight : bool
+            Concurrent identical requests share one in-flight HTTP call
+        cache : MemoryCache
+            Cache of responses, nothing is cached by default
+        cache_policy : CachePolicy
+            Time to live of cached responses per endpoint
+        history_store : HistoryStore
+            Local store extended by history() and used instead of requests when it is up to date
+        rate_limiter : RateLimiter
+            Paces requests to spread the remaining API credits until the limit resets
+        retry : RetryStrategy
+            Retries of failed requests, requests are not retried by default
+        json_decoder : object
+            'orjson', 'msgspec', 'json' or a callable decoding response bytes, the fastest installed one by default
+        image_preprocessor : ImagePreprocessor
+            Downscales local images before hashtag suggestions, images are uploaded unchanged by default
+        render_cache : RenderCache
+            Cache of images rendered by text_to_image, nothing is cached by default
+        domain_index : DomainIndex
+            Local answers of freemail and disposable email detection, the API is asked only for unknown domains
+        typo_index : TypoIndex
+            Local email typo suggestions, the API is asked only when they are not confident
+        banned_hashtag_index : BannedHashtagIndex
+            Local banned Instagram hashtags, the API is asked only about posts with unknown hashtags
+        """
+        super(RiteTagApi, self).__init__(client_id, concurrency, cache, cache_policy, history_store,
+                                         rate_limiter, retry, json_decoder, image_preprocessor, render_cache,
+                                         domain_index, typo_index, banned_hashtag_index)
+        self._own_session = session is None
+        self.session = create_session(pool_size) if session is None else session
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._single_flight = SingleFlight() if single_flight else None
+        self._coalescer = None
+        if coalesce:
+            self._coalescer = HashtagStatsCoalescer(
+                self._hashtag_stats_chunk, coalesce_window,
+                min(coalesce_max_batch, self.HASHTAG_STATS_CHUNK_SIZE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        # type: () -> None
+        """
+        Closes pooled connections of the client.
+        """
+        if self._coalescer is not None:
+            self._coalescer.flush()
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+        if self._own_session:
+            self.session.close()
+
+    def _get_executor(self):
+        # type: () -> ThreadPoolExecutor
+        # fan-out methods of many threads share one executor
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        return self._executor
+
+    def _map_chunks(self, fn, chunks, merge=None):
+        # type: (callable, [list], callable) -> list
+        if len(chunks) == 1:
+            outcomes = [self._call_chunk(fn, chunks[0])]
+        else:
+            futures = [self._get_executor().submit(self._call_chunk, fn, c) for c in chunks]
+            outcomes = [f.result() for f in futures]
+        return self._merge_chunks(chunks, outcomes, merge)
+
+    def _imap_unordered(self, fn, items, window=None, checkpoint=None, return_exceptions=False):
+        # type: (callable, iter, int, Checkpoint, bool) -> iter
+        """
+        Yields (item, fn(item)) in order of completion. Items are taken lazily, at most window run at once.
+        """
+        window = 2 * self.concurrency if window is None else window
+        items = iter(items)
+        running = {}
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(running) < window:
+                    item = next(items, _END)
+                    if item is _END:
+                        exhausted = True
+                    elif checkpoint is None or item not in checkpoint:
+                        running[self._get_executor().submit(fn, item)] = item
+                if not running:
+                    return
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        if checkpoint is not None:
+                            checkpoint.add(item)
+                        yield item, future.result()
+                    elif return_exceptions:
+                        yield item, error
+                    else:
+                        raise error
+        finally:
+            for future in running:
+                future.cancel()
+
+    def _imap_grouped(self, fn, items, key, window=None, return_exceptions=False, max_results=100000):
+        # type: (callable, iter, callable, int, bool, int) -> iter
+        """
+        Yields (item, fn(key(item))) in order of completion, fn is called once per distinct key.
+
+        Items are taken lazily, at most window keys run at once. Memory is bounded by max_results finished
+        results and the items waiting for running keys.
+        """
+        window = 2 * self.concurrency if window is None else window
+        max_waiting = 64 * window
+        groups = _Groups(max_results)
+        items = iter(items)
+        running = {}
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(running) < window and groups.size < max_waiting:
+                    item = next(items, _END)
+                    if item is _END:
+                        exhausted = True
+                        continue
+                    try:
+                        k = key(item)
+                    except Exception as e:
+                        if not return_exceptions:
+                            raise
+                        yield item, e
+                        continue
+                    result = groups.get(k)
+                    if result is not _END:
+                        yield item, result
+                    elif groups.add(item, k):
+                        running[self._get_executor().submit(fn, k)] = k
+                if not running:
+                    return
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    k = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        result = future.result()
+                        for item in groups.done(k, result):
+                            yield item, result
+                    elif return_exceptions:
+                        # a failed key is tried again by the following items
+                        for item in groups.done(k):
+                            yield item, error
+                    else:
+                        raise error
+        finally:
+            for future in running:
+                future.cancel()
+
+    @staticmethod
+    def _call_chunk(fn, chunk):
+        try:
+            return fn(chunk)
+        except Exception as e:
+            return e
+
+    def _get_image_from_url(self, url, max_size=None):
+        # type: (str, int) -> Image
+        img = self.session.request('GET', url, stream=True)
+        return Parser.image(img, True, max_size)
+
+    def _send(self, method, path, params, data=None, stream=False):
+        # type: (str, str, dict, object, bool) -> Response
+        kwargs = {
+            'params': params,
+            'stream': stream,
+        }
+        if isinstance(data, RequestBody):
+            kwargs['headers'] = self._body_headers(data)
+            kwargs['data'] = data
+        else:
+            kwargs['headers'] = self._get_headers(json=data is not None)
+            kwargs['json'] = data
+        # streamed bodies can be read only once, they are never shared
+        if stream or isinstance(data, RequestBody) or self._single_flight is None:
+            return self._execute(method, path, **kwargs)
+        return self._single_flight.do(self._request_key(method, path, params, data), self._execute,
+                                      method, path, **kwargs)
+
+    def _execute(self, method, path, **kwargs):
+        # type: (str, str, ...) -> Response
+        url = '{}{}'.format(self.base_uri, path)
+        policy = self._retry_policy(path)
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except RETRIED_EXCEPTIONS as e:
+                sent = not isinstance(e, requests.ConnectTimeout)
+                delay = None if policy is None else policy.delay(attempt, error=True, sent=sent)
+                if not self._may_retry(delay):
+                    raise
+            else:
+                delay = None if policy is None else policy.delay(attempt, response.status_code, response.headers)
+                if not self._may_retry(delay):
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
 
     @api_request
     def _get_request(self, path, params, stream=False):
         # type: (str, dict, bool) -> Response
-        return requests.request('GET', '{}{}'.format(self.base_uri, path),
-                                headers=self._get_headers(), params=params, stream=stream)
+        return self._send('GET', path, params, stream=stream)
 
     @api_request
     def _post_request(self, path, data, params=None, stream=False):
         # type: (str, dict, dict, bool) -> Response
         if params is None:
             params = {}
-        resp = requests.request('POST', '{}{}'.format(self.base_uri, path,),
-                                headers=self._get_headers(json=True), params=params, json=data, stream=stream)
-        return resp
+        return self._send('POST', path, params, data, stream)
+
+    def _get_content(self, path, params):
+        # type: (str, dict) -> (bytes, dict)
+        """
+        Returns body of a GET request and the decoded body when it was decoded to check it is cacheable, or None.
+        """
+        key, expires_at, content = self._cached(path, params)
+        data = None
+        if content is None:
+            response = self._get_request(path, params)
+            content = response.content
+            if key is not None:
+                data = self._cacheable(response)
+                if data is not None:
+                    self.cache.set(key, content, expires_at)
+        return content, data
+
+    def _get_json(self, path, params):
+        # type: (str, dict) -> dict
+        content, data = self._get_content(path, params)
+        return self._decode(content) if data is None else data
 
     @api_call
-    def hashtag_stats(self, hashtags):
-        # type: ([str]) -> [Hashtag]
+    def hashtag_stats(self, hashtags, frame=False):
+        # type: ([str], bool) -> [Hashtag]
         """
-        Returns real-time stats for up to 100 hashtags. Stats are updated hourly.
+        Returns real-time stats for hashtags. Stats are updated hourly.
+
+        Duplicate hashtags are requested only once. Lists longer than 100 hashtags are split into chunks
+        which are requested in parallel, results keep the input order. PartialResultException is raised
+        when some of the chunks fail, it holds the successful results and the failed chunks.
+
+        With coalescing enabled, single hashtag lookups are merged with lookups from other threads.
 
         Parameters
         ----------
         hashtags : [str]
              List of hashtag(s) without # mark
+        frame : bool
+            Return HashtagFrame with numpy columns instead of list of Hashtag
         """
-        hashtags = map(self._sanitize_hashtag, hashtags)
-        response = self._get_request('/v1/stats/multiple-hashtags', {'tags': ','.join(hashtags)})
-        return Parser.hashtag_list(response.json(), 'stats')
+        chunks = self._hashtag_chunks(hashtags)
+        if self._coalescer is not None and len(chunks) == 1 and len(chunks[0]) == 1:
+            result = [self._coalescer.submit(chunks[0][0]).result()]
+            return HashtagFrame.from_hashtags(result) if frame else result
+        merge = HashtagFrame.concat if frame else None
+        return self._map_chunks(lambda c: self._hashtag_stats_chunk(c, frame), chunks, merge)
+
+    def _hashtag_stats_chunk(self, hashtags, frame=False):
+        # type: ([str], bool) -> [Hashtag]
+        content, data = self._get_content('/v1/stats/multiple-hashtags', {'tags': ','.join(hashtags)})
+        return self._hashtag_list(content, 'stats', frame, data)
 
     @api_call
     def auto_hashtag(self, post, max_hashtags=2,
@@ -146,13 +684,13 @@ class RiteTagApi:
         hashtag_position: HashtagPosition
             Position of hashtags: end => at the end of the text, auto => anywhere in the text or at the end
         """
-        response = self._get_request('/v1/stats/auto-hashtag',
-                                     {'post': post, 'maxHashstags': max_hashtags, 'hashtagPosition': hashtag_position})
-        return Parser.get_text(response.json(), 'post')
+        data = self._get_json('/v1/stats/auto-hashtag',
+                              {'post': post, 'maxHashstags': max_hashtags, 'hashtagPosition': hashtag_position})
+        return Parser.get_text(data, 'post')
 
     @api_call
-    def hashtag_suggestion_for_text(self, text):
-        # type: (str) -> [Hashtag]
+    def hashtag_suggestion_for_text(self, text, frame=False):
+        # type: (str, bool) -> [Hashtag]
         """
         Returns list of hashtag suggestions for a single-word topic or for short block of text (up to 1000 characters).
 
@@ -160,13 +698,15 @@ class RiteTagApi:
         ----------
         text : str
             Text up to 1000 characters for which hashtags should be suggested
+        frame : bool
+            Return HashtagFrame with numpy columns instead of list of Hashtag
          """
-        response = self._get_request('/v1/stats/hashtag-suggestions', {'text': text})
-        return Parser.hashtag_list(response.json(), 'data')
+        content, data = self._get_content('/v1/stats/hashtag-suggestions', {'text': text})
+        return self._hashtag_list(content, 'data', frame, data)
 
     @api_call
-    def hashtag_suggestion_for_image(self, image):
-        # type: (str) -> [Hashtag]
+    def hashtag_suggestion_for_image(self, image, use_mmap=False, gzip=False):
+        # type: (str, bool, bool) -> [Hashtag]
         """
         Returns list of hashtag suggestions for an image. Takes into account both semantic
         relevancy as well as real-time hashtag engagement.
@@ -174,19 +714,95 @@ class RiteTagApi:
         Parameters
         ----------
         image : str
-            URL of an image
+            URL or path of an image, local files are streamed with constant memory
+        use_mmap : bool
+            Read local files through a memory map
+        gzip : bool
+            Compress the request body of local files
         """
-        try:
-            with open(image, "rb") as f:
-                result = base64.b64encode(f.read()).decode('utf-8')
-        except IOError:
-            result = self._sanitize_url(image)
+        return self._post_image(self._image_body(image, use_mmap, gzip))
 
-        body = {
-            'image': result
-        }
+    def _post_image(self, body):
+        # type: (object) -> [Hashtag]
         response = self._post_request('/v1/stats/hashtag-suggestions-image', body)
-        return Parser.hashtag_list(response.json(), 'data')
+        return self._hashtag_list(response.content, 'data')
+
+    def _suggest_for_prepared_image(self, image, use_mmap, gzip):
+        # type: (str, bool, bool) -> [Hashtag]
+        return self._post_image(self._image_body(image, use_mmap, gzip, preprocess=False))
+
+    def hashtag_suggestions_for_images(self, images, checkpoint=None, window=None, return_exceptions=False,
+                                       use_mmap=False, gzip=False):
+        # type: (iter, Checkpoint, int, bool, bool, bool) -> iter
+        """
+        Yields (image, [Hashtag]) for many images in order of completion.
+
+        Up to concurrency requests run in parallel while the image_preprocessor reduces next local images
+        in its worker processes. Images are taken from the input lazily, at most window images are in progress,
+        so the pipeline waits while the caller does not consume results.
+
+        Parameters
+        ----------
+        images : iter
+            URLs or paths of images
+        checkpoint : Checkpoint
+            Finished images are recorded and skipped, a restarted run continues where the last one stopped
+        window : int
+            Maximum number of images in progress, twice the concurrency by default
+        return_exceptions : bool
+            Yield (image, exception) for failed images instead of raising, failed images are not recorded
+        use_mmap : bool
+            Read local files through a memory map
+        gzip : bool
+            Compress the request body of local files
+        """
+        window = 2 * self.concurrency if window is None else window
+        images = iter(images)
+        preparing = {}
+        ready = deque()
+        uploading = {}
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(preparing) + len(ready) + len(uploading) < window:
+                    image = next(images, _END)
+                    if image is _END:
+                        exhausted = True
+                    elif checkpoint is not None and image in checkpoint:
+                        continue
+                    elif self.image_preprocessor is not None and os.path.isfile(image):
+                        preparing[self.image_preprocessor.submit(image)] = image
+                    else:
+                        ready.append((image, image))
+                while ready and len(uploading) < self.concurrency:
+                    image, prepared = ready.popleft()
+                    future = self._get_executor().submit(self._suggest_for_prepared_image, prepared, use_mmap, gzip)
+                    uploading[future] = image
+                if not preparing and not uploading:
+                    return
+                done, _ = wait(list(preparing) + list(uploading), return_when=FIRST_COMPLETED)
+                for future in done:
+                    error = future.exception()
+                    if future in preparing:
+                        image = preparing.pop(future)
+                        if error is None:
+                            ready.append((image, future.result()))
+                            continue
+                    else:
+                        image = uploading.pop(future)
+                    if error is None:
+                        if checkpoint is not None:
+                            checkpoint.add(image)
+                        self._check_api_limits()
+                        yield image, future.result()
+                    elif return_exceptions:
+                        yield image, error
+                    else:
+                        raise error
+        finally:
+            # an abandoned or failed run does not leave work behind
+            for future in list(preparing) + list(uploading):
+                future.cancel()
 
     @api_call
     def history(self, hashtag):
@@ -195,18 +811,26 @@ class RiteTagApi:
         Returns historical stats for a given hashtag from the last 30 days.
         Add hashtag without hash mark to the URL.
 
+        With a history store, the result is stored and stored data up to date are returned without a request.
+
         Parameters
         ----------
         hashtag : str
             Hashtag without # mark
         """
         hashtag = self._sanitize_hashtag(hashtag)
-        response = self._get_request('/v1/stats/history/{}'.format(hashtag), {})
-        return Parser.history(response.json())
+        stored = None if self.history_store is None else self.history_store.recent(hashtag)
+        if stored is not None:
+            return stored
+        data = self._get_json('/v1/stats/history/{}'.format(hashtag), {})
+        history = Parser.history(data)
+        if self.history_store is not None:
+            self.history_store.add(history)
+        return history
 
     @api_call
-    def trending_hashtags(self, green=True, latin=True):
-        # type: (bool, bool) -> [Hashtag]
+    def trending_hashtags(self, green=True, latin=True, frame=False):
+        # type: (bool, bool, bool) -> [Hashtag]
         """
         Returns list of hashtags currently trending on Twitter.
 
@@ -216,9 +840,11 @@ class RiteTagApi:
             restrict results only to green hashtags (hot now).
         latin : bool
             restrict results only to hashtags with latin characters
+        frame : bool
+            Return HashtagFrame with numpy columns instead of list of Hashtag
         """
-        response = self._get_request('/v1/search/trending', {'green': int(green), 'latin': int(latin)})
-        return Parser.hashtag_list(response.json(), 'tags')
+        content, data = self._get_content('/v1/search/trending', {'green': int(green), 'latin': int(latin)})
+        return self._hashtag_list(content, 'tags', frame, data)
 
     @api_call
     def banned_instagram_hashtags(self, post):
@@ -231,8 +857,15 @@ class RiteTagApi:
         post : str
             Text up to 1000 characters from which hashtags banned on Instagram should be removed.
         """
-        response = self._get_request('/v2/instagram/hashtags-cleaner', {'post': post})
-        return Parser.banned_instagram_hashtags(response.json())
+        if self.banned_hashtag_index is not None:
+            result = self.banned_hashtag_index.clean(post)
+            if result is not None:
+                return result
+        data = self._get_json('/v2/instagram/hashtags-cleaner', {'post': post})
+        result = Parser.banned_instagram_hashtags(data)
+        if self.banned_hashtag_index is not None:
+            self.banned_hashtag_index.learn(post, result)
+        return result
 
     @api_call
     def emoji_suggestion(self, text):
@@ -245,8 +878,8 @@ class RiteTagApi:
         text : str
             Text up to 1000 characters for which emojis should be suggested.
         """
-        response = self._get_request('/v1/emoji/suggestions', {'text': text})
-        return Parser.emoji(response.json())
+        data = self._get_json('/v1/emoji/suggestions', {'text': text})
+        return Parser.emoji(data)
 
     @api_call
     def auto_emojify(self, text):
@@ -259,28 +892,74 @@ class RiteTagApi:
         text: str
             Text up to 1000 characters into which emojis should be added.
         """
-        response = self._get_request('/v1/emoji/auto-emojify', {'text': text})
-        return Parser.get_text(response.json(), 'text')
+        data = self._get_json('/v1/emoji/auto-emojify', {'text': text})
+        return Parser.get_text(data, 'text')
 
     @api_call
-    def text_to_image(self, image_builder):
-        # type: (ImageBuilder) -> Image
+    def text_to_image(self, image_builder, max_size=None):
+        # type: (ImageBuilder, int) -> Image
         """
         Returns an image created from text according to given style parameters
 
         Parameters
         ----------
         image_builder : ImageBuilder
-            see ImageBuilder
+            see ImageBuilder, or a variant of ImageTemplate
+        max_size : int
+            Maximum size of the image in bytes, unlimited by default
         """
-        response = self._get_request('/v2/image/quote', params=image_builder.build(), stream=True)
-        return Parser.image(response)
+        if self.render_cache is None:
+            return self._render(image_builder, max_size)
+        key = self.render_cache.key(image_builder.build())
+        image = self.render_cache.get(key, max_size)
+        if image is None:
+            image = self._render(image_builder, max_size)
+            with self.render_cache.writer(key, image.ext) as f:
+                image.write_to(f)
+            image = self.render_cache.open(key, max_size)
+            if image is None:
+                # evicted by a concurrent writer right after it was written
+                image = self._render(image_builder, max_size)
+        return image
+
+    def _render(self, image_builder, max_size=None):
+        # type: (ImageBuilder, int) -> Image
+        response = self._get_request('/v2/image/quote', params=image_builder.query(), stream=True)
+        return Parser.image(response, max_size=max_size)
+
+    def text_to_images(self, image_builders, target_directory, filenames=None, window=None,
+                       return_exceptions=False, max_size=None):
+        # type: (iter, str, iter, int, bool, int) -> iter
+        """
+        Renders many images concurrently and streams them to a directory.
+        Yields (filename, path) in order of completion.
+
+        Parameters
+        ----------
+        image_builders : iter
+            ImageBuilder objects or variants of an ImageTemplate
+        target_directory : str
+            Directory of the images
+        filenames : iter
+            File names without extension, numbers in input order by default
+        window : int
+            Maximum number of images in progress, twice the concurrency by default
+        return_exceptions : bool
+            Yield (filename, exception) for failed images instead of raising
+        max_size : int
+            Maximum size of one image in bytes, unlimited by default
+        """
+        filenames = (str(i) for i in count()) if filenames is None else filenames
+        for (filename, _), result in self._imap_unordered(
+                lambda x: self.text_to_image(x[1], max_size).save(target_directory, x[0]),
+                zip(filenames, image_builders), window, None, return_exceptions):
+            yield filename, result
 
     @api_call
-    def animate_image(self, url, animation_type=AnimationType.glint):
-        # type: (str, AnimationType) -> Image
+    def animate_image(self, url, animation_type=AnimationType.glint, max_size=None):
+        # type: (str, AnimationType, int) -> Image
         """
-        Returns an animated GIF.
+        Returns an animated GIF, save() streams it to disk with constant memory.
 
         Parameters
         ----------
@@ -288,9 +967,11 @@ class RiteTagApi:
             URL of the original image
         animation_type : AnimationType
             Only "glint" is currently supported.
+        max_size : int
+            Maximum size of the image in bytes, unlimited by default
         """
         response = self._get_request('/v1/images/animate', {'url': url, 'type': animation_type}, stream=True)
-        return Parser.image(response)
+        return Parser.image(response, max_size=max_size)
 
     @api_call
     def company_logo(self, domain, generateFallbackLogo=False):
@@ -313,8 +994,8 @@ class RiteTagApi:
         """
         domain = self._sanitize_domain(domain)
         gen = 1 if generateFallbackLogo else 0
-        response = self._get_request('/v2/company-insights/logo', {'domain': domain, 'generateFallbackLogo': gen})
-        return Parser.company_logo(response.json())
+        data = self._get_json('/v2/company-insights/logo', {'domain': domain, 'generateFallbackLogo': gen})
+        return Parser.company_logo(data)
 
     @api_call
     def company_logo_2(self, domain, generateFallbackLogo=False):
@@ -335,8 +1016,61 @@ class RiteTagApi:
         """
         domain = self._sanitize_domain(domain)
         gen = 1 if generateFallbackLogo else 0
-        response = self._get_request('/v2/company-insights/logo', {'domain': domain, 'generateFallbackLogo': gen})
-        return Parser.company_logo_2(response.json())
+        data = self._get_json('/v2/company-insights/logo', {'domain': domain, 'generateFallbackLogo': gen})
+        return Parser.company_logo_2(data)
+
+    def company_logos(self, domains, store, generateFallbackLogo=False, square=True, window=None, checkpoint=None,
+                      return_exceptions=False):
+        # type: (iter, LogoStore, bool, bool, int, Checkpoint, bool) -> iter
+        """
+        Yields (domain, StoredLogo) for many domains in order of completion.
+
+        Up to concurrency logos are looked up in parallel, original and square logos are downloaded concurrently.
+        Logos whose permanent URL is already in the store are not downloaded again.
+
+        Parameters
+        ----------
+        domains : iter
+            Hostnames without http://
+        store : LogoStore
+            Store of the downloaded files
+        generateFallbackLogo : bool
+        square : bool
+            Download also the square logo
+        window : int
+            Maximum number of domains in progress, twice the concurrency by default
+        checkpoint : Checkpoint
+            Finished domains are recorded and skipped, a restarted run continues where the last one stopped
+        return_exceptions : bool
+            Yield (domain, exception) for failed domains instead of raising
+        """
+        downloads = ThreadPoolExecutor(max_workers=2 * self.concurrency)
+        try:
+            for result in self._imap_unordered(
+                    lambda d: self._store_logo(d, store, generateFallbackLogo, square, downloads),
+                    domains, window, checkpoint, return_exceptions):
+                yield result
+        finally:
+            downloads.shutdown(wait=False)
+
+    def _store_logo(self, domain, store, generateFallbackLogo, square, downloads):
+        # type: (str, LogoStore, bool, bool, ThreadPoolExecutor) -> StoredLogo
+        logo = self.company_logo_2(domain, generateFallbackLogo)
+        if not logo.is_found:
+            return StoredLogo(logo)
+        variants = [False, True] if square else [False]
+        futures = [downloads.submit(self._store_logo_variant, store, logo, x) for x in variants]
+        paths = [x.result() for x in futures]
+        return StoredLogo(logo, *paths)
+
+    def _store_logo_variant(self, store, logo, square):
+        # type: (LogoStore, Logo, bool) -> str
+        url, permanent_url, ext = logo.variant(square)
+        key = url if permanent_url is None else permanent_url
+        path = store.get(key)
+        if path is None:
+            path = store.download(url, self.session, key, ext)
+        return path
 
     @api_call
     def list_of_cta(self):
@@ -345,8 +1079,8 @@ class RiteTagApi:
         Returns list of available Link Ads for any given Rite.ly user.
         Requires each user to authenticate with RiteKit.
         """
-        response = self._get_request('/v1/link/cta', {})
-        return Parser.cta_list(response.json())
+        data = self._get_json('/v1/link/cta', {})
+        return Parser.cta_list(data)
 
     @api_call
     def shorten_url(self, url, cta_id):
@@ -362,8 +1096,8 @@ class RiteTagApi:
             Link Ad ID returned by List of CTAs endpoint
         """
         url = self._sanitize_url(url)
-        response = self._get_request('/v1/link/short-link', {'url': url, 'cta': cta_id})
-        return Parser.link(response.json())
+        data = self._get_json('/v1/link/short-link', {'url': url, 'cta': cta_id})
+        return Parser.link(data)
 
     def free_mail_detection(self, domain):
         # type: (str) -> bool
@@ -381,8 +1115,11 @@ class RiteTagApi:
             domain or email address
         """
         domain = self._sanitize_domain(domain)
-        response = self._get_request('/v2/person-insights/freemail-detection', {'domain': domain})
-        return Parser.free_mail_detection(response.json())
+        known = self._indexed('freemail', domain)
+        if known is not None:
+            return known
+        data = self._get_json('/v2/person-insights/freemail-detection', {'domain': domain})
+        return self._index('freemail', domain, Parser.free_mail_detection(data))
 
     def disposable_email_detection(self, email):
         # type: (str) -> bool
@@ -399,8 +1136,11 @@ class RiteTagApi:
             domain or email address
         """
         email = self._sanitize_domain(email)
-        response = self._get_request('/v2/person-insights/disposable-email-detection', {'email': email})
-        return Parser.disposable_email_detection(response.json())
+        known = self._indexed('disposable', email)
+        if known is not None:
+            return known
+        data = self._get_json('/v2/person-insights/disposable-email-detection', {'email': email})
+        return self._index('disposable', email, Parser.disposable_email_detection(data))
 
     def email_typo(self, email):
         # type: (str) -> [str]
@@ -417,8 +1157,15 @@ class RiteTagApi:
             domain or email address
         """
         email = self._sanitize_domain(email)
-        response = self._get_request('/v2/person-insights/email-typo', {'email': email})
-        return Parser.email_typo(response.json())
+        if self.typo_index is not None:
+            suggestions, confident = self.typo_index.suggest(self._email_domain(email))
+            if confident:
+                return suggestions
+        data = self._get_json('/v2/person-insights/email-typo', {'email': email})
+        suggestions = Parser.email_typo(data)
+        if self.typo_index is not None:
+            self.typo_index.learn(self._email_domain(email), suggestions)
+        return suggestions
 
     def name_from_email_address(self, email):
         # type: (str) -> str
@@ -437,8 +1184,53 @@ class RiteTagApi:
             domain or email address
         """
         email = self._sanitize_domain(email)
-        response = self._get_request('/v2/person-insights/name-from-email-address', {'email': email})
-        return Parser.name_from_email_address(response.json())
+        data = self._get_json('/v2/person-insights/name-from-email-address', {'email': email})
+        return Parser.name_from_email_address(data)
+
+    def free_mail_detections(self, emails, window=None, return_exceptions=False):
+        # type: (iter, int, bool) -> iter
+        """
+        Yields (email, bool) for many email addresses or domains in order of completion, see free_mail_detection.
+
+        Emails are grouped by domain, every distinct domain is looked up once and up to concurrency domains
+        in parallel. Emails are taken lazily, so lists of any size are screened with bounded memory.
+
+        Parameters
+        ----------
+        emails : iter
+            domains or email addresses
+        window : int
+            Maximum number of domains in progress, twice the concurrency by default
+        return_exceptions : bool
+            Yield (email, exception) for failed emails instead of raising
+        """
+        return self._imap_grouped(self.free_mail_detection, emails, self._email_domain, window, return_exceptions)
+
+    def disposable_email_detections(self, emails, window=None, return_exceptions=False):
+        # type: (iter, int, bool) -> iter
+        """
+        Yields (email, bool) for many email addresses in order of completion, see disposable_email_detection.
+        Emails are grouped by domain, see free_mail_detections.
+        """
+        return self._imap_grouped(self.disposable_email_detection, emails, self._email_domain, window,
+                                  return_exceptions)
+
+    def email_typos(self, emails, window=None, return_exceptions=False):
+        # type: (iter, int, bool) -> iter
+        """
+        Yields (email, [str]) of corrected domains for many email addresses in order of completion, see email_typo.
+        Emails are grouped by domain, see free_mail_detections.
+        """
+        return self._imap_grouped(self.email_typo, emails, self._email_domain, window, return_exceptions)
+
+    def names_from_email_addresses(self, emails, window=None, return_exceptions=False):
+        # type: (iter, int, bool) -> iter
+        """
+        Yields (email, str) for many email addresses in order of completion, see name_from_email_address.
+        Names depend on the whole address, only repeated addresses are looked up once.
+        """
+        return self._imap_grouped(self.name_from_email_address, emails, self._email_address, window,
+                                  return_exceptions)
 
     def company_name_to_domain(self, name):
         # type: (str) -> [str]
@@ -452,8 +1244,8 @@ class RiteTagApi:
         name : str
             company name
         """
-        response = self._get_request('/v2/company-insights/name-to-domain', {'name': name})
-        return response.json()['data']
+        data = self._get_json('/v2/company-insights/name-to-domain', {'name': name})
+        return data['data']
 
     def brand_colors(self, domain):
         # type: (str) -> [str]
@@ -466,11 +1258,11 @@ class RiteTagApi:
             company name
         """
         domain = self._sanitize_domain(domain)
-        response = self._get_request('/v2/company-insights/brand-colors', {'name': domain})
-        return response.json()['data']
+        data = self._get_json('/v2/company-insights/brand-colors', {'name': domain})
+        return data['data']
 
-    def extract_hastags_for_url(self, url):
-        # type: (str) -> [Hashtag]
+    def extract_hastags_for_url(self, url, frame=False):
+        # type: (str, bool) -> [Hashtag]
         """
         Returns list of hashtag suggestions for any URL. Takes into account both semantic relevancy and
         real-time hashtag popularity.
@@ -479,10 +1271,12 @@ class RiteTagApi:
         ----------
         url : str
             url
+        frame : bool
+            Return HashtagFrame with numpy columns instead of list of Hashtag
         """
         url = self._sanitize_url(url)
-        response = self._get_request('/v2/stats/hashtags-for-url', {'url': url})
-        return Parser.hashtag_list(response.json(), 'hashtags')
+        content, data = self._get_content('/v2/stats/hashtags-for-url', {'url': url})
+        return self._hashtag_list(content, 'hashtags', frame, data)
 
     def extract_article_for_url(self, url):
         # type: (str) -> ArticleForUrl
@@ -498,8 +1292,8 @@ class RiteTagApi:
             url
         """
         url = self._sanitize_url(url)
-        response = self._get_request('/v2/text/extract-article', {'url': url})
-        return Parser.article_for_url(response.json())
+        data = self._get_json('/v2/text/extract-article', {'url': url})
+        return Parser.article_for_url(data)
 
     def extract_top_image_for_url(self, url):
         # type: (str) -> str
@@ -512,11 +1306,5 @@ class RiteTagApi:
             url
         """
         url = self._sanitize_url(url)
-        response = self._get_request('/v2/image/extract-image', {'url': url})
-        return response.json()['top_image']
-
-    def on_limit(self, percentage, callback):
-        # type: (int, callable) -> None
-        self.callbacks.append(
-            [percentage, callback]
-        )
+        data = self._get_json('/v2/image/extract-image', {'url': url})
+        return data['top_image']
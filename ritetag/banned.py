@@ -0,0 +1,183 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+from .response import InstagramBannedHashtag
+
+# a hashtag with the whitespace before it, removed together with a banned hashtag
+HASHTAG_PATTERN = re.compile(r'(\s*)#(\w+)', re.UNICODE)
+
+
+def _hashtags(post):
+    # type: (str) -> [(re.Match, bool)]
+    """
+    Returns (match, exact) of hashtags in a post. A hashtag followed by anything but whitespace, as #foo-bar,
+    may be tokenized differently by Instagram and is not exact.
+    """
+    return [(x, x.end() == len(post) or post[x.end()].isspace()) for x in HASHTAG_PATTERN.finditer(post)]
+
+
+def _key(hashtag):
+    # type: (str) -> str
+    return hashtag.strip().lstrip('#').lower()
+
+
+class BannedHashtagIndex(object):
+    """
+    Local sets of hashtags known to be banned and known to be clean on Instagram.
+
+    A post is tokenized in one pass and every hashtag is looked up in the sets, so a post whose hashtags
+    are all known is cleaned without a request. Hashtags are learned from hashtags-cleaner responses
+    and can be imported from a snapshot.
+
+    Clean hashtags can get banned later, they are known only for max_age seconds after they were learned.
+    Posts with hashtags the tokenizer may split differently than Instagram, as #foo-bar, are always sent
+    to the API.
+    """
+
+    def __init__(self, banned=(), clean=(), max_age=7 * 24 * 3600, clock=time.time):
+        # type: ([str], [str], float, callable) -> BannedHashtagIndex
+        """
+        Parameters
+        ----------
+        banned : [str]
+            Hashtags known to be banned, with or without #
+        clean : [str]
+            Hashtags known to be clean, with or without #
+        max_age : float
+            Seconds a clean hashtag is known, None to keep clean hashtags forever
+        clock : callable
+            Returns current unix timestamp
+        """
+        self.max_age = max_age
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._banned = set()
+        # clean hashtag -> timestamp when it was learned
+        self._clean = {}
+        self.add(banned, True)
+        self.add(clean, False)
+
+    def __len__(self):
+        return len(self._banned) + len(self._clean)
+
+    def is_banned(self, hashtag):
+        # type: (str) -> bool
+        """
+        Returns True for a banned hashtag, False for a clean one and None for an unknown one.
+        """
+        key = _key(hashtag)
+        if key in self._banned:
+            return True
+        if self._is_clean(key, self.clock()):
+            return False
+        return None
+
+    def _is_clean(self, key, now):
+        # type: (str, float) -> bool
+        learned = self._clean.get(key)
+        return learned is not None and (self.max_age is None or now - learned < self.max_age)
+
+    def add(self, hashtags, banned):
+        # type: ([str], bool) -> None
+        """
+        Records hashtags as banned or clean, a hashtag is moved when its state changes.
+        """
+        keys = set(_key(x) for x in hashtags)
+        keys.discard('')
+        now = self.clock()
+        with self._lock:
+            if banned:
+                for key in keys:
+                    self._clean.pop(key, None)
+                self._banned |= keys
+            else:
+                self._banned -= keys
+                for key in keys:
+                    self._clean[key] = now
+
+    def clean(self, post):
+        # type: (str) -> InstagramBannedHashtag
+        """
+        Returns the post without banned hashtags, None when it contains a hashtag that is not known or not exact.
+        Banned hashtags are returned without #.
+        """
+        pieces = []
+        banned = []
+        position = 0
+        now = self.clock()
+        for match, exact in _hashtags(post):
+            if not exact:
+                return None
+            key = match.group(2).lower()
+            if key in self._banned:
+                pieces.append(post[position:match.start()])
+                position = match.end()
+                banned.append(match.group(2))
+            elif not self._is_clean(key, now):
+                return None
+        pieces.append(post[position:])
+        return InstagramBannedHashtag(''.join(pieces).strip(), banned)
+
+    def learn(self, post, result):
+        # type: (str, InstagramBannedHashtag) -> None
+        """
+        Learns from a hashtags-cleaner response, exact hashtags of the post which are not banned are clean.
+        No hashtag is learned as clean when the response reports a banned hashtag the tokenizer did not find.
+        """
+        banned = set(_key(x) for x in result.banned_hashtags)
+        hashtags = _hashtags(post)
+        self.add(banned, True)
+        if banned - set(x.group(2).lower() for x, _ in hashtags):
+            return
+        self.add([x.group(2) for x, exact in hashtags if exact and x.group(2).lower() not in banned], False)
+
+    def save(self, path):
+        # type: (str) -> None
+        """
+        Exports a snapshot to a file of JSON lines [hashtag, banned], the file is replaced atomically.
+        Expired clean hashtags are left out.
+        """
+        now = self.clock()
+        with self._lock:
+            clean = sorted(x for x in self._clean if self._is_clean(x, now))
+            entries = [(x, True) for x in sorted(self._banned)] + [(x, False) for x in clean]
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + '\n')
+            getattr(os, 'replace', os.rename)(temp, path)
+        except Exception:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+    def update(self, path):
+        # type: (str) -> None
+        """
+        Imports a snapshot exported by save(), its clean hashtags are known for max_age from now.
+        """
+        banned, clean = [], []
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                hashtag, is_banned = json.loads(line)
+                (banned if is_banned else clean).append(hashtag)
+        self.add(banned, True)
+        self.add(clean, False)
+
+    @classmethod
+    def load(cls, path, max_age=7 * 24 * 3600):
+        # type: (str, float) -> BannedHashtagIndex
+        """
+        Returns an index imported from a snapshot exported by save().
+        """
+        index = cls(max_age=max_age)
+        index.update(path)
+        return index
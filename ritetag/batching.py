@@ -0,0 +1,118 @@
+import threading
+
+from concurrent.futures import Future
+
+from .exceptions import RiteTagException
+
+
+class HashtagStatsCoalescer(object):
+    """
+    Merges single hashtag stats lookups from many threads into multi-hashtag requests.
+
+    A batch is sent when the window since its first hashtag elapses or when it reaches max_batch hashtags.
+    """
+
+    def __init__(self, fetch, window=0.005, max_batch=100):
+        # type: (callable, float, int) -> HashtagStatsCoalescer
+        """
+        Parameters
+        ----------
+        fetch : callable
+            Returns [Hashtag] for a list of sanitized hashtags
+        window : float
+            Seconds to wait for more hashtags after the first one of a batch
+        max_batch : int
+            Maximum number of hashtags sent in one request
+        """
+        self.fetch = fetch
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+    def submit(self, hashtag):
+        # type: (str) -> Future
+        """
+        Returns a future resolved with the Hashtag stats of a sanitized hashtag.
+        """
+        future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((hashtag, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            # a full batch is sent from the thread which filled it
+            self._send(batch)
+        return future
+
+    def flush(self):
+        # type: () -> None
+        """
+        Sends pending hashtags immediately.
+        """
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def _take(self):
+        # type: () -> list
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _send(self, batch):
+        # type: ([(str, Future)]) -> None
+        hashtags = []
+        for hashtag, _ in batch:
+            if hashtag not in hashtags:
+                hashtags.append(hashtag)
+        try:
+            stats = self.fetch(hashtags)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        by_hashtag = dict((x.hashtag.lower(), x) for x in stats)
+        for hashtag, future in batch:
+            result = by_hashtag.get(hashtag.lower())
+            if result is None:
+                future.set_exception(RiteTagException('Missing stats of #{}'.format(hashtag)))
+            else:
+                future.set_result(result)
+
+
+class SingleFlight(object):
+    """
+    Shares one in-flight call between all threads calling it with the same key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        # type: (object, callable, ...) -> object
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if leader:
+            try:
+                call.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                call.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._calls[key]
+        return call.result()
@@ -1,25 +1,117 @@
 from .enums import *
 
 
+try:
+    # python2
+    from urllib import urlencode
+    text_type = unicode
+except ImportError:
+    # python3
+    from urllib.parse import urlencode
+    text_type = str
+
+DEFAULT_IMAGE_PARAMS = {
+    'textFont': FontList.Lora,
+    'textColor': '#4f4f4f',
+    'textFontWeight': FontWeightType.normal,
+    'authorFont': FontList.Lato,
+    'authorColor': '#e5e5e5',
+    'authorFontWeight': FontWeightType.normal,
+    'highlightColor': 'transparent',
+    'backgroundColor1': '#000000',
+    'backgroundColor2': '#000000',
+    'logoUrl': 'https://cdn.ritekit.com/assets/img/common/made-with-ritekit-white.png',
+    'width': 400,
+    'height': 400
+}
+
+
+def param_value(value):
+    # type: (object) -> str
+    """
+    Returns a param value as str, enums as their values. Python2 unicode text is encoded as UTF-8.
+    """
+    if isinstance(value, text_type) and text_type is not str:
+        return value.encode('utf-8')
+    return str(value)
+
+
+def encode_params(params):
+    # type: (dict) -> str
+    """
+    Returns query string of image params, enums are sent as their values.
+    """
+    return urlencode(sorted((k, param_value(v)) for k, v in params.items()))
+
+
+class ImageTemplate(object):
+    """
+    Immutable image params shared by many images which differ only in text and author.
+
+    The query string of the shared params is encoded once, variants only encode their own params.
+    """
+
+    __slots__ = ('_params', '_query')
+
+    def __init__(self, params):
+        # type: (dict) -> ImageTemplate
+        params = dict(params)
+        params.pop('text', None)
+        params.pop('author', None)
+        self._params = params
+        self._query = encode_params(params)
+
+    def params(self):
+        # type: () -> dict
+        return dict(self._params)
+
+    def variant(self, text, author='', **params):
+        # type: (str, str, ...) -> ImageVariant
+        """
+        Returns params of one image, keyword arguments override template params by their API names.
+        """
+        params['text'] = text
+        params['author'] = author
+        return ImageVariant(self, params)
+
+    def builder(self, text, author=''):
+        # type: (str, str) -> ImageBuilder
+        """
+        Returns a mutable copy of the template.
+        """
+        return ImageBuilder(text, author)._update(self._params)
+
+
+class ImageVariant(object):
+    """
+    Params of one image derived from an ImageTemplate, holds only its own params.
+    """
+
+    __slots__ = ('template', 'overrides')
+
+    def __init__(self, template, overrides):
+        # type: (ImageTemplate, dict) -> ImageVariant
+        self.template = template
+        self.overrides = overrides
+
+    def build(self):
+        # type: () -> dict
+        params = self.template.params()
+        params.update(self.overrides)
+        return params
+
+    def query(self):
+        # type: () -> str
+        if set(self.overrides) - {'text', 'author'}:
+            return encode_params(self.build())
+        return '&'.join(x for x in [self.template._query, encode_params(self.overrides)] if x)
+
+
 class ImageBuilder:
 
     def __init__(self, text, author=''):
         # type: (str, str) -> ImageBuilder
-        # default values
-        self.__data = {
-            'textFont': FontList.Lora,
-            'textColor': '#4f4f4f',
-            'textFontWeight': FontWeightType.normal,
-            'authorFont': FontList.Lato,
-            'authorColor': '#e5e5e5',
-            'authorFontWeight': FontWeightType.normal,
-            'highlightColor': 'transparent',
-            'backgroundColor1': '#000000',
-            'backgroundColor2': '#000000',
-            'logoUrl': 'https://cdn.ritekit.com/assets/img/common/made-with-ritekit-white.png',
-            'width': 400,
-            'height': 400
-        }
+        self.__data = dict(DEFAULT_IMAGE_PARAMS)
         self.text(text).author(author)
 
     def text(self, text):
@@ -83,4 +175,21 @@ class ImageBuilder:
         return self
 
     def build(self):
-        return self.__data
+        # type: () -> dict
+        return dict(self.__data)
+
+    def query(self):
+        # type: () -> str
+        return encode_params(self.__data)
+
+    def _update(self, params):
+        # type: (dict) -> ImageBuilder
+        self.__data.update(params)
+        return self
+
+    def template(self):
+        # type: () -> ImageTemplate
+        """
+        Returns an immutable template of the current params without text and author.
+        """
+        return ImageTemplate(self.__data)
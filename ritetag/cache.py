@@ -0,0 +1,427 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .builders import encode_params
+from .exceptions import ImageTooLargeException
+from .response import Image
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def until_next_hour(now):
+    # type: (float) -> float
+    """
+    Hashtag stats are updated hourly, they expire on the next full hour.
+    """
+    return now - now % HOUR + HOUR
+
+
+class CachePolicy(object):
+    """
+    Time to live of cached responses per endpoint.
+
+    Rules are (path prefix, ttl) pairs, the first matching prefix wins. The ttl is a number of seconds,
+    a callable returning the expiration timestamp for the current time, or None for endpoints
+    which are never cached. Endpoints without a rule are not cached.
+    """
+
+    DEFAULT_RULES = [
+        ('/v1/link/', None),
+        ('/v2/image/quote', None),
+        ('/v1/images/', None),
+        ('/v1/stats/hashtag-suggestions-image', None),
+        ('/v1/stats/', until_next_hour),
+        ('/v2/stats/', until_next_hour),
+        ('/v1/search/trending', until_next_hour),
+        ('/v2/instagram/', DAY),
+        ('/v1/emoji/', DAY),
+        ('/v2/text/', DAY),
+        ('/v2/image/extract-image', DAY),
+        ('/v2/company-insights/', DAY),
+        ('/v2/person-insights/', 7 * DAY),
+    ]
+
+    def __init__(self, rules=None):
+        # type: ([(str, object)]) -> CachePolicy
+        """
+        Parameters
+        ----------
+        rules : [(str, object)]
+            Rules checked before the default ones
+        """
+        self.rules = list(rules or []) + self.DEFAULT_RULES
+
+    def expires_at(self, path, now):
+        # type: (str, float) -> float
+        """
+        Returns expiration timestamp of a response or None when it must not be cached.
+        """
+        for prefix, ttl in self.rules:
+            if path.startswith(prefix):
+                if ttl is None:
+                    return None
+                return ttl(now) if callable(ttl) else now + ttl
+        return None
+
+
+class MemoryCache(object):
+    """
+    Thread safe LRU cache of response bodies with expiration.
+    """
+
+    def __init__(self, max_size=1024):
+        # type: (int) -> MemoryCache
+        """
+        Parameters
+        ----------
+        max_size : int
+            Maximum number of cached responses
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key):
+        # type: (str) -> bytes
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] <= time.time():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data[key] = self._data.pop(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, expires_at):
+        # type: (str, bytes, float) -> None
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires_at)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        # type: () -> None
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        # type: () -> dict
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class SqliteCache(object):
+    """
+    LRU cache of response bodies stored in a SQLite database.
+
+    The database runs in WAL mode, so it can be shared by many threads and processes, readers do not
+    block writers. Bodies are stored zlib compressed.
+
+    Hits are plain reads, the access time of a row is updated only when it is older than touch_interval.
+    Expired rows are purged every purge_interval seconds and the least recently used rows are evicted
+    once the number of rows grows over max_size.
+    """
+
+    def __init__(self, path, max_size=100000, timeout=30.0, touch_interval=60.0, purge_interval=60.0):
+        # type: (str, int, float, float, float) -> SqliteCache
+        """
+        Parameters
+        ----------
+        path : str
+            Database file
+        max_size : int
+            Maximum number of cached responses, eviction removes rows until 90% of it is used
+        timeout : float
+            Seconds to wait for a lock held by another connection
+        touch_interval : float
+            Seconds a hit does not update the access time of a row, the precision of LRU order
+        purge_interval : float
+            Seconds between purges of expired rows
+        """
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.touch_interval = touch_interval
+        self.purge_interval = purge_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        with self._connection() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS cache ('
+                       'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)')
+            db.execute('CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)')
+            db.execute('CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)')
+            self._size = self._count(db)
+        self._purged_at = time.time()
+
+    def _connection(self):
+        # type: () -> sqlite3.Connection
+        # connections can be used neither from other threads nor from forked processes
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            db = sqlite3.connect(self.path, timeout=self.timeout)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+            self._local.pid = pid
+        return self._local.db
+
+    @staticmethod
+    def _count(db):
+        # type: (sqlite3.Connection) -> int
+        return db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def get(self, key):
+        # type: (str) -> bytes
+        now = time.time()
+        db = self._connection()
+        row = db.execute('SELECT value, accessed_at FROM cache WHERE key = ? AND expires_at > ?',
+                         (key, now)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        if now - row[1] >= self.touch_interval:
+            with db:
+                db.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+        self.hits += 1
+        return zlib.decompress(row[0])
+
+    def set(self, key, value, expires_at):
+        # type: (str, bytes, float) -> None
+        now = time.time()
+        value = sqlite3.Binary(zlib.compress(value))
+        with self._connection() as db:
+            cursor = db.execute('UPDATE cache SET value = ?, expires_at = ?, accessed_at = ? WHERE key = ?',
+                                (value, expires_at, now, key))
+            if cursor.rowcount > 0:
+                return
+            db.execute('INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                       (key, value, expires_at, now))
+            with self._lock:
+                self._size += 1
+                purge = now - self._purged_at >= self.purge_interval
+                if purge:
+                    self._purged_at = now
+            if purge:
+                db.execute('DELETE FROM cache WHERE expires_at <= ?', (now,))
+            if purge or self._size > self.max_size:
+                self._evict(db)
+
+    def _evict(self, db):
+        # type: (sqlite3.Connection) -> None
+        """
+        Removes the least recently used rows in one pass, until 90% of max_size is used.
+        """
+        # other processes write to the database as well, rows are counted again
+        size = self._count(db)
+        removed = 0
+        if size > self.max_size:
+            cursor = db.execute('DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)',
+                                (size - int(0.9 * self.max_size),))
+            removed = max(cursor.rowcount, 0)
+        with self._lock:
+            self._size = size - removed
+            self.evictions += removed
+
+    def clear(self):
+        # type: () -> None
+        with self._connection() as db:
+            db.execute('DELETE FROM cache')
+        with self._lock:
+            self._size = 0
+
+    def stats(self):
+        # type: () -> dict
+        size = self._connection().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        return {
+            'size': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+IMAGE_CONTENT_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'gif': 'image/gif',
+}
+
+
+class RenderCache(object):
+    """
+    On-disk LRU cache of images rendered by text_to_image, keyed by a hash of the image params.
+
+    Files are written to temporary files and renamed, so concurrent writers of many threads and processes
+    never expose a partial image. Hits update the modification time, the least recently used files are
+    removed once the cache grows over max_size.
+    """
+
+    def __init__(self, directory, max_size=512 * 1024 * 1024):
+        # type: (str, int) -> RenderCache
+        """
+        Parameters
+        ----------
+        directory : str
+            Cache directory, created when it does not exist
+        max_size : int
+            Maximum size of cached images in bytes, eviction removes files until 90% of it is used
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._size = sum(size for _, _, size in self._files())
+
+    @staticmethod
+    def key(params):
+        # type: (dict) -> str
+        """
+        Returns key of image params, e.g. ImageBuilder.build(). Params are sorted and enums stringified,
+        so equal images have equal keys.
+        """
+        return hashlib.sha256(encode_params(params).encode('utf-8')).hexdigest()
+
+    def _path(self, key, ext):
+        # type: (str, str) -> str
+        return os.path.join(self.directory, '{}.{}'.format(key, ext))
+
+    def _files(self):
+        # type: () -> [(str, float, int)]
+        files = []
+        for name in os.listdir(self.directory):
+            if name.rsplit('.', 1)[-1] not in IMAGE_CONTENT_TYPES:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # removed by another process
+                continue
+            files.append((path, stat.st_mtime, stat.st_size))
+        return files
+
+    def get(self, key, max_size=None, image_class=Image):
+        # type: (str, int, type) -> Image
+        """
+        Returns cached image or None.
+        """
+        image = self.open(key, max_size, image_class)
+        if image is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return image
+
+    def open(self, key, max_size=None, image_class=Image):
+        # type: (str, int, type) -> Image
+        """
+        Returns cached image or None, unlike get() it is not counted in stats.
+        """
+        for ext, content_type in IMAGE_CONTENT_TYPES.items():
+            path = self._path(key, ext)
+            try:
+                f = open(path, 'rb')
+            except IOError:
+                continue
+            try:
+                try:
+                    os.utime(path, None)
+                except OSError:
+                    # evicted by another process, the open file is still readable
+                    pass
+                return image_class(content_type, f, os.fstat(f.fileno()).st_size, max_size)
+            except BaseException:
+                f.close()
+                raise
+        return None
+
+    @contextmanager
+    def writer(self, key, ext):
+        # type: (str, str) -> file
+        """
+        Returns context manager of a file the image is written to, the image is cached when the block succeeds.
+        """
+        handle, temp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                yield f
+            size = os.path.getsize(temp)
+            path = self._path(key, ext)
+            try:
+                # a replaced image does not count twice
+                size -= os.path.getsize(path)
+            except OSError:
+                pass
+            getattr(os, 'replace', os.rename)(temp, path)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        with self._lock:
+            self._size += size
+            if self._size > self.max_size:
+                self._evict(path)
+
+    def _evict(self, keep=None):
+        # type: (str) -> None
+        """
+        Removes the least recently used files, except keep, the file just written.
+        An image larger than max_size stays until the next write evicts it.
+        """
+        files = sorted(self._files(), key=lambda x: x[1])
+        # other processes write to the directory as well, the size is counted again
+        self._size = sum(size for _, _, size in files)
+        for path, _, size in files:
+            if self._size <= 0.9 * self.max_size:
+                return
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+    def clear(self):
+        # type: () -> None
+        with self._lock:
+            for path, _, _ in self._files():
+                os.remove(path)
+            self._size = 0
+
+    def stats(self):
+        # type: () -> dict
+        return {
+            'bytes': self._size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
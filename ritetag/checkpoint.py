@@ -0,0 +1,62 @@
+import json
+import os
+import threading
+
+
+class Checkpoint(object):
+    """
+    Append-only journal of finished inputs of a bulk run, a restarted run skips them.
+
+    Every input is one JSON encoded line, written and flushed as soon as it is finished, so a crash loses
+    at most the line being written. A truncated last line is ignored.
+    """
+
+    def __init__(self, path):
+        # type: (str) -> Checkpoint
+        """
+        Parameters
+        ----------
+        path : str
+            Journal file, created when it does not exist
+        """
+        self.path = path
+        self._done = set()
+        self._lock = threading.Lock()
+        line = '\n'
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        self._done.add(json.loads(line))
+                    except ValueError:
+                        pass
+        self._file = open(path, 'a')
+        if not line.endswith('\n'):
+            # terminates the line truncated by a crash
+            self._file.write('\n')
+
+    def __contains__(self, key):
+        # type: (str) -> bool
+        return key in self._done
+
+    def __len__(self):
+        return len(self._done)
+
+    def add(self, key):
+        # type: (str) -> None
+        with self._lock:
+            if key in self._done:
+                return
+            self._done.add(key)
+            self._file.write(json.dumps(key) + '\n')
+            self._file.flush()
+
+    def close(self):
+        # type: () -> None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
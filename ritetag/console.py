@@ -18,6 +18,7 @@ class Action(Enum):
     text_to_image = 'text_to_image'
     animate_image = 'animate_image'
     company_logo = 'company_logo'
+    company_logos = 'company_logos'
     list_of_cta = 'list_of_cta'
     shorten_link = 'shorten_link'
 
@@ -36,6 +37,7 @@ actions = [str(x) for x in [
     # Action.text_to_image, not supported yet
     # Action.animate_image, not supported yet
     Action.company_logo,
+    Action.company_logos,
     Action.list_of_cta,
     Action.shorten_link
 ]]
@@ -85,6 +87,7 @@ def run():
     parser.add_argument('-m', '--max_hashtags', type=int, default=2)
     parser.add_argument('-p', '--hashtag_position', type=str, choices=['auto', 'end'], default='auto')
     parser.add_argument('-f', '--filename', type=str)
+    parser.add_argument('-d', '--directory', type=str, help='directory of the logo store')
     parser.add_argument('-ci', '--cta_id', type=int)
     parser.add_argument('-g', '--auto_generate', type=str, choices=['1', '0'], default='1')
     args = parser.parse_args()
@@ -143,22 +146,36 @@ def run():
             if logo.is_generated:
                 log("Logo is generated.")
 
+            def download(get_url, get_content_type, suffix):
+                path = '{}{}.{}'.format(filename, suffix, get_content_type())
+                Parser.download_file(get_url(), path, api.session)
+                return path
+
             log("Downloading logo - {}".format(domain))
+            log("Downloading square logo - {}".format(domain))
+            # both logos are downloaded at once
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                original = executor.submit(download, logo.logo, logo.logo_content_type, '')
+                square = executor.submit(download, logo.square_logo, logo.square_logo_content_type, '_square')
             try:
-                original_path = '{}.{}'.format(filename, logo.logo_content_type())
-                Parser.download_file(logo.logo(), original_path)
-                log('Image is saved {} - {}'.format(original_path, domain))
+                log('Image is saved {} - {}'.format(original.result(), domain))
             except RiteTagException as e:
                 log('Error {} - {}'.format(e, domain))
-
-            log("Downloading square logo - {}".format(domain))
             try:
-                square_path = '{}_square.{}'.format(filename, logo.square_logo_content_type())
-                Parser.download_file(logo.square_logo(), square_path)
-                log('Image is saved {} - {}'.format(domain, square_path))
+                log('Image is saved {} - {}'.format(domain, square.result()))
             except RiteTagException as e:
                 log('Error {} - {}'.format(e, domain))
 
+        elif a == Action.company_logos:
+            domains = get_hashtags(parser, args)
+            store = LogoStore(current_directory if args.directory is None else args.directory)
+            try:
+                for domain, result in api.company_logos(domains, store, args.auto_generate == '1',
+                                                        return_exceptions=True):
+                    log('{} - {}'.format(domain, result))
+            finally:
+                store.close()
+
         elif a == Action.list_of_cta:
             [log(x) for x in api.list_of_cta()]
 
@@ -169,3 +186,5 @@ def run():
     except RiteTagException as e:
         parser.error(e)
         # raise e
+    finally:
+        api.close()
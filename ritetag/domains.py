@@ -0,0 +1,240 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from array import array
+
+from .exceptions import RiteTagException
+
+
+class _SortedDomains(object):
+    """
+    Immutable sorted array of domains with their answers.
+
+    Domains are concatenated into one bytes object with an array of offsets, which takes a fraction
+    of the memory of a set of strings, and are looked up by binary search.
+    """
+
+    __slots__ = ('_blob', '_offsets', '_values', '_observed')
+
+    def __init__(self, entries=()):
+        # type: (iter) -> _SortedDomains
+        """
+        Parameters
+        ----------
+        entries : iter
+            (domain, value, observed) sorted by domain
+        """
+        blob = bytearray()
+        self._offsets = array('I', [0])
+        self._values = bytearray()
+        self._observed = array('I')
+        for domain, value, observed in entries:
+            blob += domain.encode('utf-8')
+            self._offsets.append(len(blob))
+            self._values.append(1 if value else 0)
+            self._observed.append(observed)
+        self._blob = bytes(blob)
+
+    def __len__(self):
+        return len(self._values)
+
+    def _domain(self, i):
+        # type: (int) -> bytes
+        return self._blob[self._offsets[i]:self._offsets[i + 1]]
+
+    def get(self, domain):
+        # type: (str) -> (bool, int)
+        """
+        Returns (value, observed) of a domain or None.
+        """
+        key = domain.encode('utf-8')
+        lo, hi = 0, len(self._values)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._domain(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self._values) and self._domain(lo) == key:
+            return bool(self._values[lo]), self._observed[lo]
+        return None
+
+    def __iter__(self):
+        for i in range(len(self._values)):
+            yield self._domain(i).decode('utf-8'), bool(self._values[i]), self._observed[i]
+
+
+def _merge(old, new):
+    # type: (iter, iter) -> iter
+    """
+    Merges two sorted iterables of (domain, value, observed), entries of new replace those of old.
+    """
+    old, new = iter(old), iter(new)
+    a, b = next(old, None), next(new, None)
+    while a is not None and b is not None:
+        if a[0] < b[0]:
+            yield a
+            a = next(old, None)
+        else:
+            if a[0] == b[0]:
+                a = next(old, None)
+            yield b
+            b = next(new, None)
+    while a is not None:
+        yield a
+        a = next(old, None)
+    while b is not None:
+        yield b
+        b = next(new, None)
+
+
+class DomainIndex(object):
+    """
+    Local index of freemail and disposable domains built from API answers.
+
+    The clients answer free_mail_detection and disposable_email_detection from the index and ask the API only
+    for unknown domains and for answers older than max_age. Answers are kept in sorted arrays, new ones in
+    a small buffer merged into the arrays once it grows over merge_size.
+    """
+
+    KINDS = ('freemail', 'disposable')
+
+    def __init__(self, max_age=30 * 24 * 3600, merge_size=1024):
+        # type: (int, int) -> DomainIndex
+        """
+        Parameters
+        ----------
+        max_age : int
+            Seconds an answer is used before it is refreshed from the API, forever when None
+        merge_size : int
+            Number of new answers buffered before they are merged into the sorted arrays
+        """
+        self.max_age = max_age
+        self.merge_size = merge_size
+        self._lock = threading.Lock()
+        self._sorted = dict((kind, _SortedDomains()) for kind in self.KINDS)
+        self._pending = dict((kind, {}) for kind in self.KINDS)
+
+    def __len__(self):
+        with self._lock:
+            for kind in self.KINDS:
+                self._merge(kind)
+            return sum(len(x) for x in self._sorted.values())
+
+    def _check_kind(self, kind):
+        # type: (str) -> None
+        if kind not in self.KINDS:
+            raise RiteTagException('Unknown kind {}, use one of {}'.format(kind, ', '.join(self.KINDS)))
+
+    def get(self, kind, domain, now=None):
+        # type: (str, str, float) -> bool
+        """
+        Returns the answer for a domain, None when it is unknown or older than max_age.
+
+        Parameters
+        ----------
+        kind : str
+            'freemail' or 'disposable'
+        domain : str
+            Lowercase domain
+        now : float
+            Current timestamp, time.time() by default
+        """
+        self._check_kind(kind)
+        entry = self._pending[kind].get(domain)
+        if entry is None:
+            entry = self._sorted[kind].get(domain)
+        if entry is None:
+            return None
+        value, observed = entry
+        if self.max_age is not None and (time.time() if now is None else now) - observed > self.max_age:
+            return None
+        return value
+
+    def add(self, kind, domain, value, observed=None):
+        # type: (str, str, bool, float) -> None
+        """
+        Records an answer for a domain, observed now by default.
+        """
+        self._check_kind(kind)
+        with self._lock:
+            self._pending[kind][domain] = (bool(value), int(time.time() if observed is None else observed))
+            if len(self._pending[kind]) >= self.merge_size:
+                self._merge(kind)
+
+    def _merge(self, kind):
+        # type: (str) -> None
+        pending = self._pending[kind]
+        if not pending:
+            return
+        new = ((domain, value, observed) for domain, (value, observed) in sorted(pending.items()))
+        # the arrays are replaced at once, readers see either the old or the new ones
+        self._sorted[kind] = _SortedDomains(_merge(self._sorted[kind], new))
+        self._pending[kind] = {}
+
+    def entries(self):
+        # type: () -> iter
+        """
+        Yields (kind, domain, value, observed) of all answers.
+        """
+        with self._lock:
+            for kind in self.KINDS:
+                self._merge(kind)
+            indexes = [(kind, self._sorted[kind]) for kind in self.KINDS]
+        for kind, index in indexes:
+            for domain, value, observed in index:
+                yield kind, domain, value, observed
+
+    def save(self, path):
+        # type: (str) -> None
+        """
+        Exports the index to a file of JSON lines [kind, domain, value, observed], the file is replaced atomically.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as f:
+                for entry in self.entries():
+                    f.write(json.dumps(entry) + '\n')
+            getattr(os, 'replace', os.rename)(temp, path)
+        except Exception:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+    def update(self, path):
+        # type: (str) -> None
+        """
+        Imports answers exported by save(), newer answers win.
+        """
+        imported = dict((kind, {}) for kind in self.KINDS)
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                kind, domain, value, observed = json.loads(line)
+                self._check_kind(kind)
+                imported[kind][domain] = (bool(value), int(observed))
+        with self._lock:
+            for kind in self.KINDS:
+                self._merge(kind)
+                current = self._sorted[kind]
+                new = []
+                for domain, (value, observed) in sorted(imported[kind].items()):
+                    entry = current.get(domain)
+                    if entry is None or entry[1] <= observed:
+                        new.append((domain, value, observed))
+                self._sorted[kind] = _SortedDomains(_merge(current, new))
+
+    @classmethod
+    def load(cls, path, max_age=30 * 24 * 3600, merge_size=1024):
+        # type: (str, int, int) -> DomainIndex
+        """
+        Returns an index imported from a file exported by save().
+        """
+        index = cls(max_age, merge_size)
+        index.update(path)
+        return index
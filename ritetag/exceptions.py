@@ -4,3 +4,26 @@ class RiteTagException(Exception):
 
 class ImageFormatException(RiteTagException):
     pass
+
+
+class ImageTooLargeException(RiteTagException):
+    pass
+
+
+class PartialResultException(RiteTagException):
+    """
+    Raised when only some requests of a batch failed.
+
+    Attributes
+    ----------
+    results : list
+        Results of the successful requests in input order
+    errors : [(list, Exception)]
+        Failed part of the input together with its error
+    """
+
+    def __init__(self, results, errors):
+        super(PartialResultException, self).__init__(
+            '{} of the batch requests failed: {}'.format(len(errors), errors[0][1]))
+        self.results = results
+        self.errors = errors
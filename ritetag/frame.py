@@ -0,0 +1,348 @@
+from .exceptions import RiteTagException
+from .response import HASHTAG_COLORS
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# column name, numpy type, keys of the value in API responses
+HASHTAG_COLUMNS = [
+    ('tweets', 'int64', ('tweets',)),
+    ('exposure', 'int64', ('exposure',)),
+    ('retweets', 'int64', ('retweets',)),
+    ('images', 'float64', ('images', 'photos')),
+    ('links', 'float64', ('links',)),
+    ('mentions', 'float64', ('mentions',)),
+    ('color', 'int8', ('color',)),
+    ('media_count', 'float64', ('mediaCount',)),
+]
+
+COLOR_CODES = dict((v, k) for k, v in HASHTAG_COLORS.items())
+
+# color of hashtags without one, matches no color code
+MISSING_COLOR = -1
+
+
+def require_numpy():
+    if np is None:
+        raise RiteTagException('HashtagFrame and HistoryFrame require numpy, install it with `pip install numpy`')
+
+
+def _missing(name, dtype):
+    if dtype == 'float64':
+        return np.nan
+    return MISSING_COLOR if name == 'color' else 0
+
+
+def _value(row, keys, missing):
+    for key in keys:
+        value = row.get(key)
+        if value is not None:
+            return value
+    return missing
+
+
+class HashtagFrame(object):
+    """
+    Columnar hashtag stats, one numpy array per metric.
+
+    Missing integer values are 0, missing float values are NaN (media_count is a float column for that reason)
+    and a missing color is MISSING_COLOR.
+    """
+
+    def __init__(self, hashtags, columns):
+        # type: (np.ndarray, dict) -> HashtagFrame
+        require_numpy()
+        self.hashtags = hashtags
+        self.columns = columns
+
+    @classmethod
+    def from_json(cls, rows):
+        # type: ([dict]) -> HashtagFrame
+        """
+        Builds the frame from hashtag items of an API response.
+        """
+        require_numpy()
+        rows = list(rows)
+        hashtags = np.array([_value(x, ('hashtag', 'tag'), '') for x in rows], dtype=object)
+        columns = {}
+        for name, dtype, keys in HASHTAG_COLUMNS:
+            missing = _missing(name, dtype)
+            columns[name] = np.fromiter((_value(x, keys, missing) for x in rows), dtype=dtype, count=len(rows))
+        return cls(hashtags, columns)
+
+    @classmethod
+    def from_hashtags(cls, hashtags):
+        # type: ([Hashtag]) -> HashtagFrame
+        require_numpy()
+        hashtags = list(hashtags)
+        columns = {}
+        for name, dtype, _ in HASHTAG_COLUMNS:
+            missing = _missing(name, dtype)
+            values = (getattr(x, name) for x in hashtags)
+            columns[name] = np.fromiter((missing if v is None else v for v in values), dtype=dtype,
+                                        count=len(hashtags))
+        return cls(np.array([x.hashtag for x in hashtags], dtype=object), columns)
+
+    @classmethod
+    def concat(cls, frames):
+        # type: ([HashtagFrame]) -> HashtagFrame
+        require_numpy()
+        frames = list(frames)
+        if len(frames) == 0:
+            return cls.from_json([])
+        hashtags = np.concatenate([x.hashtags for x in frames])
+        columns = dict((name, np.concatenate([x.columns[name] for x in frames])) for name, _, _ in HASHTAG_COLUMNS)
+        return cls(hashtags, columns)
+
+    def __len__(self):
+        return len(self.hashtags)
+
+    def __getitem__(self, name):
+        # type: (str) -> np.ndarray
+        if name == 'hashtag':
+            return self.hashtags
+        return self.columns[name]
+
+    def take(self, indices):
+        # type: (np.ndarray) -> HashtagFrame
+        """
+        Returns rows selected by an index array or a boolean mask.
+        """
+        return HashtagFrame(self.hashtags[indices], dict((k, v[indices]) for k, v in self.columns.items()))
+
+    def percentile(self, name):
+        # type: (str) -> np.ndarray
+        """
+        Returns percentile ranks of a metric in range 0..1, equal values share the rank.
+        Missing values are not ranked, their rank is NaN.
+        """
+        values = self.columns[name]
+        valid = ~np.isnan(values) if values.dtype.kind == 'f' else np.ones(len(values), dtype=bool)
+        result = np.full(len(values), np.nan)
+        ordered = np.sort(values[valid])
+        if len(ordered) < 2:
+            result[valid] = 1.0
+        else:
+            result[valid] = np.searchsorted(ordered, values[valid], side='left') / float(len(ordered) - 1)
+        return result
+
+    def score(self, weights, normalize=True):
+        # type: (dict, bool) -> np.ndarray
+        """
+        Returns weighted sum of metrics.
+
+        Parameters
+        ----------
+        weights : dict
+            Metric name to weight
+        normalize : bool
+            Sum percentile ranks instead of raw values, so metrics of different scales are comparable.
+            Missing values add nothing.
+        """
+        result = np.zeros(len(self))
+        for name, weight in weights.items():
+            values = self.percentile(name) if normalize else self.columns[name]
+            result += weight * np.nan_to_num(values)
+        return result
+
+    def top(self, k, by='tweets'):
+        # type: (int, object) -> HashtagFrame
+        """
+        Returns k rows with the highest values, descending, rows with missing values are last.
+
+        Parameters
+        ----------
+        k : int
+            Number of rows
+        by : object
+            Metric name, dict of weights for score() or an array of values
+        """
+        if isinstance(by, dict):
+            values = self.score(by)
+        elif isinstance(by, str):
+            values = self.columns[by]
+        else:
+            values = np.asarray(by)
+        if values.dtype.kind == 'f':
+            values = np.where(np.isnan(values), -np.inf, values)
+        k = min(k, len(values))
+        if k == 0:
+            return self.take(np.arange(0))
+        # partial selection, only the top k rows are sorted
+        indices = np.argpartition(-values, k - 1)[:k]
+        indices = indices[np.argsort(-values[indices], kind='stable')]
+        return self.take(indices)
+
+    def by_color(self, *colors):
+        # type: (...) -> HashtagFrame
+        """
+        Returns rows of given colors, colors are codes or names from HASHTAG_COLORS (e.g. 'HOT_NOW').
+        """
+        codes = [COLOR_CODES[x] if isinstance(x, str) else x for x in colors]
+        return self.take(np.isin(self.columns['color'], codes))
+
+    def to_dict(self):
+        # type: () -> dict
+        result = {'hashtag': self.hashtags}
+        result.update(self.columns)
+        return result
+
+    def to_pandas(self):
+        # type: () -> pandas.DataFrame
+        import pandas
+        return pandas.DataFrame(self.to_dict(), copy=False)
+
+    def to_arrow(self):
+        # type: () -> pyarrow.Table
+        import pyarrow
+        return pyarrow.table(self.to_dict())
+
+
+HISTORY_METRICS = ['tweets', 'retweets', 'exposure', 'links', 'images', 'mentions', 'color']
+
+# date.toordinal() of 1970-01-01, numpy dates count days from it
+EPOCH_ORDINAL = 719163
+
+
+class HistoryFrame(object):
+    """
+    History of many hashtags on a common daily axis.
+
+    Every metric is a float array of shape (hashtags, days), days without data are NaN.
+    """
+
+    def __init__(self, hashtags, dates, columns):
+        # type: (np.ndarray, np.ndarray, dict) -> HistoryFrame
+        require_numpy()
+        self.hashtags = hashtags
+        self.dates = dates
+        self.columns = columns
+
+    @classmethod
+    def from_history(cls, history):
+        # type: (dict) -> HistoryFrame
+        """
+        Builds the frame from a dict of hashtag to list of HashtagHistory, e.g. results of RiteTagApi.history().
+        """
+        require_numpy()
+        hashtags = list(history.keys())
+        ordinals = [np.fromiter((x.date.toordinal() for x in history[h]), dtype='int64') for h in hashtags]
+        days = np.unique(np.concatenate(ordinals)) if ordinals else np.zeros(0, dtype='int64')
+        columns = dict((m, np.full((len(hashtags), len(days)), np.nan)) for m in HISTORY_METRICS)
+        for row, (hashtag, ords) in enumerate(zip(hashtags, ordinals)):
+            positions = np.searchsorted(days, ords)
+            for metric in HISTORY_METRICS:
+                values = (getattr(x, metric) for x in history[hashtag])
+                columns[metric][row, positions] = np.fromiter((np.nan if v is None else v for v in values),
+                                                              dtype='float64', count=len(ords))
+        dates = (days - EPOCH_ORDINAL).astype('datetime64[D]')
+        return cls(np.array(hashtags, dtype=object), dates, columns)
+
+    @classmethod
+    def from_store(cls, store, hashtags, start=None, end=None):
+        # type: (HistoryStore, [str], date, date) -> HistoryFrame
+        """
+        Builds the frame from a HistoryStore.
+        """
+        return cls.from_history(dict((h, store.get(h, start, end)) for h in hashtags))
+
+    def __len__(self):
+        return len(self.hashtags)
+
+    def __getitem__(self, name):
+        # type: (str) -> np.ndarray
+        return self.columns[name]
+
+    def row(self, hashtag):
+        # type: (str) -> int
+        """
+        Returns row index of a hashtag.
+        """
+        return list(self.hashtags).index(hashtag)
+
+    def moving_average(self, metric, window=7):
+        # type: (str, int) -> np.ndarray
+        """
+        Returns trailing moving average, days without data are skipped, NaN until the first full window.
+        """
+        values = self.columns[metric]
+        valid = ~np.isnan(values)
+        sums = np.cumsum(np.where(valid, values, 0.0), axis=1)
+        counts = np.cumsum(valid, axis=1)
+        sums[:, window:] = sums[:, window:] - sums[:, :-window]
+        counts[:, window:] = counts[:, window:] - counts[:, :-window]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = sums / counts
+        result[:, :window - 1] = np.nan
+        return result
+
+    def delta(self, metric, periods=1):
+        # type: (str, int) -> np.ndarray
+        """
+        Returns change against the value periods days before, NaN where it is unknown.
+        """
+        values = self.columns[metric]
+        result = np.full(values.shape, np.nan)
+        result[:, periods:] = values[:, periods:] - values[:, :-periods]
+        return result
+
+    def growth(self, metric, periods=1):
+        # type: (str, int) -> np.ndarray
+        """
+        Returns relative day-over-day change, 0.5 means 50% growth.
+        """
+        values = self.columns[metric]
+        result = np.full(values.shape, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[:, periods:] = values[:, periods:] / values[:, :-periods] - 1.0
+        return result
+
+    def slope(self, metric, window=None):
+        # type: (str, int) -> np.ndarray
+        """
+        Returns least squares slope (change per day) of every hashtag over the last window days.
+        """
+        values = self.columns[metric]
+        if window is not None:
+            values = values[:, -window:]
+        x = np.arange(values.shape[1], dtype='float64')
+        valid = ~np.isnan(values)
+        n = valid.sum(axis=1)
+        y = np.where(valid, values, 0.0)
+        xv = np.where(valid, x, 0.0)
+        sx, sy = xv.sum(axis=1), y.sum(axis=1)
+        sxy, sxx = (xv * y).sum(axis=1), (xv * xv).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (n * sxy - sx * sy) / (n * sxx - sx * sx)
+
+    def acceleration(self, metric, window=None):
+        # type: (str, int) -> np.ndarray
+        """
+        Returns change of the slope, difference of slopes of the second and the first half of the window.
+        """
+        values = self.columns[metric]
+        if window is not None:
+            values = values[:, -window:]
+        half = values.shape[1] // 2
+        first = HistoryFrame(self.hashtags, None, {metric: values[:, :half]}).slope(metric)
+        second = HistoryFrame(self.hashtags, None, {metric: values[:, half:]}).slope(metric)
+        return second - first
+
+    def color_transitions(self, from_color=None, to_color=None):
+        # type: (int, int) -> [(str, np.datetime64, int, int)]
+        """
+        Returns (hashtag, date, previous color, color) for every day the color of a hashtag changed.
+        """
+        colors = self.columns['color']
+        previous, current = colors[:, :-1], colors[:, 1:]
+        mask = (previous != current) & ~np.isnan(previous) & ~np.isnan(current)
+        if from_color is not None:
+            mask &= previous == from_color
+        if to_color is not None:
+            mask &= current == to_color
+        rows, days = np.nonzero(mask)
+        return [
+            (self.hashtags[r], self.dates[d + 1], int(previous[r, d]), int(current[r, d]))
+            for r, d in zip(rows, days)
+        ]
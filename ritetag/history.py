@@ -0,0 +1,127 @@
+import sqlite3
+import threading
+
+from datetime import date, datetime, timedelta
+
+from .response import HashtagHistory, parse_date
+
+METRICS = ['tweets', 'retweets', 'exposure', 'links', 'images', 'mentions', 'color']
+
+
+class HistoryStore(object):
+    """
+    Local time series of hashtag history, one row per hashtag and day.
+
+    RiteTagApi.history() extends the store with every response, so it keeps data older than the 30 days
+    window of the API and can answer without a request when the newest point the API publishes is already stored.
+    Metrics missing in a point are stored as NULL.
+    """
+
+    def __init__(self, path=':memory:', timeout=30.0):
+        # type: (str, float) -> HistoryStore
+        """
+        Parameters
+        ----------
+        path : str
+            Database file, the store lives in memory by default
+        timeout : float
+            Seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        with self._lock, self._db as db:
+            if path != ':memory:':
+                db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE IF NOT EXISTS history ('
+                       'tag TEXT NOT NULL, date TEXT NOT NULL, hashtag TEXT NOT NULL, {}, '
+                       'PRIMARY KEY (tag, date))'.format(', '.join('{} REAL'.format(x) for x in METRICS)))
+
+    def close(self):
+        # type: () -> None
+        self._db.close()
+
+    @staticmethod
+    def _key(hashtag):
+        # type: (str) -> str
+        return hashtag.lstrip('#').lower()
+
+    def add(self, history):
+        # type: ([HashtagHistory]) -> None
+        """
+        Stores history points, points of already stored days are replaced.
+        """
+        rows = [
+            [self._key(x.hashtag), x.date.isoformat(), x.hashtag] + [getattr(x, m) for m in METRICS]
+            for x in history
+        ]
+        with self._lock, self._db as db:
+            db.executemany('INSERT OR REPLACE INTO history VALUES ({})'.format(', '.join(['?'] * (len(METRICS) + 3))),
+                           rows)
+
+    def get(self, hashtag, start=None, end=None):
+        # type: (str, date, date) -> [HashtagHistory]
+        """
+        Returns stored history of a hashtag ordered by date.
+
+        Parameters
+        ----------
+        hashtag : str
+            Hashtag with or without # mark
+        start : date
+            First day, unlimited by default
+        end : date
+            Last day, unlimited by default
+        """
+        query = 'SELECT hashtag, date, {} FROM history WHERE tag = ?'.format(', '.join(METRICS))
+        params = [self._key(hashtag)]
+        if start is not None:
+            query += ' AND date >= ?'
+            params.append(start.isoformat())
+        if end is not None:
+            query += ' AND date <= ?'
+            params.append(end.isoformat())
+        with self._lock:
+            rows = self._db.execute(query + ' ORDER BY date', params).fetchall()
+        return [HashtagHistory(self._row_to_json(row)) for row in rows]
+
+    @staticmethod
+    def _row_to_json(row):
+        # type: (tuple) -> dict
+        json = {'tag': row[0], 'date': row[1]}
+        for metric, value in zip(METRICS, row[2:]):
+            if value is not None and metric in ('tweets', 'retweets', 'exposure', 'color'):
+                value = int(value)
+            json[metric] = value
+        return json
+
+    def latest_date(self, hashtag):
+        # type: (str) -> date
+        """
+        Returns the last stored day of a hashtag or None.
+        """
+        with self._lock:
+            row = self._db.execute('SELECT MAX(date) FROM history WHERE tag = ?', [self._key(hashtag)]).fetchone()
+        return None if row[0] is None else parse_date(row[0])
+
+    def recent(self, hashtag, today=None, days=30, max_lag=1):
+        # type: (str, date, int, int) -> [HashtagHistory]
+        """
+        Returns the last days of history up to the newest stored point, None when it is older than max_lag days.
+
+        Parameters
+        ----------
+        hashtag : str
+            Hashtag with or without # mark
+        today : date
+            Current UTC day by default
+        days : int
+            Number of days
+        max_lag : int
+            Days the API may be late with publishing a point, today's point is missing until the day ends
+        """
+        today = datetime.utcnow().date() if today is None else today
+        latest = self.latest_date(hashtag)
+        if latest is None or latest < today - timedelta(days=max_lag):
+            return None
+        return self.get(hashtag, latest - timedelta(days=days - 1), latest)
@@ -0,0 +1,99 @@
+import json
+
+from .exceptions import RiteTagException
+from .response import Hashtag
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# keys of hashtag lists in API responses
+HASHTAG_LIST_KEYS = ['stats', 'data', 'tags', 'hashtags']
+
+
+def _json_loads(content):
+    # type: (bytes) -> dict
+    return json.loads(content.decode('utf-8'))
+
+
+def get_loads(decoder=None):
+    # type: (object) -> callable
+    """
+    Returns function decoding JSON response bodies.
+
+    Parameters
+    ----------
+    decoder : object
+        'orjson', 'msgspec', 'json' or a callable taking bytes, the fastest installed library is used by default
+    """
+    if callable(decoder):
+        return decoder
+    if decoder is None:
+        decoder = 'orjson' if orjson is not None else 'msgspec' if msgspec is not None else 'json'
+    if decoder == 'orjson' and orjson is not None:
+        return orjson.loads
+    if decoder == 'msgspec' and msgspec is not None:
+        return msgspec.json.decode
+    if decoder == 'json':
+        return _json_loads
+    raise RiteTagException('JSON decoder {} is unknown or not installed'.format(decoder))
+
+
+loads = get_loads()
+
+
+class HashtagListDecoder(object):
+    """
+    Decodes hashtag lists straight into Hashtag objects with msgspec, no intermediate dicts are built.
+
+    Items are validated against the known schema, decode() returns None when a response does not match it,
+    so the caller can fall back to the generic decoder.
+    """
+
+    def __init__(self):
+        if msgspec is None:
+            raise RiteTagException('Typed decoding requires msgspec, install it with `pip install msgspec`')
+        from typing import List, Optional, Union
+        number = Union[int, float, None]
+        ratio = Optional[float]
+        # structs are defined at runtime, class annotations are not python 2 syntax
+        item = msgspec.defstruct('HashtagItem', [
+            ('hashtag', Optional[str], None),
+            ('tag', Optional[str], None),
+            ('tweets', number, None),
+            ('exposure', number, None),
+            ('retweets', number, None),
+            ('images', ratio, None),
+            ('photos', ratio, None),
+            ('links', ratio, None),
+            ('mentions', ratio, None),
+            ('color', Optional[int], None),
+            ('mediaCount', number, None),
+        ])
+        envelope = msgspec.defstruct('HashtagList', [
+            ('result', bool, True),
+            ('message', Optional[str], None),
+        ] + [(key, Optional[List[item]], None) for key in HASHTAG_LIST_KEYS])
+        self._decoder = msgspec.json.Decoder(envelope)
+
+    def decode(self, content, key):
+        # type: (bytes, str) -> [Hashtag]
+        try:
+            data = self._decoder.decode(content)
+        except (msgspec.ValidationError, msgspec.DecodeError):
+            return None
+        if not data.result:
+            raise RiteTagException(data.message)
+        items = getattr(data, key)
+        if items is None or any(x.hashtag is None and x.tag is None for x in items):
+            return None
+        return [
+            Hashtag.from_values(
+                x.hashtag if x.hashtag is not None else x.tag, x.tweets, x.exposure, x.retweets,
+                x.images if x.images is not None else x.photos, x.links, x.mentions, x.color, x.mediaCount)
+            for x in items
+        ]
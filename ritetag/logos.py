@@ -0,0 +1,134 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+
+from .exceptions import RiteTagException
+from .response import DEFAULT_BUFFER_SIZE, Parser, check_size, copy_stream
+
+
+class _HashingWriter(object):
+
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+
+    def write(self, chunk):
+        self.digest.update(chunk)
+        self.f.write(chunk)
+
+
+class LogoStore(object):
+    """
+    Content addressed store of logo files.
+
+    Files are named by the SHA-256 of their content, so a logo shared by many domains is stored once.
+    An index maps permanent logo URLs to the files, stored URLs are not downloaded again.
+    """
+
+    def __init__(self, directory, timeout=30.0):
+        # type: (str, float) -> LogoStore
+        """
+        Parameters
+        ----------
+        directory : str
+            Directory of the files and the index, created when it does not exist
+        timeout : float
+            Seconds to wait for an index lock held by another process
+        """
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, 'index.db'), timeout=timeout, check_same_thread=False)
+        with self._lock, self._db as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE IF NOT EXISTS logos (url TEXT PRIMARY KEY, digest TEXT NOT NULL, ext TEXT NOT NULL)')
+
+    def close(self):
+        # type: () -> None
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM logos').fetchone()[0]
+
+    def path(self, digest, ext):
+        # type: (str, str) -> str
+        return os.path.join(self.directory, digest[:2], '{}.{}'.format(digest, ext))
+
+    def get(self, url):
+        # type: (str) -> str
+        """
+        Returns path of a stored logo or None.
+        """
+        with self._lock:
+            row = self._db.execute('SELECT digest, ext FROM logos WHERE url = ?', [url]).fetchone()
+        if row is None:
+            return None
+        path = self.path(*row)
+        return path if os.path.exists(path) else None
+
+    def add(self, url, source, ext, buffer_size=DEFAULT_BUFFER_SIZE, max_size=None):
+        # type: (str, file, str, int, int) -> str
+        """
+        Stores a logo read from a file-like source and returns its path.
+        """
+        handle, temp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                writer = _HashingWriter(f)
+                copy_stream(source, writer, buffer_size, max_size)
+            digest = writer.digest.hexdigest()
+            path = self.path(digest, ext)
+            if os.path.exists(path):
+                os.remove(temp)
+            else:
+                if not os.path.isdir(os.path.dirname(path)):
+                    try:
+                        os.makedirs(os.path.dirname(path))
+                    except OSError:
+                        # created by a concurrent writer
+                        pass
+                # readers never see a partially written file
+                getattr(os, 'replace', os.rename)(temp, path)
+        except Exception:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        with self._lock, self._db as db:
+            db.execute('INSERT OR REPLACE INTO logos VALUES (?, ?, ?)', [url, digest, ext])
+        return path
+
+    def download(self, url, session, key=None, ext='png', max_size=None):
+        # type: (str, Session, str, str, int) -> str
+        """
+        Downloads and stores a logo, returns its path.
+
+        Parameters
+        ----------
+        url : str
+            Download URL
+        session : requests.Session
+        key : str
+            URL the logo is stored under, the download URL by default
+        ext : str
+            File extension
+        max_size : int
+            Maximum size in bytes, unlimited by default
+        """
+        response = session.get(url, allow_redirects=True, stream=True)
+        try:
+            if response.status_code != 200:
+                raise RiteTagException('Download of {} failed with status {}'.format(url, response.status_code))
+            check_size(Parser._content_length(response), max_size)
+            return self.add(url if key is None else key, Parser._raw(response), ext, max_size=max_size)
+        finally:
+            response.close()
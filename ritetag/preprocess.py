@@ -0,0 +1,160 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from .exceptions import RiteTagException
+try:
+    from PIL import Image as PILImage, ImageOps
+except ImportError:
+    PILImage = None
+
+FORMAT_EXTENSIONS = {
+    'JPEG': 'jpg',
+    'WEBP': 'webp',
+}
+
+
+def require_pillow():
+    if PILImage is None:
+        raise RiteTagException('ImagePreprocessor requires Pillow, install it with `pip install Pillow`')
+
+
+def reduce_image(source, target, max_dimension, image_format, quality):
+    # type: (str, str, int, str, int) -> str
+    """
+    Writes a downscaled and recompressed copy of an image to target and returns target.
+    Images which do not get smaller are copied unchanged.
+
+    Module level function, so it can run in worker processes.
+    """
+    image = PILImage.open(source)
+    # JPEG files are decoded at a reduced scale when possible, much faster than decoding the full image
+    image.draft('RGB', (max_dimension, max_dimension))
+    image = ImageOps.exif_transpose(image)
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.thumbnail((max_dimension, max_dimension), getattr(PILImage, 'LANCZOS', 1))
+    handle, temp = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            image.save(f, image_format, quality=quality)
+        if os.path.getsize(temp) >= os.path.getsize(source):
+            shutil.copyfile(source, temp)
+        # readers never see a partially written file
+        getattr(os, 'replace', os.rename)(temp, target)
+    except Exception:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return target
+
+
+class ImagePreprocessor(object):
+    """
+    Downscales and recompresses local images before upload, semantic tagging does not need full resolution.
+
+    Reduced images are cached by the hash of the original content and the settings, uploading the same
+    photo again skips the decoding.
+    """
+
+    def __init__(self, max_dimension=1024, image_format='JPEG', quality=85, cache_dir=None, processes=None):
+        # type: (int, str, int, str, int) -> ImagePreprocessor
+        """
+        Parameters
+        ----------
+        max_dimension : int
+            Maximum width and height in pixels, the aspect ratio is kept
+        image_format : str
+            'JPEG' or 'WEBP'
+        quality : int
+            Compression quality 1-100
+        cache_dir : str
+            Directory of reduced images, a temporary directory removed by close() by default
+        processes : int
+            Worker processes of process_many(), the number of CPUs by default
+        """
+        require_pillow()
+        if image_format not in FORMAT_EXTENSIONS:
+            raise RiteTagException('Unsupported image format {}'.format(image_format))
+        self.max_dimension = max_dimension
+        self.image_format = image_format
+        self.quality = quality
+        self.processes = processes
+        self._own_cache_dir = cache_dir is None
+        self.cache_dir = tempfile.mkdtemp(prefix='ritetag-') if cache_dir is None else cache_dir
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        # type: () -> None
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+        if self._own_cache_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def cache_path(self, path):
+        # type: (str) -> str
+        """
+        Returns path of the reduced image in the cache, the file may not exist yet.
+        """
+        digest = hashlib.sha1('{}:{}:{}:'.format(self.max_dimension, self.image_format, self.quality).encode('utf-8'))
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return os.path.join(self.cache_dir, '{}.{}'.format(digest.hexdigest(), FORMAT_EXTENSIONS[self.image_format]))
+
+    def process(self, path):
+        # type: (str) -> str
+        """
+        Returns path of the reduced image.
+        """
+        target = self.cache_path(path)
+        if os.path.exists(target):
+            return target
+        return reduce_image(path, target, self.max_dimension, self.image_format, self.quality)
+
+    def submit(self, path):
+        # type: (str) -> Future
+        """
+        Reduces an image in a worker process, returns future of the reduced image path.
+        """
+        target = self.cache_path(path)
+        if os.path.exists(target):
+            future = Future()
+            future.set_result(target)
+            return future
+        return self._get_executor().submit(reduce_image, path, target, self.max_dimension, self.image_format,
+                                           self.quality)
+
+    def process_many(self, paths):
+        # type: ([str]) -> [str]
+        """
+        Reduces images in worker processes, returns paths in the input order.
+        """
+        futures = {}
+        for path in set(paths):
+            futures[path] = self.submit(path)
+        return [futures[x].result() for x in paths]
+
+    def _get_executor(self):
+        # type: () -> ProcessPoolExecutor
+        # a second pool of worker processes would never be shut down
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.processes)
+        return self._executor
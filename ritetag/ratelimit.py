@@ -0,0 +1,96 @@
+import calendar
+import threading
+import time
+
+from .exceptions import RiteTagException
+
+
+class RateLimiter(object):
+    """
+    Token bucket pacing requests so the remaining API credits last until the limit resets.
+
+    The bucket is synchronized from the X-Rate-Limit headers of every response. Until the first
+    response arrives, the bucket refills at initial_rate.
+    """
+
+    def __init__(self, burst=10, max_wait=None, clock=time.time, initial_rate=1.0):
+        # type: (int, float, callable, float) -> RateLimiter
+        """
+        Parameters
+        ----------
+        burst : int
+            Maximum number of requests sent without pacing
+        max_wait : float
+            Maximum seconds a request waits for a credit, RiteTagException is raised instead of longer waits.
+            Requests wait as long as needed by default.
+        clock : callable
+            Returns current unix timestamp
+        initial_rate : float
+            Requests per second allowed after the burst until the first response is synchronized, must be positive
+        """
+        if initial_rate <= 0:
+            raise RiteTagException('initial_rate must be positive')
+        self.burst = burst
+        self.max_wait = max_wait
+        self.clock = clock
+        self.initial_rate = initial_rate
+        self.rate = None
+        self.reset_at = None
+        self.tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _rate(self):
+        # type: () -> float
+        return self.initial_rate if self.rate is None else self.rate
+
+    def _refill(self, now):
+        # type: (float) -> None
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self._rate())
+        self._updated = now
+
+    def update(self, limit):
+        # type: (Limit) -> None
+        """
+        Synchronizes the bucket with API limits from response headers.
+        """
+        now = self.clock()
+        # the limit resets at midnight (UTC) of the reset date
+        reset_at = calendar.timegm(limit.reset.timetuple())
+        remaining = max(limit.limit - limit.used, 0)
+        with self._lock:
+            self._refill(now)
+            self.reset_at = reset_at
+            self.rate = remaining / max(reset_at - now, 1.0)
+            self.tokens = min(self.tokens, remaining)
+
+    def reserve(self):
+        # type: () -> float
+        """
+        Takes one credit and returns seconds the caller has to wait before sending the request.
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            rate = self._rate()
+            if rate:
+                wait = -self.tokens / rate
+            else:
+                # no credits left, wait for the reset
+                wait = max(self.reset_at - now, 0.0)
+            if self.max_wait is not None and wait > self.max_wait:
+                self.tokens += 1
+                raise RiteTagException('API credits are exhausted, next credit in {:.0f}s'.format(wait))
+            return wait
+
+    def acquire(self):
+        # type: () -> None
+        """
+        Blocks until a request can be sent.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
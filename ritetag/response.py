@@ -1,9 +1,64 @@
+import os
+import tempfile
 from datetime import date
 
-from requests import Response, get
+from requests import get
 
 from .exceptions import *
-import shutil
+from io import BytesIO
+try:
+    # python3
+    from sys import intern
+except ImportError:
+    # python2, the builtin intern rejects unicode returned by json
+    def intern(value):
+        return value
+
+
+def parse_date(value):
+    # type: (str) -> date
+    """
+    Parses date of API values in format 'YYYY-MM-DD' or 'YYYY-MM-DD hh:mm:ss'.
+    """
+    parts = [int(x) for x in value.split(' ')[0].split('-')]
+    return date(parts[0], parts[1], parts[2])
+
+
+# bytes copied at once by streamed image writes
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+def check_size(size, max_size):
+    # type: (int, int) -> None
+    if max_size is not None and size is not None and size > max_size:
+        raise ImageTooLargeException('Image has more than {} bytes'.format(max_size))
+
+
+def copy_stream(source, sink, buffer_size=DEFAULT_BUFFER_SIZE, max_size=None):
+    # type: (object, object, int, int) -> int
+    """
+    Copies a readable stream to a writable one in chunks and returns the number of copied bytes.
+
+    Sources supporting readinto() are read into one reused buffer, sinks get memoryview slices of it
+    and must copy the data they keep.
+    """
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    readinto = getattr(source, 'readinto', None)
+    total = 0
+    while True:
+        if readinto is not None:
+            size = readinto(buffer)
+            chunk = view[:size] if size else None
+        else:
+            chunk = source.read(buffer_size)
+            size = len(chunk)
+        if not size:
+            return total
+        total += size
+        check_size(total, max_size)
+        sink.write(chunk)
+
 
 HASHTAG_COLORS = {
     0: 'UNDERUSED',
@@ -15,61 +70,62 @@ HASHTAG_COLORS = {
 }
 
 
-class Hashtag:
-
-    def __init__(self, json):
-        self.__data = json
-
-    @property
-    def hashtag(self):
-        # type: () -> str
-        return self.__data['hashtag'] if 'hashtag' in self.__data else self.__data['tag']
-
-    @property
-    def tweets(self):
-        # type: () -> int
-        return self.__data['tweets']
-
-    @property
-    def exposure(self):
-        # type: () -> int
-        return self.__data['exposure']
-
-    @property
-    def retweets(self):
-        # type: () -> int
-        return self.__data['retweets']
-
-    @property
-    def images(self):
-        # type: () -> float
-        return self.__data['images'] if 'images' in self.__data else self.__data['photos']
+class Hashtag(object):
+    """
+    Hashtag stats, all values are read once from the API response.
 
-    @property
-    def links(self):
-        # type: () -> float
-        return self.__data['links']
+    Attributes
+    ----------
+    hashtag : str
+    tweets : int
+    exposure : int
+    retweets : int
+    images : float
+    links : float
+    mentions : float
+    color : int
+    media_count : int
+        None when the API does not know it
+    """
 
-    @property
-    def mentions(self):
-        # type: () -> float
-        return self.__data['mentions']
+    __slots__ = ('hashtag', 'tweets', 'exposure', 'retweets', 'images', 'links', 'mentions', 'color', 'media_count')
 
-    @property
-    def color(self):
-        # type: () -> int
-        return self.__data['color']
+    def __init__(self, json):
+        get = json.get
+        # endpoints differ in key names, aliases are resolved once
+        self.hashtag = intern(json['hashtag'] if 'hashtag' in json else json['tag'])
+        self.tweets = get('tweets')
+        self.exposure = get('exposure')
+        self.retweets = get('retweets')
+        self.images = json['images'] if 'images' in json else get('photos')
+        self.links = get('links')
+        self.mentions = get('mentions')
+        self.color = get('color')
+        self.media_count = get('mediaCount')
+
+    @classmethod
+    def from_values(cls, hashtag, tweets, exposure, retweets, images, links, mentions, color, media_count):
+        # type: (str, int, int, int, float, float, float, int, int) -> Hashtag
+        """
+        Creates hashtag from already decoded values, used by typed decoders.
+        """
+        self = cls.__new__(cls)
+        self.hashtag = intern(hashtag)
+        self.tweets = tweets
+        self.exposure = exposure
+        self.retweets = retweets
+        self.images = images
+        self.links = links
+        self.mentions = mentions
+        self.color = color
+        self.media_count = media_count
+        return self
 
     @property
     def color_verbose(self):
         # type: () -> str
         return HASHTAG_COLORS[self.color]
 
-    @property
-    def media_count(self):
-        # type: () -> int
-        return self.__data['mediaCount'] if 'mediaCount' in self.__data else None
-
     def __str__(self):
         # type: () -> str
         output_format = '==== Stats of #{} ====\ntweets: {}\nretweets: {}\nexposure: {}\n' \
@@ -87,67 +143,45 @@ class Hashtag:
         )
 
 
-class HashtagHistory:
-
-    def __init__(self, json):
-        self.__data = json
-
-    @property
-    def hashtag(self):
-        # type: () -> str
-        return self.__data['tag']
-
-    @property
-    def date_str(self):
-        # type: () -> str
-        return self.__data['date']
-
-    @property
-    def date(self):
-        # type: () -> date
-        date_str = [int(x) for x in self.date_str.split(' ')[0].split('-')]
-        return date(date_str[0], date_str[1], date_str[2])
-
-    @property
-    def tweets(self):
-        # type: () -> int
-        return self.__data['tweets']
+class HashtagHistory(object):
+    """
+    Hashtag stats of one day, all values are read once from the API response.
 
-    @property
-    def retweets(self):
-        # type: () -> int
-        return self.__data['retweets']
+    Attributes
+    ----------
+    hashtag : str
+    date_str : str
+    date : date
+    tweets : int
+    retweets : int
+    exposure : int
+    links : float
+    images : float
+    mentions : float
+    color : int
+    """
 
-    @property
-    def links(self):
-        # type: () -> float
-        return self.__data['links']
+    __slots__ = ('hashtag', 'date_str', 'date', 'tweets', 'retweets', 'exposure', 'links', 'images', 'mentions',
+                 'color')
 
-    @property
-    def images(self):
-        # type: () -> float
-        return self.__data['images']
-
-    @property
-    def mentions(self):
-        # type: () -> float
-        return self.__data['mentions']
-
-    @property
-    def color(self):
-        # type: () -> int
-        return self.__data['color']
+    def __init__(self, json):
+        get = json.get
+        self.hashtag = intern(json['tag'])
+        self.date_str = json['date']
+        self.date = parse_date(self.date_str)
+        self.tweets = get('tweets')
+        self.retweets = get('retweets')
+        self.exposure = get('exposure')
+        self.links = get('links')
+        self.images = get('images')
+        self.mentions = get('mentions')
+        self.color = get('color')
 
     @property
     def color_verbose(self):
         # type: () -> str
         return HASHTAG_COLORS[self.color]
 
-    @property
-    def exposure(self):
-        # type: () -> int
-        return self.__data['exposure']
-
     def __str__(self):
         # type: () -> str
         output_format = '==== Stats of #{} ====\ndate: {}\ntweets: {}\nretweets: {}\nexposure: {}\n' \
@@ -178,19 +212,55 @@ class InstagramBannedHashtag:
 
 
 class Image:
-
-    def __init__(self, content_type, content):
+    """
+    Image streamed from a response, the content is read once by read(), write_to() or save().
+
+    Attributes
+    ----------
+    content_type : str
+    content : file
+        Unread body of the response
+    length : int
+        Size from the Content-Length header, None when it is unknown
+    max_size : int
+        Reading more bytes raises ImageTooLargeException, unlimited by default
+    """
+
+    def __init__(self, content_type, content, length=None, max_size=None):
         self.content_type = content_type
         self.content = content
+        self.length = length
+        self.max_size = max_size
         self.ext = self.get_ext()
+        check_size(length, max_size)
 
-    def save(self, target_directory, filename_without_ext):
-        # type: (str, str) -> str
+    def write_to(self, sink, buffer_size=DEFAULT_BUFFER_SIZE):
+        # type: (object, int) -> int
+        """
+        Streams the image to a file-like object with constant memory, returns the number of written bytes.
+        """
+        try:
+            return copy_stream(self.content, sink, buffer_size, self.max_size)
+        finally:
+            self.close()
+
+    def read(self):
+        # type: () -> bytes
+        buffer = BytesIO()
+        self.write_to(buffer)
+        return buffer.getvalue()
+
+    def save(self, target_directory, filename_without_ext, buffer_size=DEFAULT_BUFFER_SIZE):
+        # type: (str, str, int) -> str
         path = '{}/{}.{}'.format(target_directory, filename_without_ext, self.ext)
         with open(path, 'wb') as out_file:
-            shutil.copyfileobj(self.content, out_file)
+            self.write_to(out_file, buffer_size)
         return path
 
+    def close(self):
+        # type: () -> None
+        self.content.close()
+
     def get_ext(self):
         ct = self.content_type
         if ct == 'image/png':
@@ -287,6 +357,18 @@ class Logo:
             return self.__get_image_content_type('squareLogo', permanent)
         raise RiteTagException('Logo not found')
 
+    def variant(self, square=False):
+        # type: (bool) -> (str, str, str)
+        """
+        Returns URL, permanent URL and content type of the original or the square logo.
+        The permanent URL is None when the API does not provide it.
+        """
+        if not self.is_found:
+            raise RiteTagException('Logo not found')
+        type = 'squareLogo' if square else 'originalLogo'
+        permanent = self.__get_image(type, True) if 'permanentUrl' in self.response[type] else None
+        return self.__get_image(type, False), permanent, self.__get_image_content_type(type, False)
+
     def __get_image(self, type, permanent):
         url_type = 'permanentUrl' if permanent else 'url'
         l = self.response[type]
@@ -302,6 +384,32 @@ class Logo:
                 return content_type
 
 
+class StoredLogo:
+    """
+    Logo of a domain saved to a LogoStore.
+
+    Attributes
+    ----------
+    logo : Logo
+    original : str
+        Path of the original logo, None when the logo was not found
+    square : str
+        Path of the square logo, None when the logo was not found or not requested
+    """
+
+    def __init__(self, logo, original=None, square=None):
+        # type: (Logo, str, str) -> StoredLogo
+        self.logo = logo
+        self.original = original
+        self.square = square
+
+    def __str__(self):
+        # type: () -> str
+        if not self.logo.is_found:
+            return 'Logo not found'
+        return 'logo: {}, square logo: {}'.format(self.original, self.square)
+
+
 class Parser:
     @staticmethod
     def _handle_error_message(json):
@@ -310,16 +418,54 @@ class Parser:
             raise RiteTagException(json['message'])
 
     @staticmethod
-    def download_file(url, filename):
-        r = get(url, allow_redirects=True)
-        f = open(filename, "wb")
-        f.write(r.content)
-        f.close()
+    def download_file(url, filename, session=None, buffer_size=DEFAULT_BUFFER_SIZE, max_size=None):
+        # type: (str, str, Session, int, int) -> int
+        """
+        Streams a file to disk and returns its size. The file is written to a temporary file and renamed,
+        a failed download leaves no partial file.
+        """
+        r = (get if session is None else session.get)(url, allow_redirects=True, stream=True)
+        try:
+            check_size(Parser._content_length(r), max_size)
+            handle, temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), suffix='.tmp')
+            try:
+                with os.fdopen(handle, 'wb') as f:
+                    size = copy_stream(Parser._raw(r), f, buffer_size, max_size)
+                getattr(os, 'replace', os.rename)(temp, filename)
+            except BaseException:
+                if os.path.exists(temp):
+                    os.remove(temp)
+                raise
+            return size
+        finally:
+            r.close()
+
+    @staticmethod
+    def _raw(response):
+        # type: (Response) -> file
+        # requests leaves content encodings of the raw stream to the caller
+        response.raw.decode_content = True
+        return response.raw
+
+    @staticmethod
+    def _content_length(response):
+        # type: (Response) -> int
+        # the header counts encoded bytes, it does not limit a decoded body
+        length = response.headers.get('Content-Length')
+        if length is None or response.headers.get('Content-Encoding', 'identity') != 'identity':
+            return None
+        return int(length)
 
     @staticmethod
-    def hashtag_list(json, key):
-        # type: (dict, str) -> [Hashtag]
+    def hashtag_list(json, key, frame=False):
+        # type: (dict, str, bool) -> [Hashtag]
+        """
+        Returns list of Hashtag, or HashtagFrame with numpy columns when frame is True.
+        """
         Parser._handle_error_message(json)
+        if frame:
+            from .frame import HashtagFrame
+            return HashtagFrame.from_json(json[key])
         return [Hashtag(x) for x in json[key]]
 
     @staticmethod
@@ -347,10 +493,14 @@ class Parser:
         return json['emojis']
 
     @staticmethod
-    def image(response, external=False):
-        # type: (Response, bool) -> Image
+    def image(response, external=False, max_size=None):
+        # type: (Response, bool, int) -> Image
         try:
-            return Image(response.headers['Content-Type'], response.raw)
+            return Image(response.headers['Content-Type'], Parser._raw(response), Parser._content_length(response),
+                         max_size)
+        except ImageTooLargeException:
+            response.close()
+            raise
         except ImageFormatException:
             if external:
                 raise ImageFormatException
@@ -416,8 +566,7 @@ class Limit:
     def __init__(self, limit, used, reset):
         self.limit = int(limit)
         self. used = int(used)
-        reset_date = [int(x) for x in reset.split(' ')[0].split('-')]
-        self.reset = date(reset_date[0], reset_date[1], reset_date[2])
+        self.reset = parse_date(reset)
 
     @property
     def usage(self):
@@ -0,0 +1,173 @@
+import calendar
+import random
+import threading
+import time
+
+from email.utils import mktime_tz, parsedate_tz
+
+from .response import Limit
+
+RATE_LIMIT_HEADERS = ['X-Rate-Limit-Limit', 'X-Rate-Limit-Used', 'X-Rate-Limit-Reset']
+
+
+class RetryPolicy(object):
+    """
+    Capped exponential backoff with full jitter.
+
+    Server hints win over the backoff: Retry-After header, and X-Rate-Limit-Reset for 429 responses
+    once all credits are used.
+    Non-idempotent requests are retried only when the server surely did not process them, that is
+    on 429 responses and on errors raised before the request was sent.
+    """
+
+    def __init__(self, max_retries=3, backoff=0.5, max_backoff=30.0, max_wait=60.0,
+                 statuses=(429, 500, 502, 503, 504), idempotent=True):
+        # type: (int, float, float, float, tuple, bool) -> RetryPolicy
+        """
+        Parameters
+        ----------
+        max_retries : int
+            Maximum number of retries of one request
+        backoff : float
+            Delay before the first retry in seconds, doubled with every next retry
+        max_backoff : float
+            Maximum backoff delay in seconds
+        max_wait : float
+            Requests are not retried when the server asks to wait longer than this number of seconds
+        statuses : tuple
+            Retried HTTP status codes
+        idempotent : bool
+            False for requests which must not be sent twice
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+        self.statuses = statuses
+        self.idempotent = idempotent
+
+    def delay(self, attempt, status=None, headers=None, error=False, sent=True, now=None):
+        # type: (int, int, dict, bool, bool, float) -> float
+        """
+        Returns seconds to wait before the next attempt or None when the request must not be retried.
+
+        Parameters
+        ----------
+        attempt : int
+            Number of already made retries
+        status : int
+            Response status code
+        headers : dict
+            Response headers
+        error : bool
+            The request failed without a response
+        sent : bool
+            The request might have reached the server
+        """
+        if attempt >= self.max_retries:
+            return None
+        if error:
+            if self.idempotent or not sent:
+                return self._backoff(attempt)
+            return None
+        if status not in self.statuses or (status != 429 and not self.idempotent):
+            return None
+        wait = self._server_delay(status, headers or {}, time.time() if now is None else now)
+        if wait is None:
+            return self._backoff(attempt)
+        return wait if wait <= self.max_wait else None
+
+    def _backoff(self, attempt):
+        # type: (int) -> float
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def _server_delay(status, headers, now):
+        # type: (int, dict, float) -> float
+        retry_after = headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                parsed = parsedate_tz(retry_after)
+                if parsed is not None:
+                    return max(mktime_tz(parsed) - now, 0.0)
+        if status == 429 and all(x in headers for x in RATE_LIMIT_HEADERS):
+            try:
+                limit = Limit(*[headers[x] for x in RATE_LIMIT_HEADERS])
+            except (ValueError, IndexError):
+                return None
+            # credits are exhausted, nothing will succeed before the reset
+            if limit.used >= limit.limit:
+                return max(calendar.timegm(limit.reset.timetuple()) - now, 0.0)
+        return None
+
+
+class RetryBudget(object):
+    """
+    Limits retries of the whole client to a ratio of requests, so an outage does not multiply the load.
+    """
+
+    def __init__(self, ratio=0.2, capacity=10):
+        # type: (float, int) -> RetryBudget
+        """
+        Parameters
+        ----------
+        ratio : float
+            Retries earned by one request
+        capacity : int
+            Maximum number of retries in a burst
+        """
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        # type: () -> None
+        with self._lock:
+            self.tokens = min(self.tokens + self.ratio, self.capacity)
+
+    def withdraw(self):
+        # type: () -> bool
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryStrategy(object):
+    """
+    Retry policies per endpoint sharing one retry budget.
+
+    Rules are (path prefix, policy) pairs, the first matching prefix wins, None disables retries.
+    Short links are created by every request, they are never retried blindly.
+    """
+
+    DEFAULT_RULES = [
+        ('/v1/link/short-link', RetryPolicy(idempotent=False)),
+    ]
+
+    def __init__(self, default=None, rules=None, budget=None):
+        # type: (RetryPolicy, [(str, RetryPolicy)], RetryBudget) -> RetryStrategy
+        """
+        Parameters
+        ----------
+        default : RetryPolicy
+            Policy of endpoints without a rule
+        rules : [(str, RetryPolicy)]
+            Rules checked before the default ones
+        budget : RetryBudget
+            Retry budget shared by all requests
+        """
+        self.default = RetryPolicy() if default is None else default
+        self.rules = list(rules or []) + self.DEFAULT_RULES
+        self.budget = RetryBudget() if budget is None else budget
+
+    def policy(self, path):
+        # type: (str) -> RetryPolicy
+        for prefix, policy in self.rules:
+            if path.startswith(prefix):
+                return policy
+        return self.default
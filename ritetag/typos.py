@@ -0,0 +1,191 @@
+import threading
+
+# most used email domains, ordered by popularity
+POPULAR_DOMAINS = (
+    'gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'icloud.com', 'aol.com', 'live.com', 'msn.com',
+    'googlemail.com', 'ymail.com', 'rocketmail.com', 'me.com', 'mac.com', 'protonmail.com', 'proton.me',
+    'zoho.com', 'fastmail.com', 'gmx.com', 'gmx.net', 'gmx.de', 'web.de', 't-online.de', 'yandex.ru',
+    'mail.ru', 'seznam.cz', 'email.cz', 'centrum.cz', 'wp.pl', 'o2.pl', 'orange.fr', 'free.fr', 'laposte.net',
+    'libero.it', 'yahoo.co.uk', 'hotmail.co.uk', 'btinternet.com', 'comcast.net', 'att.net', 'verizon.net',
+    'sbcglobal.net', 'bellsouth.net', 'cox.net', 'qq.com', '163.com', '126.com', 'naver.com', 'hanmail.net',
+    'mail.com', 'email.com',
+)
+
+# real domains one edit away from a popular domain, they are known and never corrected
+KNOWN_DOMAINS = ('ge.com', 'aon.com', 'mas.com', 'q.com', 'op.pl', 'mail.de', 'gmx.at', 'gmx.ch')
+
+
+def _deletes(word, max_distance):
+    # type: (str, int) -> set
+    """
+    Returns the word and all strings made by deleting up to max_distance characters of it.
+    """
+    result = {word}
+    edits = {word}
+    for _ in range(max_distance):
+        edits = set(x[:i] + x[i + 1:] for x in edits for i in range(len(x)))
+        result |= edits
+    return result
+
+
+def edit_distance(a, b, max_distance):
+    # type: (str, str, int) -> int
+    """
+    Returns the optimal string alignment distance of two strings, counting adjacent transpositions as one edit.
+    Distances over max_distance are returned as max_distance + 1.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    # typos share most characters, only the differing middle is compared
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return min(max(len(a), len(b)), max_distance + 1)
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+    return min(current[-1], max_distance + 1)
+
+
+class TypoIndex(object):
+    """
+    Local "did you mean" suggestions for email domains, a symmetric delete index (as in SymSpell) of known domains.
+
+    Deletes of the first prefix_length characters of every domain point to the domain, a lookup generates
+    the deletes of the misspelled domain and verifies the candidates by edit distance. Known domains are popular
+    mail domains and domains learned from email_typo responses.
+
+    Closeness alone does not make a typo, mail.com is a real domain one edit away from gmail.com. Suggestions
+    are confident for known domains, for typos whose corrections were confirmed by the API and for domains
+    with a single known domain one edit away, which is a popular one.
+    """
+
+    def __init__(self, domains=POPULAR_DOMAINS, known=KNOWN_DOMAINS, max_distance=2, prefix_length=7):
+        # type: ([str], [str], int, int) -> TypoIndex
+        """
+        Parameters
+        ----------
+        domains : [str]
+            Popular domains ordered by popularity, popular ones are suggested first and typos one edit away
+            from them are corrected without the API
+        known : [str]
+            Other real domains, never corrected
+        max_distance : int
+            Maximum number of edits between a misspelled domain and a suggestion
+        prefix_length : int
+            Number of indexed characters, longer prefixes use more memory
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._weights = {}
+        self._corrections = {}
+        self._deletes = {}
+        self._lock = threading.Lock()
+        self._popular = frozenset(x.lower() for x in domains)
+        for i, domain in enumerate(domains):
+            self.add(domain, len(domains) - i)
+        for domain in known:
+            self.add(domain)
+
+    def __len__(self):
+        return len(self._weights)
+
+    def __contains__(self, domain):
+        # type: (str) -> bool
+        return domain.lower() in self._weights
+
+    def add(self, domain, weight=1):
+        # type: (str, int) -> None
+        """
+        Adds a known domain, the weight of a domain added again is increased.
+        """
+        domain = domain.lower()
+        with self._lock:
+            if domain in self._weights:
+                self._weights[domain] += weight
+                return
+            self._weights[domain] = weight
+            for key in _deletes(domain[:self.prefix_length], self.max_distance):
+                # most deletes point to one domain, lists are created only when needed
+                entry = self._deletes.get(key)
+                if entry is None:
+                    self._deletes[key] = domain
+                elif isinstance(entry, list):
+                    entry.append(domain)
+                else:
+                    self._deletes[key] = [entry, domain]
+
+    def lookup(self, domain):
+        # type: (str) -> [(str, int)]
+        """
+        Returns (known domain, distance) within max_distance, the closest and most popular ones first.
+        A known domain returns itself with distance 0.
+        """
+        domain = domain.lower()
+        if domain in self._weights:
+            return [(domain, 0)]
+        candidates = set()
+        for key in _deletes(domain[:self.prefix_length], self.max_distance):
+            entry = self._deletes.get(key)
+            if entry is None:
+                continue
+            if isinstance(entry, list):
+                candidates.update(entry)
+            else:
+                candidates.add(entry)
+        matches = []
+        for candidate in candidates:
+            distance = edit_distance(domain, candidate, self.max_distance)
+            if distance <= self.max_distance:
+                matches.append((distance, -self._weights.get(candidate, 0), candidate))
+        matches.sort()
+        return [(candidate, distance) for distance, _, candidate in matches]
+
+    def suggest(self, domain, limit=3):
+        # type: (str, int) -> ([str], bool)
+        """
+        Returns (suggestions, confident). A known domain has no suggestions and a typo confirmed by the API
+        its confirmed corrections. A domain whose only known domain one edit away is popular gets that domain.
+        These are confident, other domains get the closest known domains, which are not confident.
+        """
+        domain = domain.lower()
+        corrections = self._corrections.get(domain)
+        if corrections is not None:
+            return corrections[:limit], True
+        matches = self.lookup(domain)
+        if matches and matches[0][1] == 0:
+            return [], True
+        close = [candidate for candidate, distance in matches if distance == 1]
+        if len(close) == 1 and close[0] in self._popular:
+            return close, True
+        return [candidate for candidate, _ in matches[:limit]], False
+
+    def learn(self, domain, suggestions):
+        # type: (str, [str]) -> None
+        """
+        Learns from an email_typo response. A domain without suggestions is known, otherwise the suggestions
+        are known domains and confirmed corrections of the domain.
+        """
+        domain = domain.lower()
+        if suggestions:
+            corrections = [x.rsplit('@', 1)[-1].lower() for x in suggestions]
+            for correction in corrections:
+                self.add(correction)
+            with self._lock:
+                self._corrections[domain] = corrections
+        else:
+            with self._lock:
+                self._corrections.pop(domain, None)
+            self.add(domain)
@@ -0,0 +1,111 @@
+import base64
+import json
+import mmap
+import os
+import zlib
+
+from abc import ABCMeta, abstractmethod
+
+# bytes of a file encoded at once, a multiple of 3 so encoded chunks need no padding
+DEFAULT_CHUNK_SIZE = 3 * 64 * 1024
+
+
+# base class with ABCMeta of both python2 and python3
+_Abstract = ABCMeta('_Abstract', (object,), {})
+
+
+class RequestBody(_Abstract):
+    """
+    Request body produced while it is sent, iterating it yields bytes.
+
+    Every iteration starts from the beginning, so retried requests send the whole body again.
+    Subclasses implement __iter__, bodies of a known size also __len__, which is sent as Content-Length.
+    """
+
+    content_type = 'application/json'
+    content_encoding = None
+
+    @abstractmethod
+    def __iter__(self):
+        # type: () -> iter
+        pass
+
+
+class Base64JsonBody(RequestBody):
+    """
+    JSON object with a single key holding a base64 encoded file, e.g. {"image": "iVBORw0KGgo..."}.
+
+    Only one chunk of the file and its encoding are in memory at once.
+    """
+
+    def __init__(self, path, key='image', chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=False):
+        # type: (str, str, int, bool) -> Base64JsonBody
+        """
+        Parameters
+        ----------
+        path : str
+            Encoded file
+        key : str
+            Key of the encoded value
+        chunk_size : int
+            Bytes of the file encoded at once, rounded down to a multiple of 3
+        use_mmap : bool
+            Read the file through a memory map instead of read calls
+        """
+        self.path = path
+        self.key = key
+        self.chunk_size = max(chunk_size - chunk_size % 3, 3)
+        self.use_mmap = use_mmap
+        self._prefix = ('{' + json.dumps(key) + ': "').encode('utf-8')
+        self._suffix = b'"}'
+
+    def __len__(self):
+        size = os.path.getsize(self.path)
+        return len(self._prefix) + 4 * ((size + 2) // 3) + len(self._suffix)
+
+    def __iter__(self):
+        yield self._prefix
+        with open(self.path, 'rb') as f:
+            for chunk in self._read(f):
+                yield base64.b64encode(chunk)
+        yield self._suffix
+
+    def _read(self, f):
+        # empty files can not be mapped
+        if self.use_mmap and os.fstat(f.fileno()).st_size > 0:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for offset in range(0, len(mapped), self.chunk_size):
+                    yield mapped[offset:offset + self.chunk_size]
+            finally:
+                mapped.close()
+        else:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+
+class GzipBody(RequestBody):
+    """
+    Gzip compressed body, compressed chunk by chunk while it is sent. The size is not known in advance,
+    the body is sent with chunked transfer encoding.
+    """
+
+    content_encoding = 'gzip'
+
+    def __init__(self, body, level=6):
+        # type: (RequestBody, int) -> GzipBody
+        self.body = body
+        self.content_type = body.content_type
+        self.level = level
+
+    def __iter__(self):
+        # wbits 31 writes the gzip header and trailer
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        for chunk in self.body:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
@@ -55,6 +55,12 @@ setuptools.setup(
     requires=[
         'requests'
     ],
+    extras_require={
+        'async': ['aiohttp'],
+        'frame': ['numpy'],
+        'fast': ['orjson', 'msgspec'],
+        'image': ['Pillow'],
+    },
     test_suite="tests",
     cmdclass={'test': PyTest},
     scripts=['bin/ritetag-api'],
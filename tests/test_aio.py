@@ -0,0 +1,111 @@
+import asyncio
+import json
+import ritetag
+import pytest
+from unittest import TestCase
+
+pytest.importorskip('aiohttp')
+
+LIMIT_HEADERS = {
+    'X-Rate-Limit-Limit': '100',
+    'X-Rate-Limit-Used': '90',
+    'X-Rate-Limit-Reset': '2021-06-01 00:00:00',
+}
+
+
+class FakeResponse:
+
+    def __init__(self, body, status=200, headers=None):
+        self.status = status
+        self.headers = LIMIT_HEADERS if headers is None else headers
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def read(self):
+        return self.body
+
+
+class FakeSession:
+
+    def __init__(self, body, status=200):
+        self.body = body
+        self.status = status
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        body = self.body(kwargs['params']) if callable(self.body) else self.body
+        return FakeResponse(json.dumps(body).encode('utf-8'), self.status)
+
+
+class TestAsyncClient(TestCase):
+
+    def test_hashtag_stats(self):
+        session = FakeSession({'result': True, 'stats': [
+            {'hashtag': 'jobs', 'tweets': 1, 'exposure': 2, 'retweets': 3,
+             'images': 0.1, 'links': 0.2, 'mentions': 0.3, 'color': 3},
+        ]})
+        client = ritetag.AsyncRiteTagApi('token', session=session)
+        limits = []
+        client.on_limit(80, limits.append)
+
+        stats = asyncio.run(client.hashtag_stats(['#jobs']))
+
+        assert stats[0].hashtag == 'jobs'
+        assert session.calls[0][2]['params'] == {'tags': 'jobs'}
+        assert session.calls[0][2]['headers']['Authorization'] == 'Bearer token'
+        assert client.limit.usage == 90.0
+        assert limits == [client.limit]
+
+    def test_invalid_token(self):
+        client = ritetag.AsyncRiteTagApi('token', session=FakeSession({}, status=401))
+        with pytest.raises(ritetag.RiteTagException, match=r'Invalid or expired token'):
+            asyncio.run(client.history('jobs'))
+
+    def test_enum_params_are_stringified(self):
+        session = FakeSession({'result': True, 'post': 'hello #world'})
+        client = ritetag.AsyncRiteTagApi('token', session=session)
+        asyncio.run(client.auto_hashtag('hello world'))
+        assert session.calls[0][2]['params']['hashtagPosition'] == 'auto'
+
+    def test_company_logo(self):
+        session = FakeSession({'result': True, 'url': 'https://cdn.ritekit.com/google.png'})
+        client = ritetag.AsyncRiteTagApi('token', session=session)
+        assert asyncio.run(client.company_logo('google.com')) == 'https://cdn.ritekit.com/google.png'
+        assert session.calls[0][2]['params'] == {'domain': 'google.com', 'generateFallbackLogo': 0}
+
+    def test_parity_with_blocking_client(self):
+        public = [x for x in dir(ritetag.RiteTagApi) if not x.startswith('_')]
+        missing = [x for x in public if not hasattr(ritetag.AsyncRiteTagApi, x)]
+        assert missing == []
+
+    def test_hashtag_stats_chunks(self):
+        def stats(params):
+            return {'result': True, 'stats': [
+                {'hashtag': t, 'tweets': 1, 'exposure': 2, 'retweets': 3,
+                 'images': 0.1, 'links': 0.2, 'mentions': 0.3, 'color': 3} for t in params['tags'].split(',')
+            ]}
+
+        session = FakeSession(stats)
+        client = ritetag.AsyncRiteTagApi('token', session=session, concurrency=2)
+        tags = ['tag{}'.format(i) for i in range(250)]
+
+        result = asyncio.run(client.hashtag_stats(tags + tags[:5]))
+
+        assert [x.hashtag for x in result] == tags
+        assert len(session.calls) == 3
+
+    def test_single_flight(self):
+        session = FakeSession({'result': True, 'data': []})
+        client = ritetag.AsyncRiteTagApi('token', session=session, single_flight=True)
+
+        async def run():
+            return await asyncio.gather(*[client.history('jobs') for _ in range(10)])
+
+        assert asyncio.run(run()) == [[]] * 10
+        assert len(session.calls) == 1
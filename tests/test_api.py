@@ -1,6 +1,45 @@
+import json
+import time
 import ritetag
 import pytest
-from unittest import TestCase
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+LIMIT_HEADERS = {
+    'X-Rate-Limit-Limit': '100',
+    'X-Rate-Limit-Used': '10',
+    'X-Rate-Limit-Reset': '2021-06-01 00:00:00',
+}
+
+
+def make_response(body, status=200, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(LIMIT_HEADERS if headers is None else headers)
+    response._content = json.dumps(body).encode('utf-8')
+    response._content_consumed = True
+    return response
+
+
+def stats_body(tags):
+    return {'result': True, 'stats': [
+        {'hashtag': t, 'tweets': 1, 'exposure': 2, 'retweets': 3,
+         'images': 0.1, 'links': 0.2, 'mentions': 0.3, 'color': 3} for t in tags
+    ]}
+
+
+def stats_session(fail=()):
+    session = mock.Mock()
+
+    def request(method, url, params=None, **kwargs):
+        tags = params['tags'].split(',')
+        if tags[0] in fail:
+            raise requests.ConnectionError('connection reset')
+        return make_response(stats_body(tags))
+
+    session.request.side_effect = request
+    return session
 
 
 class TestBasics(TestCase):
@@ -35,4 +74,151 @@ class TestBasics(TestCase):
 
     def test_invalid_url(self):
         with pytest.raises(ritetag.RiteTagException, match=r'Invalid url'):
-            self.client._sanitize_url('ftp://ritetag.com')
\ No newline at end of file
+            self.client._sanitize_url('ftp://ritetag.com')
+
+
+class TestSession(TestCase):
+
+    def test_pool_size(self):
+        client = ritetag.RiteTagApi('', pool_size=3)
+        adapter = client.session.get_adapter('https://api.ritekit.com')
+        assert adapter._pool_maxsize == 3
+        client.close()
+
+    def test_headers_are_prebuilt(self):
+        client = ritetag.RiteTagApi('token')
+        assert client._get_headers() is client._get_headers()
+        assert client._get_headers()['Authorization'] == 'Bearer token'
+        assert client._get_headers(json=True)['Content-Type'] == 'application/json'
+        assert 'Content-Type' not in client._get_headers()
+
+    def test_context_manager_closes_own_session(self):
+        with ritetag.RiteTagApi('') as client:
+            client.session = mock.Mock()
+        client.session.close.assert_called_once_with()
+
+    def test_custom_session_is_not_closed(self):
+        session = mock.Mock()
+        with ritetag.RiteTagApi('', session=session):
+            pass
+        session.close.assert_not_called()
+
+
+class TestHashtagStatsChunks(TestCase):
+
+    def test_single_request(self):
+        session = stats_session()
+        client = ritetag.RiteTagApi('', session=session)
+        stats = client.hashtag_stats(['#jobs', 'hello', 'jobs'])
+        assert [x.hashtag for x in stats] == ['jobs', 'hello']
+        assert session.request.call_count == 1
+
+    def test_chunks_keep_input_order(self):
+        session = stats_session()
+        client = ritetag.RiteTagApi('', session=session, concurrency=3)
+        tags = ['tag{}'.format(i) for i in range(250)]
+        stats = client.hashtag_stats(tags + tags[:10])
+        client.close()
+        assert [x.hashtag for x in stats] == tags
+        assert session.request.call_count == 3
+
+    def test_partial_failure(self):
+        session = stats_session(fail=['tag100'])
+        client = ritetag.RiteTagApi('', session=session)
+        tags = ['tag{}'.format(i) for i in range(250)]
+        with pytest.raises(ritetag.PartialResultException) as e:
+            client.hashtag_stats(tags)
+        client.close()
+        assert [x.hashtag for x in e.value.results] == tags[:100] + tags[200:]
+        assert e.value.errors[0][0] == tags[100:200]
+        assert isinstance(e.value.errors[0][1], requests.ConnectionError)
+
+    def test_concurrent_fan_outs_share_one_executor(self):
+        client = ritetag.RiteTagApi('', session=stats_session(), concurrency=3)
+        executors = []
+
+        def slow_executor(**kwargs):
+            time.sleep(0.1)
+            executors.append(ThreadPoolExecutor(**kwargs))
+            return executors[-1]
+
+        tags = ['tag{}'.format(i) for i in range(250)]
+        with mock.patch('ritetag.api.ThreadPoolExecutor', side_effect=slow_executor):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: client.hashtag_stats(tags), range(4)))
+        client.close()
+        assert len(executors) == 1
+
+    def test_single_chunk_failure_is_raised(self):
+        client = ritetag.RiteTagApi('', session=stats_session(fail=['jobs']))
+        with pytest.raises(requests.ConnectionError):
+            client.hashtag_stats(['jobs'])
+
+
+class TestCoalescing(TestCase):
+
+    def test_concurrent_single_lookups_are_merged(self):
+        session = stats_session()
+        client = ritetag.RiteTagApi('', session=session, coalesce=True, coalesce_window=0.2)
+        tags = ['tag{}'.format(i) for i in range(20)]
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            results = list(executor.map(lambda t: client.hashtag_stats([t]), tags))
+        assert [r[0].hashtag for r in results] == tags
+        assert session.request.call_count == 1
+
+    def test_max_batch_sends_immediately(self):
+        session = stats_session()
+        client = ritetag.RiteTagApi('', session=session, coalesce=True, coalesce_window=60,
+                                    coalesce_max_batch=2)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda t: client.hashtag_stats([t]), ['a', 'b', 'c', 'd']))
+        assert [r[0].hashtag for r in results] == ['a', 'b', 'c', 'd']
+        assert session.request.call_count == 2
+
+    def test_errors_are_shared(self):
+        client = ritetag.RiteTagApi('', session=stats_session(fail=['jobs']), coalesce=True)
+        with pytest.raises(requests.ConnectionError):
+            client.hashtag_stats(['jobs'])
+
+
+class TestSingleFlight(TestCase):
+
+    def test_identical_requests_share_one_call(self):
+        session = mock.Mock()
+
+        def request(method, url, **kwargs):
+            time.sleep(0.2)
+            return make_response({'result': True, 'data': []})
+
+        session.request.side_effect = request
+        client = ritetag.RiteTagApi('', session=session, single_flight=True)
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(client.history, ['jobs'] * 4 + ['hello']))
+        assert results == [[]] * 5
+        assert session.request.call_count == 2
+
+    def test_request_key_is_canonical(self):
+        key = ritetag.RiteTagApi._request_key
+        assert key('GET', '/a', {'a': 1, 'b': 'x'}) == key('GET', '/a', {'b': 'x', 'a': '1'})
+        assert key('POST', '/a', {}, {'image': 'x'}) != key('POST', '/a', {}, {'image': 'y'})
+
+
+class TestResponseModels(TestCase):
+
+    def test_hashtag_aliases(self):
+        h = ritetag.response.Hashtag({'tag': 'jobs', 'tweets': 1, 'photos': 0.5, 'color': 3})
+        assert h.hashtag == 'jobs'
+        assert h.images == 0.5
+        assert h.media_count is None
+        assert h.color_verbose == 'HOT_NOW'
+
+    def test_models_are_slotted(self):
+        h = ritetag.response.Hashtag(stats_body(['jobs'])['stats'][0])
+        history = ritetag.response.HashtagHistory({'tag': 'jobs', 'date': '2021-01-02 00:00:00', 'tweets': 1})
+        assert not hasattr(h, '__dict__')
+        assert not hasattr(history, '__dict__')
+        assert history.date == ritetag.response.date(2021, 1, 2)
+
+    def test_hashtags_are_interned(self):
+        a, b = ritetag.response.Parser.hashtag_list(json.loads(json.dumps(stats_body(['jobs', 'jobs']))), 'stats')
+        assert a.hashtag is b.hashtag
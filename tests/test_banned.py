@@ -0,0 +1,122 @@
+import asyncio
+import os
+import ritetag
+import pytest
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from tests.test_api import make_response
+
+BANNED = {'balls', 'lady'}
+
+
+def cleaner_body(post):
+    tags = [x.lstrip('#') for x in post.split() if x.startswith('#')]
+    banned = [x for x in tags if x.lower() in BANNED]
+    cleaned = ' '.join(x for x in post.split() if x.lstrip('#').lower() not in BANNED)
+    return {'result': True, 'post': cleaned, 'bannedHashtags': banned}
+
+
+class TestBannedHashtagIndex(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_known_posts_are_cleaned_locally(self):
+        index = ritetag.BannedHashtagIndex(banned=['#balls', 'Lady'], clean=['sky', 'nature'])
+        result = index.clean('Summer #sky #Balls and #nature\n#lady')
+        assert result.post == 'Summer #sky and #nature'
+        assert result.banned_hashtags == ['Balls', 'lady']
+        assert index.clean('#sky #sunlight') is None
+        assert index.clean('no hashtags').post == 'no hashtags'
+
+    def test_learns_from_responses(self):
+        index = ritetag.BannedHashtagIndex()
+        index.learn('#sky #balls', ritetag.response.InstagramBannedHashtag('#sky', ['balls']))
+        assert index.is_banned('#Balls') is True
+        assert index.is_banned('sky') is False
+        assert index.is_banned('sunlight') is None
+        # a hashtag that gets banned is moved
+        index.add(['sky'], True)
+        assert index.is_banned('sky') is True
+        assert len(index) == 2
+
+    def test_clean_hashtags_expire(self):
+        now = [1000.0]
+        index = ritetag.BannedHashtagIndex(banned=['balls'], clean=['sky'], max_age=60, clock=lambda: now[0])
+        assert index.clean('#sky #balls').post == '#sky'
+        now[0] += 60
+        assert index.is_banned('sky') is None
+        assert index.is_banned('balls') is True
+        assert index.clean('#sky #balls') is None
+        index.learn('#sky', ritetag.response.InstagramBannedHashtag('#sky', []))
+        assert index.is_banned('sky') is False
+
+    def test_inexact_hashtags_are_not_cleaned_locally(self):
+        index = ritetag.BannedHashtagIndex(clean=['foo', 'sky'])
+        assert index.clean('#foo-bar #sky') is None
+        assert index.clean('#sky.') is None
+        assert index.clean('#sky\n#foo').post == '#sky\n#foo'
+
+    def test_does_not_learn_from_mismatched_responses(self):
+        index = ritetag.BannedHashtagIndex()
+        index.learn('#foo-bar #sky', ritetag.response.InstagramBannedHashtag('#sky', ['foo-bar']))
+        assert index.is_banned('foo-bar') is True
+        assert index.is_banned('foo') is None
+        assert index.is_banned('sky') is None
+        index.learn('#foo-bar #sky', ritetag.response.InstagramBannedHashtag('#foo-bar #sky', []))
+        assert index.is_banned('foo') is None
+        assert index.is_banned('sky') is False
+
+    def test_snapshots(self):
+        path = os.path.join(self.directory, 'hashtags.jsonl')
+        ritetag.BannedHashtagIndex(banned=['balls'], clean=['sky']).save(path)
+        index = ritetag.BannedHashtagIndex.load(path)
+        assert index.is_banned('balls') is True and index.is_banned('sky') is False
+        assert [x for x in os.listdir(self.directory) if x.endswith('.tmp')] == []
+
+    def test_snapshots_leave_out_expired_hashtags(self):
+        path = os.path.join(self.directory, 'hashtags.jsonl')
+        now = [1000.0]
+        index = ritetag.BannedHashtagIndex(clean=['sky'], max_age=60, clock=lambda: now[0])
+        now[0] += 30
+        index.add(['nature'], False)
+        now[0] += 40
+        index.save(path)
+        loaded = ritetag.BannedHashtagIndex.load(path)
+        assert loaded.is_banned('nature') is False and loaded.is_banned('sky') is None
+
+    def test_client_asks_only_about_unknown_hashtags(self):
+        session = mock.Mock()
+        session.request.side_effect = lambda method, url, params=None, **kwargs: make_response(
+            cleaner_body(params['post']))
+        index = ritetag.BannedHashtagIndex()
+        api = ritetag.RiteTagApi('token', session=session, banned_hashtag_index=index)
+
+        assert api.banned_instagram_hashtags('#sky #balls #nature').post == '#sky #nature'
+        result = api.banned_instagram_hashtags('#nature #balls #sky')
+        assert result.post == '#nature #sky'
+        assert result.banned_hashtags == ['balls']
+        api.banned_instagram_hashtags('#sky #lady')
+        assert session.request.call_count == 2
+        api.banned_instagram_hashtags('#sky #nature-photography')
+        api.banned_instagram_hashtags('#sky #nature-photography')
+        assert session.request.call_count == 4
+
+    def test_async_client(self):
+        pytest.importorskip('aiohttp')
+        from tests.test_aio import FakeSession
+        session = FakeSession(lambda params: cleaner_body(params['post']))
+        index = ritetag.BannedHashtagIndex(banned=['balls'], clean=['sky'])
+
+        async def run():
+            client = ritetag.AsyncRiteTagApi('token', session=session, banned_hashtag_index=index)
+            return [(await client.banned_instagram_hashtags(x)).post for x in ['#sky #balls', '#lady #sky']]
+
+        assert asyncio.run(run()) == ['#sky', '#sky']
+        assert len(session.calls) == 1
+        assert index.is_banned('lady') is True
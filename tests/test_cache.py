@@ -0,0 +1,285 @@
+import asyncio
+import io
+import itertools
+import json
+import os
+import ritetag
+import pytest
+import shutil
+import sqlite3
+import tempfile
+import time
+from unittest import TestCase, mock
+
+from ritetag.cache import CachePolicy, MemoryCache, RenderCache, SqliteCache
+from tests.test_api import make_response, stats_session
+
+
+class TestCachePolicy(TestCase):
+
+    def test_hashtag_stats_expire_on_next_hour(self):
+        policy = CachePolicy()
+        assert policy.expires_at('/v1/stats/multiple-hashtags', 7300) == 10800
+        assert policy.expires_at('/v1/stats/history/jobs', 3600) == 7200
+
+    def test_never_cached(self):
+        policy = CachePolicy()
+        assert policy.expires_at('/v1/link/short-link', 0) is None
+        assert policy.expires_at('/v2/image/quote', 0) is None
+        assert policy.expires_at('/v1/images/animate', 0) is None
+
+    def test_person_insights_live_for_days(self):
+        assert CachePolicy().expires_at('/v2/person-insights/email-typo', 0) == 7 * 24 * 3600
+
+    def test_custom_rules_win(self):
+        policy = CachePolicy([('/v1/stats/history/', 60)])
+        assert policy.expires_at('/v1/stats/history/jobs', 0) == 60
+
+
+class TestMemoryCache(TestCase):
+
+    def test_lru_eviction(self):
+        cache = MemoryCache(max_size=2)
+        cache.set('a', b'1', float('inf'))
+        cache.set('b', b'2', float('inf'))
+        assert cache.get('a') == b'1'
+        cache.set('c', b'3', float('inf'))
+        assert cache.get('b') is None
+        assert cache.get('c') == b'3'
+        assert cache.stats() == {'size': 2, 'hits': 2, 'misses': 1, 'evictions': 1}
+
+    def test_expiration(self):
+        cache = MemoryCache()
+        cache.set('a', b'1', 0)
+        assert cache.get('a') is None
+
+
+class TestClientCache(TestCase):
+
+    def test_repeated_calls_hit_cache(self):
+        session = stats_session()
+        client = ritetag.RiteTagApi('', session=session, cache=MemoryCache())
+        client.hashtag_stats(['jobs', 'hello'])
+        stats = client.hashtag_stats(['jobs', 'hello'])
+        assert [x.hashtag for x in stats] == ['jobs', 'hello']
+        assert session.request.call_count == 1
+        assert client.cache.hits == 1
+
+    def test_shorten_url_is_not_cached(self):
+        session = mock.Mock()
+        session.request.return_value = make_response(
+            {'result': True, 'url': 'https://rite.ly/x', 'original': 'https://a.com', 'service': 'r', 'ctaId': 1})
+        client = ritetag.RiteTagApi('', session=session, cache=MemoryCache())
+        client.shorten_url('https://a.com', 1)
+        client.shorten_url('https://a.com', 1)
+        assert session.request.call_count == 2
+
+    def test_error_payloads_are_not_cached(self):
+        session = mock.Mock()
+        session.request.side_effect = [
+            make_response({'result': False, 'message': 'Try again later'}),
+            make_response({'result': True, 'data': [{'hashtag': 'hello'}]}),
+            make_response({'result': True, 'data': []}),
+        ]
+        client = ritetag.RiteTagApi('', session=session, cache=MemoryCache())
+        with self.assertRaises(ritetag.RiteTagException):
+            client.hashtag_suggestion_for_text('hello')
+        for _ in range(2):
+            assert client.hashtag_suggestion_for_text('hello')[0].hashtag == 'hello'
+        assert session.request.call_count == 2
+
+    def test_bodies_are_decoded_once(self):
+        session = mock.Mock()
+        session.request.return_value = make_response({'result': True, 'data': [{'hashtag': 'hello'}]})
+        decode = mock.Mock(side_effect=json.loads)
+        client = ritetag.RiteTagApi('', session=session, cache=MemoryCache(), json_decoder=decode)
+        for _ in range(2):
+            assert client.hashtag_suggestion_for_text('hello')[0].hashtag == 'hello'
+        # the response and the cache hit
+        assert decode.call_count == 2
+        client.company_name_to_domain('acme')
+        assert decode.call_count == 3
+
+    def test_error_responses_are_not_cached(self):
+        session = mock.Mock()
+        session.request.return_value = make_response({'result': False, 'message': 'Invalid'}, status=400)
+        client = ritetag.RiteTagApi('', session=session, cache=MemoryCache())
+        for _ in range(2):
+            with self.assertRaises(ritetag.RiteTagException):
+                client.hashtag_suggestion_for_text('hello')
+        assert session.request.call_count == 2
+
+
+class TestSqliteCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_shared_between_instances(self):
+        SqliteCache(self.path).set('a', b'{"result": true}', time.time() + 60)
+        cache = SqliteCache(self.path)
+        assert cache.get('a') == b'{"result": true}'
+        assert cache.get('b') is None
+        assert cache.stats() == {'size': 1, 'hits': 1, 'misses': 1, 'evictions': 0}
+
+    def test_eviction(self):
+        cache = SqliteCache(self.path, max_size=10, touch_interval=0)
+        with mock.patch('time.time', side_effect=itertools.count(1000).__next__):
+            for i in range(10):
+                cache.set(str(i), b'1', 10 ** 10)
+            cache.get('0')
+            cache.set('10', b'1', 10 ** 10)
+            # evicted in one pass down to 90% of max_size
+            assert cache.get('1') is None and cache.get('2') is None
+            assert cache.get('0') == b'1' and cache.get('3') == b'1'
+        assert cache.evictions == 2
+        assert cache.stats()['size'] == 9
+
+    def test_hits_update_access_time_once_per_interval(self):
+        cache = SqliteCache(self.path, touch_interval=60)
+        with mock.patch('time.time', side_effect=[1000, 1030, 1100]):
+            cache.set('a', b'1', 10 ** 10)
+            cache.get('a')
+            accessed = sqlite3.connect(self.path).execute('SELECT accessed_at FROM cache').fetchone()[0]
+            assert accessed == 1000
+            cache.get('a')
+        assert sqlite3.connect(self.path).execute('SELECT accessed_at FROM cache').fetchone()[0] == 1100
+
+    def test_expired_rows_are_purged_periodically(self):
+        with mock.patch('time.time', side_effect=[1000, 1000, 1010, 1070]):
+            cache = SqliteCache(self.path, purge_interval=60)
+            cache.set('a', b'1', 1005)
+            cache.set('b', b'1', 10 ** 10)
+            assert cache.stats()['size'] == 2
+            cache.set('c', b'1', 10 ** 10)
+        assert cache.stats()['size'] == 2
+
+    def test_expired(self):
+        cache = SqliteCache(self.path)
+        cache.set('a', b'1', time.time() - 1)
+        assert cache.get('a') is None
+
+    def test_client_restart_uses_cache(self):
+        client = ritetag.RiteTagApi('', session=stats_session(), cache=SqliteCache(self.path))
+        client.hashtag_stats(['jobs'])
+
+        session = mock.Mock()
+        client = ritetag.RiteTagApi('', session=session, cache=SqliteCache(self.path))
+        stats = client.hashtag_stats(['jobs'])
+        assert stats[0].hashtag == 'jobs'
+        session.request.assert_not_called()
+
+
+class TestRenderCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def image_session(self):
+        from tests.test_image import image_response
+        session = mock.Mock()
+        session.request.side_effect = lambda *args, **kwargs: image_response(b'GIF89a-quote')
+        return session
+
+    def test_keys_are_canonical(self):
+        a = ritetag.ImageBuilder('Hi').width(300).build()
+        b = dict(reversed(list(a.items())))
+        b['width'] = '300'
+        assert RenderCache.key(a) == RenderCache.key(b)
+        assert RenderCache.key(a) != RenderCache.key(ritetag.ImageBuilder('Hello').width(300).build())
+        assert RenderCache.key(a) == RenderCache.key(ritetag.ImageBuilder('').width(300).template().variant('Hi')
+                                                     .build())
+
+    def test_hits_are_served_from_disk(self):
+        session = self.image_session()
+        cache = RenderCache(self.directory)
+        api = ritetag.RiteTagApi('token', session=session, render_cache=cache)
+        assert api.text_to_image(ritetag.ImageBuilder('Hi')).read() == b'GIF89a-quote'
+        image = api.text_to_image(ritetag.ImageBuilder('Hi'))
+        assert image.content_type == 'image/gif'
+        assert image.read() == b'GIF89a-quote'
+        assert session.request.call_count == 1
+        assert cache.stats() == {'bytes': 12, 'hits': 1, 'misses': 1, 'evictions': 0}
+
+    def test_least_recently_used_images_are_evicted(self):
+        cache = RenderCache(self.directory, max_size=30)
+        for i, key in enumerate(['a', 'b', 'c']):
+            with cache.writer(key, 'png') as f:
+                f.write(b'x' * 10)
+            os.utime(os.path.join(self.directory, key + '.png'), (i, i))
+        cache.get('a').close()
+        with cache.writer('d', 'png') as f:
+            f.write(b'x' * 10)
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.stats()['evictions'] == 2
+
+    def test_replaced_images_count_once(self):
+        cache = RenderCache(self.directory)
+        for size in [10, 30, 20]:
+            with cache.writer('a', 'png') as f:
+                f.write(b'x' * size)
+        assert cache.stats()['bytes'] == 20
+
+    def test_image_evicted_while_opened(self):
+        cache = RenderCache(self.directory)
+        with cache.writer('a', 'png') as f:
+            f.write(b'x' * 10)
+        with mock.patch('os.utime', side_effect=OSError('No such file or directory')):
+            image = cache.get('a')
+        assert image.read() == b'x' * 10
+        files = []
+        with mock.patch('os.utime', side_effect=KeyboardInterrupt), \
+                mock.patch('builtins.open', side_effect=lambda *args: files.append(io.open(*args)) or files[-1]):
+            with pytest.raises(KeyboardInterrupt):
+                cache.get('a')
+        assert files[0].closed
+
+    def test_images_larger_than_the_cache_are_returned(self):
+        session = self.image_session()
+        cache = RenderCache(self.directory, max_size=5)
+        api = ritetag.RiteTagApi('token', session=session, render_cache=cache)
+        assert api.text_to_image(ritetag.ImageBuilder('Hi')).read() == b'GIF89a-quote'
+        assert api.text_to_image(ritetag.ImageBuilder('Hello')).read() == b'GIF89a-quote'
+        # only the last image stays
+        assert len(os.listdir(self.directory)) == 1
+
+    def test_image_evicted_by_concurrent_writer_is_requested_again(self):
+        session = self.image_session()
+        cache = RenderCache(self.directory)
+        api = ritetag.RiteTagApi('token', session=session, render_cache=cache)
+        with mock.patch.object(cache, 'open', return_value=None):
+            image = api.text_to_image(ritetag.ImageBuilder('Hi'))
+        assert image.read() == b'GIF89a-quote'
+        assert session.request.call_count == 2
+
+    def test_failed_writes_leave_nothing_behind(self):
+        cache = RenderCache(self.directory)
+        with self.assertRaises(ValueError):
+            with cache.writer('a', 'png') as f:
+                f.write(b'partial')
+                raise ValueError
+        assert os.listdir(self.directory) == []
+
+    def test_async_client(self):
+        pytest.importorskip('aiohttp')
+        from tests.test_image import LIMIT_HEADERS, FakeStreamedResponse
+        headers = dict(LIMIT_HEADERS)
+        headers['Content-Type'] = 'image/gif'
+        session = mock.Mock()
+        session.request.side_effect = lambda *args, **kwargs: FakeStreamedResponse(b'GIF89a-quote', headers)
+
+        async def run():
+            client = ritetag.AsyncRiteTagApi('token', session=session, render_cache=RenderCache(self.directory))
+            await (await client.text_to_image(ritetag.ImageBuilder('Hi'))).read()
+            return await (await client.text_to_image(ritetag.ImageBuilder('Hi'))).read()
+
+        assert asyncio.run(run()) == b'GIF89a-quote'
+        assert session.request.call_count == 1
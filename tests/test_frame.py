@@ -0,0 +1,140 @@
+import pytest
+import ritetag
+from unittest import TestCase
+
+from tests.test_api import stats_session
+
+np = pytest.importorskip('numpy')
+
+
+def rows():
+    return [
+        {'hashtag': 'a', 'tweets': 10, 'exposure': 100, 'retweets': 1, 'images': 0.1, 'links': 0.5,
+         'mentions': 0.1, 'color': 3, 'mediaCount': 5},
+        {'tag': 'b', 'tweets': 30, 'exposure': 50, 'retweets': 2, 'photos': 0.2, 'links': 0.1,
+         'mentions': 0.2, 'color': 1},
+        {'hashtag': 'c', 'tweets': 20, 'exposure': 300, 'retweets': 3, 'images': 0.3, 'links': 0.3,
+         'mentions': 0.3, 'color': 3},
+    ]
+
+
+class TestHashtagFrame(TestCase):
+
+    def test_columns(self):
+        frame = ritetag.HashtagFrame.from_json(rows())
+        assert list(frame['hashtag']) == ['a', 'b', 'c']
+        assert frame['tweets'].dtype == np.int64
+        assert list(frame['images']) == [0.1, 0.2, 0.3]
+        assert np.isnan(frame['media_count'][1])
+
+    def test_from_hashtags_equals_from_json(self):
+        hashtags = [ritetag.response.Hashtag(x) for x in rows()]
+        a = ritetag.HashtagFrame.from_hashtags(hashtags)
+        b = ritetag.HashtagFrame.from_json(rows())
+        for name in ['tweets', 'exposure', 'color', 'images']:
+            assert np.array_equal(a[name], b[name])
+
+    def test_top(self):
+        frame = ritetag.HashtagFrame.from_json(rows())
+        assert list(frame.top(2)['hashtag']) == ['b', 'c']
+        assert list(frame.top(1, by={'exposure': 1.0, 'tweets': 0.5})['hashtag']) == ['c']
+        assert len(frame.top(10)) == 3
+
+    def test_percentile_and_score(self):
+        frame = ritetag.HashtagFrame.from_json(rows())
+        assert list(frame.percentile('tweets')) == [0.0, 1.0, 0.5]
+        assert list(frame.score({'tweets': 2.0, 'exposure': 1.0})) == [0.5, 2.0, 2.0]
+
+    def test_by_color(self):
+        frame = ritetag.HashtagFrame.from_json(rows())
+        assert list(frame.by_color('HOT_NOW')['hashtag']) == ['a', 'c']
+        assert list(frame.by_color(1)['hashtag']) == ['b']
+
+    def test_missing_values_rank_last(self):
+        frame = ritetag.HashtagFrame.from_json(rows() + [{'hashtag': 'd', 'mediaCount': 3}])
+        percentile = frame.percentile('media_count')
+        assert list(percentile[[0, 3]]) == [1.0, 0.0]
+        assert np.isnan(percentile[1]) and np.isnan(percentile[2])
+        assert list(frame.top(2, by='media_count')['hashtag']) == ['a', 'd']
+        assert list(frame.score({'media_count': 1.0})) == [1.0, 0.0, 0.0, 0.0]
+
+    def test_missing_color_matches_no_color(self):
+        frame = ritetag.HashtagFrame.from_json(rows() + [{'hashtag': 'd', 'tweets': 1}])
+        assert frame['color'][3] == ritetag.frame.MISSING_COLOR
+        assert list(frame.by_color(0)['hashtag']) == []
+        assert list(frame.by_color('UNDERUSED', 'HOT_NOW')['hashtag']) == ['a', 'c']
+        hashtags = [ritetag.response.Hashtag({'hashtag': 'd', 'tweets': 1})]
+        assert list(ritetag.HashtagFrame.from_hashtags(hashtags)['color']) == [ritetag.frame.MISSING_COLOR]
+
+    def test_to_pandas(self):
+        pytest.importorskip('pandas')
+        df = ritetag.HashtagFrame.from_json(rows()).to_pandas()
+        assert list(df['tweets']) == [10, 30, 20]
+
+    def test_to_arrow(self):
+        pytest.importorskip('pyarrow')
+        table = ritetag.HashtagFrame.from_json(rows()).to_arrow()
+        assert table.column('hashtag').to_pylist() == ['a', 'b', 'c']
+
+    def test_hashtag_stats_chunks(self):
+        client = ritetag.RiteTagApi('', session=stats_session())
+        tags = ['tag{}'.format(i) for i in range(150)]
+        frame = client.hashtag_stats(tags, frame=True)
+        client.close()
+        assert list(frame['hashtag']) == tags
+
+
+def history(tag, values, colors=None, start=1):
+    colors = colors or [2] * len(values)
+    return [
+        ritetag.response.HashtagHistory({'tag': tag, 'date': '2021-01-{:02d}'.format(start + i), 'tweets': v,
+                                         'retweets': 0, 'exposure': 0, 'links': 0.0, 'images': 0.0,
+                                         'mentions': 0.0, 'color': c})
+        for i, (v, c) in enumerate(zip(values, colors))
+    ]
+
+
+class TestHistoryFrame(TestCase):
+
+    def setUp(self):
+        self.frame = ritetag.HistoryFrame.from_history({
+            'a': history('a', [1, 2, 3, 4, 5]),
+            'b': history('b', [10, 8, 6, 4], colors=[0, 0, 3, 3], start=2),
+        })
+
+    def test_common_date_axis(self):
+        assert str(self.frame.dates[0]) == '2021-01-01'
+        assert len(self.frame.dates) == 5
+        assert self.frame['tweets'].shape == (2, 5)
+        assert np.isnan(self.frame['tweets'][1, 0])
+
+    def test_moving_average(self):
+        ma = self.frame.moving_average('tweets', 2)
+        assert np.isnan(ma[0, 0])
+        assert list(ma[0, 1:]) == [1.5, 2.5, 3.5, 4.5]
+        assert list(ma[1, 1:]) == [10, 9, 7, 5]
+
+    def test_delta_and_growth(self):
+        assert list(self.frame.delta('tweets')[0, 1:]) == [1, 1, 1, 1]
+        assert self.frame.growth('tweets')[1, 2] == pytest.approx(-0.2)
+
+    def test_slope(self):
+        slope = self.frame.slope('tweets')
+        assert slope[0] == pytest.approx(1)
+        assert slope[1] == pytest.approx(-2)
+        assert self.frame.slope('tweets', window=2)[0] == pytest.approx(1)
+
+    def test_acceleration(self):
+        frame = ritetag.HistoryFrame.from_history({'a': history('a', [1, 1, 1, 2, 4, 6])})
+        assert frame.acceleration('tweets')[0] == pytest.approx(2)
+
+    def test_color_transitions(self):
+        transitions = self.frame.color_transitions()
+        assert [(h, str(d), a, b) for h, d, a, b in transitions] == [('b', '2021-01-04', 0, 3)]
+        assert self.frame.color_transitions(to_color=1) == []
+
+    def test_from_store(self):
+        store = ritetag.HistoryStore()
+        store.add(history('a', [1, 2, 3]))
+        frame = ritetag.HistoryFrame.from_store(store, ['a'])
+        assert list(frame['tweets'][0]) == [1, 2, 3]
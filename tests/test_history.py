@@ -0,0 +1,68 @@
+import ritetag
+from datetime import date, datetime, timedelta
+from unittest import TestCase, mock
+
+from ritetag.response import HashtagHistory
+from tests.test_api import make_response
+
+
+def history_point(day, tweets=1, tag='Jobs'):
+    return {'tag': tag, 'date': '{} 00:00:00'.format(day.isoformat()), 'tweets': tweets, 'retweets': 2,
+            'exposure': 3, 'links': 0.1, 'images': 0.2, 'mentions': 0.3, 'color': 2}
+
+
+class TestHistoryStore(TestCase):
+
+    def test_range_query(self):
+        store = ritetag.HistoryStore()
+        store.add([HashtagHistory(history_point(date(2021, 1, d), tweets=d)) for d in range(1, 11)])
+        result = store.get('#jobs', date(2021, 1, 3), date(2021, 1, 5))
+        assert [x.tweets for x in result] == [3, 4, 5]
+        assert result[0].date == date(2021, 1, 3)
+        assert result[0].hashtag == 'Jobs'
+        assert result[0].links == 0.1
+        assert store.latest_date('jobs') == date(2021, 1, 10)
+
+    def test_points_are_replaced(self):
+        store = ritetag.HistoryStore()
+        store.add([HashtagHistory(history_point(date(2021, 1, 1), tweets=1))])
+        store.add([HashtagHistory(history_point(date(2021, 1, 1), tweets=5))])
+        assert [x.tweets for x in store.get('jobs')] == [5]
+
+    def test_recent_tolerates_unpublished_today(self):
+        store = ritetag.HistoryStore()
+        store.add([HashtagHistory(history_point(date(2021, 1, d))) for d in range(1, 4)])
+        assert len(store.recent('jobs', today=date(2021, 1, 3))) == 3
+        # today's point is not published yet
+        recent = store.recent('jobs', today=date(2021, 1, 4), days=2)
+        assert [x.date for x in recent] == [date(2021, 1, 2), date(2021, 1, 3)]
+        assert store.recent('jobs', today=date(2021, 1, 5)) is None
+        # a caller behind UTC
+        assert len(store.recent('jobs', today=date(2021, 1, 2))) == 3
+        assert store.recent('tech', today=date(2021, 1, 3)) is None
+
+    def test_incomplete_points(self):
+        store = ritetag.HistoryStore()
+        point = history_point(date(2021, 1, 1))
+        del point['color'], point['links']
+        store.add([HashtagHistory(point), HashtagHistory(history_point(date(2021, 1, 2)))])
+        first, second = store.get('jobs')
+        assert first.color is None and first.links is None and first.tweets == 1
+        assert second.color == 2
+
+
+class TestClientHistory(TestCase):
+
+    def test_history_skips_request_when_up_to_date(self):
+        today = datetime.utcnow().date()
+        days = [today - timedelta(days=x) for x in range(30)]
+        session = mock.Mock()
+        session.request.return_value = make_response({'result': True, 'data': [history_point(d) for d in days]})
+        store = ritetag.HistoryStore()
+        store.add([HashtagHistory(history_point(today - timedelta(days=100)))])
+        client = ritetag.RiteTagApi('', session=session, history_store=store)
+
+        assert len(client.history('jobs')) == 30
+        assert len(client.history('jobs')) == 30
+        assert session.request.call_count == 1
+        assert len(store.get('jobs')) == 31
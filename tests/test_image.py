@@ -0,0 +1,256 @@
+import asyncio
+import io
+import os
+import ritetag
+import pytest
+import requests
+import shutil
+import tempfile
+from unittest import TestCase, mock
+from urllib.parse import parse_qs
+
+from ritetag.response import Parser, copy_stream
+from tests.test_api import LIMIT_HEADERS
+
+GIF = b'GIF89a' + bytes(range(256)) * 1000
+
+
+def image_response(body=GIF, content_type='image/gif', length=True):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers.update(LIMIT_HEADERS)
+    response.headers['Content-Type'] = content_type
+    if length:
+        response.headers['Content-Length'] = str(len(body))
+    response.raw = io.BytesIO(body)
+    return response
+
+
+class TestCopyStream(TestCase):
+
+    def test_copies_in_chunks(self):
+        sink = mock.Mock()
+        assert copy_stream(io.BytesIO(GIF), sink, buffer_size=1000) == len(GIF)
+        assert sink.write.call_count == (len(GIF) + 999) // 1000
+
+    def test_sources_without_readinto(self):
+        source = mock.Mock(spec=['read'])
+        source.read.side_effect = [b'abc', b'de', b'']
+        sink = io.BytesIO()
+        assert copy_stream(source, sink) == 5
+        assert sink.getvalue() == b'abcde'
+
+    def test_max_size(self):
+        with pytest.raises(ritetag.ImageTooLargeException):
+            copy_stream(io.BytesIO(GIF), io.BytesIO(), buffer_size=1000, max_size=5000)
+
+
+class TestImage(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_streams_to_disk(self):
+        session = mock.Mock()
+        session.request.return_value = image_response()
+        image = ritetag.RiteTagApi('token', session=session).animate_image('https://example.com/a.png')
+        path = image.save(self.directory, 'animated', buffer_size=4096)
+        assert path.endswith('animated.gif')
+        with open(path, 'rb') as f:
+            assert f.read() == GIF
+        assert session.request.call_args[1]['stream'] is True
+
+    def test_read_and_write_to(self):
+        assert Parser.image(image_response()).read() == GIF
+        sink = io.BytesIO()
+        assert Parser.image(image_response()).write_to(sink) == len(GIF)
+        assert sink.getvalue() == GIF
+
+    def test_content_length_over_max_size_fails_before_reading(self):
+        response = image_response()
+        with pytest.raises(ritetag.ImageTooLargeException):
+            Parser.image(response, max_size=1000)
+        assert response.raw.closed
+
+    def test_body_over_max_size_without_content_length(self):
+        image = Parser.image(image_response(length=False), max_size=1000)
+        assert image.length is None
+        with pytest.raises(ritetag.ImageTooLargeException):
+            image.read()
+
+    def test_error_message(self):
+        response = image_response(b'{"result": false, "message": "Invalid font"}', 'application/json')
+        with pytest.raises(ritetag.RiteTagException, match='Invalid font'):
+            Parser.image(response)
+
+    def test_download_file_streams(self):
+        session = mock.Mock()
+        session.get.return_value = image_response()
+        path = os.path.join(self.directory, 'logo.gif')
+        assert Parser.download_file('https://example.com/logo.gif', path, session) == len(GIF)
+        assert session.get.call_args[1]['stream'] is True
+        with open(path, 'rb') as f:
+            assert f.read() == GIF
+
+    def test_failed_download_leaves_no_file(self):
+        session = mock.Mock()
+        session.get.return_value = image_response(length=False)
+        path = os.path.join(self.directory, 'logo.gif')
+        with pytest.raises(ritetag.ImageTooLargeException):
+            Parser.download_file('https://example.com/logo.gif', path, session, buffer_size=1000, max_size=5000)
+        assert os.listdir(self.directory) == []
+
+
+class FakeStream:
+
+    def __init__(self, body):
+        self.body = body
+
+    async def iter_chunked(self, size):
+        for i in range(0, len(self.body), size):
+            yield self.body[i:i + size]
+
+
+class FakeStreamedResponse:
+
+    def __init__(self, body, headers):
+        self.status = 200
+        self.headers = headers
+        self.content = FakeStream(body)
+        self.body = body
+        self.released = False
+
+    def __await__(self):
+        yield from []
+        return self
+
+    async def read(self):
+        return self.body
+
+    def release(self):
+        self.released = True
+
+
+class TestAsyncImage(TestCase):
+
+    def setUp(self):
+        pytest.importorskip('aiohttp')
+
+    def client(self, body, content_type='image/gif'):
+        headers = dict(LIMIT_HEADERS)
+        headers['Content-Type'] = content_type
+        self.response = FakeStreamedResponse(body, headers)
+        session = mock.Mock()
+        session.request.return_value = self.response
+        return ritetag.AsyncRiteTagApi('token', session=session)
+
+    def test_streams_to_async_sink(self):
+        written = []
+
+        class Sink:
+            async def write(self, chunk):
+                written.append(chunk)
+
+        async def run():
+            image = await self.client(GIF).animate_image('https://example.com/a.png')
+            return await image.write_to(Sink(), buffer_size=1000)
+
+        assert asyncio.run(run()) == len(GIF)
+        assert b''.join(written) == GIF
+        assert self.response.released
+
+    def test_text_to_image(self):
+        async def run():
+            image = await self.client(GIF).text_to_image(ritetag.ImageBuilder('Hi'))
+            return await image.read()
+
+        assert asyncio.run(run()) == GIF
+
+    def test_failed_responses_are_released(self):
+        client = self.client(GIF)
+        self.response.status = 401
+        with pytest.raises(ritetag.RiteTagException, match='Invalid or expired token'):
+            asyncio.run(client.animate_image('https://example.com/a.png'))
+        assert self.response.released
+
+        client = self.client(GIF)
+        del self.response.headers['Content-Type']
+        with pytest.raises(KeyError):
+            asyncio.run(client.animate_image('https://example.com/a.png'))
+        assert self.response.released
+
+    def test_error_message(self):
+        client = self.client(b'{"result": false, "message": "Invalid url"}', 'application/json')
+        with pytest.raises(ritetag.RiteTagException, match='Invalid url'):
+            asyncio.run(client.animate_image('https://example.com/a.png'))
+        assert self.response.released
+
+
+class TestImageTemplates(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.template = ritetag.ImageBuilder('').author_color('#ffffff').width(800).template()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_build_returns_a_copy(self):
+        builder = ritetag.ImageBuilder('Hello')
+        builder.build()['text'] = 'changed'
+        assert builder.build()['text'] == 'Hello'
+
+    def test_text_is_encoded_as_utf8(self):
+        query = self.template.variant(u'Žluťoučký kůň', author=u'Čapek').query()
+        params = parse_qs(query)
+        assert params['text'] == [u'Žluťoučký kůň']
+        assert params['author'] == [u'Čapek']
+        assert 'text=%C5%BDlu%C5%A5ou%C4%8Dk%C3%BD+k%C5%AF%C5%88' in query
+
+    def test_variants_share_template_params(self):
+        variant = self.template.variant('Hello', 'Me')
+        assert variant.build() == ritetag.ImageBuilder('Hello', 'Me').author_color('#ffffff').width(800).build()
+        assert parse_qs(variant.query()) == parse_qs(ritetag.ImageBuilder('Hello', 'Me').author_color('#ffffff')
+                                                     .width(800).query())
+        assert parse_qs(variant.query())['textFont'] == ['Lora']
+
+    def test_variant_overrides(self):
+        variant = self.template.variant('Hello', width=200)
+        assert parse_qs(variant.query())['width'] == ['200']
+        assert self.template.params()['width'] == 800
+
+    def test_builder_from_template(self):
+        builder = self.template.builder('Hello').height(100)
+        assert builder.build()['authorColor'] == '#ffffff'
+        assert 'height' in builder.build() and self.template.params()['height'] == 400
+
+    def test_text_to_images(self):
+        session = mock.Mock()
+        session.request.side_effect = lambda *args, **kwargs: image_response()
+        variants = [self.template.variant(x) for x in ['a', 'b', 'c']]
+        with ritetag.RiteTagApi('token', session=session, concurrency=2) as api:
+            results = dict(api.text_to_images(variants, self.directory, ['x', 'y', 'z']))
+        assert sorted(results) == ['x', 'y', 'z']
+        with open(results['y'], 'rb') as f:
+            assert f.read() == GIF
+        texts = sorted(parse_qs(x[1]['params'])['text'][0] for x in session.request.call_args_list)
+        assert texts == ['a', 'b', 'c']
+
+    def test_async_text_to_images(self):
+        pytest.importorskip('aiohttp')
+        headers = dict(LIMIT_HEADERS)
+        headers['Content-Type'] = 'image/gif'
+        session = mock.Mock()
+        session.request.side_effect = lambda *args, **kwargs: FakeStreamedResponse(GIF, headers)
+
+        async def run():
+            client = ritetag.AsyncRiteTagApi('token', session=session)
+            variants = [self.template.variant(x) for x in ['a', 'b']]
+            return dict([x async for x in client.text_to_images(variants, self.directory)])
+
+        results = asyncio.run(run())
+        assert sorted(results) == ['0', '1']
+        assert results['0'].endswith('0.gif')
@@ -0,0 +1,74 @@
+import json
+import ritetag
+import pytest
+from unittest import TestCase, mock
+
+from ritetag.jsonlib import HashtagListDecoder, get_loads
+from tests.test_api import make_response, stats_body, stats_session
+
+BODY = json.dumps(stats_body(['jobs', 'work'])).encode('utf-8')
+
+
+class TestGetLoads(TestCase):
+
+    def test_all_decoders_agree(self):
+        for name in ['orjson', 'msgspec', 'json']:
+            assert get_loads(name)(BODY) == stats_body(['jobs', 'work'])
+
+    def test_callable_is_used_as_is(self):
+        fn = mock.Mock()
+        assert get_loads(fn) is fn
+
+    def test_unknown_decoder(self):
+        with pytest.raises(ritetag.RiteTagException):
+            get_loads('yaml')
+
+
+class TestHashtagListDecoder(TestCase):
+
+    def test_decodes_hashtags(self):
+        result = HashtagListDecoder().decode(BODY, 'stats')
+        assert [x.hashtag for x in result] == ['jobs', 'work']
+        assert result[0].tweets == 1
+        assert result[0].images == 0.1
+        assert result[0].color_verbose == 'HOT_NOW'
+        assert result[0].media_count is None
+
+    def test_resolves_aliases(self):
+        body = json.dumps({'result': True, 'tags': [{'tag': 'jobs', 'photos': 0.5, 'mediaCount': 7}]})
+        result = HashtagListDecoder().decode(body.encode('utf-8'), 'tags')
+        assert result[0].hashtag == 'jobs'
+        assert result[0].images == 0.5
+        assert result[0].media_count == 7
+
+    def test_error_message(self):
+        body = json.dumps({'result': False, 'message': 'Invalid hashtag'}).encode('utf-8')
+        with pytest.raises(ritetag.RiteTagException, match='Invalid hashtag'):
+            HashtagListDecoder().decode(body, 'stats')
+
+    def test_unexpected_schema(self):
+        body = json.dumps({'result': True, 'stats': [{'hashtag': 'jobs', 'color': 'red'}]}).encode('utf-8')
+        assert HashtagListDecoder().decode(body, 'stats') is None
+
+
+class TestClientDecoding(TestCase):
+
+    def test_typed_and_generic_results_match(self):
+        typed = ritetag.RiteTagApi('token', session=stats_session())
+        generic = ritetag.RiteTagApi('token', session=stats_session(), json_decoder='json')
+        assert generic._hashtag_decoder is None
+        a, b = typed.hashtag_stats(['jobs', 'work']), generic.hashtag_stats(['jobs', 'work'])
+        assert [(x.hashtag, x.tweets, x.links) for x in a] == [(x.hashtag, x.tweets, x.links) for x in b]
+
+    def test_unexpected_schema_falls_back(self):
+        session = mock.Mock()
+        session.request.return_value = make_response(
+            {'result': True, 'stats': [{'hashtag': 'jobs', 'tweets': 1, 'extra': {'x': 1}, 'color': '3'}]})
+        result = ritetag.RiteTagApi('token', session=session).hashtag_stats(['jobs'])
+        assert result[0].color == '3'
+
+    def test_custom_decoder(self):
+        decoder = mock.Mock(side_effect=lambda content: json.loads(content.decode('utf-8')))
+        api = ritetag.RiteTagApi('token', session=stats_session(), json_decoder=decoder)
+        assert api.hashtag_stats(['jobs'])[0].hashtag == 'jobs'
+        assert decoder.called
@@ -0,0 +1,121 @@
+import asyncio
+import io
+import json
+import os
+import ritetag
+import pytest
+import shutil
+import tempfile
+import threading
+from unittest import TestCase, mock
+
+from tests.test_api import make_response
+from tests.test_image import image_response
+
+
+def logo_body(domain):
+    if domain == 'notfound.test':
+        return {'result': False, 'message': 'Logo not found'}
+    # example.com and example.org share the logo
+    name = domain.split('.')[0]
+    return {'result': True, 'isGenerated': False, 'brandColors': [], 'originalLogo': {
+        'url': {'png': 'https://cdn.ritekit.com/{}.png?t=1'.format(name)},
+        'permanentUrl': {'png': 'https://cdn.ritekit.com/{}.png'.format(name)},
+    }, 'squareLogo': {
+        'url': {'png': 'https://cdn.ritekit.com/{}_square.png?t=1'.format(name)},
+        'permanentUrl': {'png': 'https://cdn.ritekit.com/{}_square.png'.format(name)},
+    }}
+
+
+def logo_session():
+    session = mock.Mock()
+    session.downloads = []
+    lock = threading.Lock()
+
+    def get(url, **kwargs):
+        with lock:
+            session.downloads.append(url)
+        body = b'square' if 'square' in url else b'logo'
+        return image_response(body, 'image/png')
+
+    session.request.side_effect = lambda method, url, params=None, **kwargs: make_response(
+        logo_body(params['domain']))
+    session.get.side_effect = get
+    return session
+
+
+class TestLogoStore(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = ritetag.LogoStore(self.directory)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_identical_content_is_stored_once(self):
+        a = self.store.add('https://cdn.ritekit.com/a.png', io.BytesIO(b'logo'), 'png')
+        b = self.store.add('https://cdn.ritekit.com/b.png', io.BytesIO(b'logo'), 'png')
+        assert a == b
+        assert self.store.get('https://cdn.ritekit.com/b.png') == a
+        assert self.store.get('https://cdn.ritekit.com/c.png') is None
+        with open(a, 'rb') as f:
+            assert f.read() == b'logo'
+        assert [x for x in os.listdir(self.directory) if x.endswith('.tmp')] == []
+
+    def test_failed_download(self):
+        session = mock.Mock()
+        session.get.return_value = image_response(b'', 'text/html')
+        session.get.return_value.status_code = 404
+        with self.assertRaises(ritetag.RiteTagException):
+            self.store.download('https://cdn.ritekit.com/a.png', session)
+        assert len(self.store) == 0
+
+    def test_bulk_download(self):
+        session = logo_session()
+        with ritetag.RiteTagApi('token', session=session, concurrency=2) as api:
+            domains = ['example.com', 'notfound.test', 'google.com']
+            results = dict(api.company_logos(domains, self.store))
+
+        assert sorted(results) == sorted(['example.com', 'notfound.test', 'google.com'])
+        assert results['notfound.test'].original is None
+        with open(results['google.com'].square, 'rb') as f:
+            assert f.read() == b'square'
+        # identical content of different logos is stored once
+        assert results['google.com'].original == results['example.com'].original
+        assert len(session.downloads) == 4
+
+    def test_stored_permanent_urls_are_not_downloaded(self):
+        session = logo_session()
+        with ritetag.RiteTagApi('token', session=session) as api:
+            list(api.company_logos(['example.com'], self.store))
+            list(api.company_logos(['example.com', 'example.org'], self.store, square=False))
+        assert len(session.downloads) == 2
+
+    def test_async_bulk_download(self):
+        pytest.importorskip('aiohttp')
+        from tests.test_aio import FakeResponse
+
+        class Session:
+
+            def __init__(self):
+                self.downloads = []
+
+            def request(self, method, url, params=None, **kwargs):
+                if params is not None:
+                    return FakeResponse(json.dumps(logo_body(params['domain'])).encode('utf-8'))
+                self.downloads.append(url)
+                return FakeResponse(b'square' if 'square' in url else b'logo')
+
+        session = Session()
+
+        async def run():
+            client = ritetag.AsyncRiteTagApi('token', session=session)
+            return dict([x async for x in client.company_logos(['example.com', 'google.com'], self.store)])
+
+        results = asyncio.run(run())
+        assert results['google.com'].original == results['example.com'].original
+        with open(results['google.com'].square, 'rb') as f:
+            assert f.read() == b'square'
+        assert len(session.downloads) == 4
@@ -0,0 +1,251 @@
+import asyncio
+import itertools
+import os
+import ritetag
+import pytest
+import requests
+import shutil
+import tempfile
+import threading
+from unittest import TestCase, mock
+
+from tests.test_api import make_response
+
+FREEMAIL = {'gmail.com', 'yahoo.com'}
+
+
+def person_session(fail=()):
+    session = mock.Mock()
+    session.calls = []
+    lock = threading.Lock()
+
+    def request(method, url, params=None, **kwargs):
+        value = params.get('domain', params.get('email'))
+        with lock:
+            session.calls.append(value)
+        if value in fail:
+            raise requests.ConnectionError('connection reset')
+        domain = value.rsplit('@', 1)[-1]
+        if url.endswith('freemail-detection'):
+            return make_response({'result': True, 'freemail': domain in FREEMAIL})
+        if url.endswith('disposable-email-detection'):
+            return make_response({'result': True, 'disposable': domain == 'mailinator.com'})
+        if url.endswith('email-typo'):
+            return make_response({'result': True, 'suggestions': ['gmail.com'] if domain == 'gmial.com' else []})
+        return make_response({'result': True, 'info': value.split('@')[0].title()})
+
+    session.request.side_effect = request
+    return session
+
+
+class TestEmailScreening(TestCase):
+
+    def test_one_call_per_domain(self):
+        emails = ['john@gmail.com', 'jane@GMAIL.com', ' joe@acme.com', 'ann@yahoo.com', 'bob@acme.com']
+        session = person_session()
+        with ritetag.RiteTagApi('token', session=session, concurrency=2) as api:
+            results = dict(api.free_mail_detections(emails))
+        assert results == {'john@gmail.com': True, 'jane@GMAIL.com': True, ' joe@acme.com': False,
+                           'ann@yahoo.com': True, 'bob@acme.com': False}
+        assert sorted(session.calls) == ['acme.com', 'gmail.com', 'yahoo.com']
+
+    def test_email_typos(self):
+        with ritetag.RiteTagApi('token', session=person_session()) as api:
+            results = dict(api.email_typos(['a@gmial.com', 'b@gmial.com', 'c@acme.com']))
+        assert results == {'a@gmial.com': ['gmail.com'], 'b@gmial.com': ['gmail.com'], 'c@acme.com': []}
+
+    def test_names_are_looked_up_per_address(self):
+        session = person_session()
+        with ritetag.RiteTagApi('token', session=session) as api:
+            results = dict(api.names_from_email_addresses(['john@gmail.com', 'jane@gmail.com', 'john@Gmail.com']))
+        assert results['john@Gmail.com'] == 'John'
+        assert sorted(session.calls) == ['jane@gmail.com', 'john@gmail.com']
+
+    def test_emails_are_taken_lazily(self):
+        taken = []
+
+        def emails():
+            for i in itertools.count():
+                taken.append(i)
+                yield 'user{}@gmail.com'.format(i)
+
+        session = person_session()
+        with ritetag.RiteTagApi('token', session=session, concurrency=1) as api:
+            results = api.free_mail_detections(emails(), window=1)
+            first = [next(results) for _ in range(1000)]
+            results.close()
+        assert all(x[1] for x in first)
+        assert session.calls == ['gmail.com']
+        # emails waiting for a running domain are bounded
+        assert len(taken) <= 1000 + 64
+
+    def test_failures(self):
+        emails = ['john@gmail.com', 'jo@acme.com/inbox', 'joe@acme.com', 'bob@acme.com']
+        session = person_session(fail=['acme.com'])
+        with ritetag.RiteTagApi('token', session=session) as api:
+            results = dict(api.disposable_email_detections(emails, return_exceptions=True))
+            assert isinstance(results['jo@acme.com/inbox'], ritetag.RiteTagException)
+            assert isinstance(results['bob@acme.com'], requests.ConnectionError)
+            with pytest.raises(requests.ConnectionError):
+                list(api.free_mail_detections(emails[2:]))
+
+    def test_async(self):
+        pytest.importorskip('aiohttp')
+        from tests.test_aio import FakeSession
+        session = FakeSession(lambda params: {'result': True, 'freemail': params['domain'] in FREEMAIL})
+
+        async def run():
+            client = ritetag.AsyncRiteTagApi('token', session=session, concurrency=2)
+            emails = ['john@gmail.com', 'jane@gmail.com', 'joe@acme.com', 'ann@yahoo.com']
+            return dict([x async for x in client.free_mail_detections(emails)])
+
+        results = asyncio.run(run())
+        assert results == {'john@gmail.com': True, 'jane@gmail.com': True, 'joe@acme.com': False,
+                           'ann@yahoo.com': True}
+        assert len(session.calls) == 3
+
+
+class TestDomainIndex(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_lookups(self):
+        index = ritetag.DomainIndex(merge_size=3)
+        for domain in ['gmail.com', 'acme.com', 'yahoo.com', 'example.org', 'b.com']:
+            index.add('freemail', domain, domain in FREEMAIL)
+        index.add('freemail', 'acme.com', True)
+        assert index.get('freemail', 'gmail.com') is True
+        assert index.get('freemail', 'acme.com') is True
+        assert index.get('freemail', 'example.org') is False
+        assert index.get('freemail', 'a.com') is None
+        assert index.get('disposable', 'gmail.com') is None
+        assert len(index) == 5
+        with pytest.raises(ritetag.RiteTagException):
+            index.get('spam', 'gmail.com')
+
+    def test_old_answers_are_refreshed(self):
+        index = ritetag.DomainIndex(max_age=60)
+        index.add('freemail', 'gmail.com', True, observed=1000)
+        assert index.get('freemail', 'gmail.com', now=1060) is True
+        assert index.get('freemail', 'gmail.com', now=1061) is None
+
+    def test_export_and_import(self):
+        path = os.path.join(self.directory, 'domains.jsonl')
+        index = ritetag.DomainIndex(max_age=None)
+        index.add('freemail', 'gmail.com', True, observed=1000)
+        index.add('disposable', 'mailinator.com', True, observed=1000)
+        index.save(path)
+
+        loaded = ritetag.DomainIndex.load(path, max_age=None)
+        assert sorted(loaded.entries()) == sorted(index.entries())
+        loaded.add('freemail', 'gmail.com', False, observed=2000)
+        loaded.update(path)
+        # newer answers win
+        assert loaded.get('freemail', 'gmail.com') is False
+        assert [x for x in os.listdir(self.directory) if x.endswith('.tmp')] == []
+
+    def test_client_asks_only_for_unknown_domains(self):
+        session = person_session()
+        index = ritetag.DomainIndex()
+        with ritetag.RiteTagApi('token', session=session, domain_index=index) as api:
+            assert api.free_mail_detection('john@gmail.com') is True
+            assert api.free_mail_detection('Gmail.com') is True
+            assert api.disposable_email_detection('joe@mailinator.com') is True
+            assert api.disposable_email_detection('mailinator.com') is True
+            results = dict(api.free_mail_detections(['a@gmail.com', 'b@acme.com']))
+        assert results == {'a@gmail.com': True, 'b@acme.com': False}
+        assert session.calls == ['john@gmail.com', 'joe@mailinator.com', 'acme.com']
+        assert index.get('freemail', 'acme.com') is False
+
+    def test_async_client(self):
+        pytest.importorskip('aiohttp')
+        from tests.test_aio import FakeSession
+        session = FakeSession(lambda params: {'result': True, 'freemail': params['domain'] in FREEMAIL})
+        index = ritetag.DomainIndex()
+        index.add('freemail', 'gmail.com', True)
+
+        async def run():
+            client = ritetag.AsyncRiteTagApi('token', session=session, domain_index=index)
+            return await client.free_mail_detection('john@gmail.com'), await client.free_mail_detection('acme.com')
+
+        assert asyncio.run(run()) == (True, False)
+        assert len(session.calls) == 1
+
+
+class TestTypoIndex(TestCase):
+
+    def test_suggestions(self):
+        index = ritetag.TypoIndex()
+        assert index.suggest('gmial.com') == (['gmail.com'], True)
+        assert index.suggest('gmail.con') == (['gmail.com'], True)
+        assert index.suggest('hotmial.com') == (['hotmail.com'], True)
+        assert index.suggest('hotmal.co') == (['hotmail.com'], False)
+        assert index.suggest('GMAIL.com') == ([], True)
+        assert index.suggest('acme-corp.com') == ([], False)
+
+    def test_close_real_domains_are_not_corrected(self):
+        index = ritetag.TypoIndex()
+        for domain in ['mail.com', 'email.com', 'ge.com', 'aon.com', 'mas.com']:
+            assert index.suggest(domain) == ([], True)
+        # a domain one edit away from several known domains is ambiguous
+        index = ritetag.TypoIndex(domains=['gmail.com'], known=[])
+        index.learn('gmai.com', [])
+        assert index.suggest('gmai.com') == ([], True)
+        suggestions, confident = index.suggest('gmal.com')
+        assert sorted(suggestions) == ['gmai.com', 'gmail.com'] and not confident
+        # only popular domains are corrected locally
+        index = ritetag.TypoIndex(domains=[], known=['gmail.com'])
+        assert index.suggest('gmial.com') == (['gmail.com'], False)
+
+    def test_edit_distance(self):
+        from ritetag.typos import edit_distance
+        assert edit_distance('gmial.com', 'gmail.com', 2) == 1
+        assert edit_distance('gmai.com', 'gmail.com', 2) == 1
+        assert edit_distance('gnail.con', 'gmail.com', 2) == 2
+        assert edit_distance('yahoo.com', 'gmail.com', 2) == 3
+
+    def test_learns_from_responses(self):
+        index = ritetag.TypoIndex(domains=[])
+        index.learn('acme-corp.com', [])
+        index.learn('acme-crop.com', ['acme-corp.com'])
+        assert 'acme-corp.com' in index and 'acme-crop.com' not in index
+        assert index.suggest('acme-crop.com') == (['acme-corp.com'], True)
+        assert index.suggest('ACME-CROP.com') == (['acme-corp.com'], True)
+
+    def test_client_asks_only_about_unconfirmed_cases(self):
+        session = person_session()
+        index = ritetag.TypoIndex()
+        with ritetag.RiteTagApi('token', session=session, typo_index=index) as api:
+            for _ in range(2):
+                assert api.email_typo('john@gmial.com') == ['gmail.com']
+                assert api.email_typo('john@gmail.com') == []
+                assert api.email_typo('john@mail.com') == []
+                assert api.email_typo('john@acme.com') == []
+        assert session.calls == ['john@acme.com']
+
+    def test_common_typos_are_corrected_locally(self):
+        session = person_session()
+        typos = {'gmial.com': 'gmail.com', 'gmail.con': 'gmail.com', 'gmal.com': 'gmail.com', 'gmaill.com': 'gmail.com',
+                 'gmail.co': 'gmail.com', 'hotmial.com': 'hotmail.com', 'hotmai.com': 'hotmail.com',
+                 'yahooo.com': 'yahoo.com', 'yaho.com': 'yahoo.com', 'yahoo.cm': 'yahoo.com',
+                 'outlok.com': 'outlook.com', 'iclod.com': 'icloud.com'}
+        with ritetag.RiteTagApi('token', session=session, typo_index=ritetag.TypoIndex()) as api:
+            for typo, domain in typos.items():
+                assert api.email_typo('john@' + typo) == [domain]
+        assert session.calls == []
+
+    def test_async_client(self):
+        pytest.importorskip('aiohttp')
+        from tests.test_aio import FakeSession
+        session = FakeSession({'result': True, 'suggestions': []})
+
+        async def run():
+            client = ritetag.AsyncRiteTagApi('token', session=session, typo_index=ritetag.TypoIndex())
+            return [await client.email_typo(x) for x in ['john@gmial.com', 'john@acme.com', 'jane@acme.com']]
+
+        assert asyncio.run(run()) == [['gmail.com'], [], []]
+        assert len(session.calls) == 1
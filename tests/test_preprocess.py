@@ -0,0 +1,81 @@
+import os
+import ritetag
+import pytest
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase, mock
+
+from tests.test_api import make_response
+
+PIL = pytest.importorskip('PIL.Image')
+
+
+class TestImagePreprocessor(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'photo.png')
+        # noise does not compress, the PNG is large
+        PIL.frombytes('RGB', (800, 600), os.urandom(800 * 600 * 3)).save(self.path)
+        self.preprocessor = ritetag.ImagePreprocessor(max_dimension=200, quality=70)
+
+    def tearDown(self):
+        self.preprocessor.close()
+        shutil.rmtree(self.directory)
+
+    def test_downscales_and_recompresses(self):
+        path = self.preprocessor.process(self.path)
+        assert path.endswith('.jpg')
+        reduced = PIL.open(path)
+        assert reduced.format == 'JPEG'
+        assert reduced.size == (200, 150)
+        assert os.path.getsize(path) < os.path.getsize(self.path)
+
+    def test_reduced_images_are_cached_by_content(self):
+        copy = os.path.join(self.directory, 'copy.png')
+        shutil.copyfile(self.path, copy)
+        path = self.preprocessor.process(self.path)
+        with mock.patch('ritetag.preprocess.reduce_image') as reduce_image:
+            assert self.preprocessor.process(copy) == path
+        assert not reduce_image.called
+
+    def test_settings_are_part_of_the_key(self):
+        other = ritetag.ImagePreprocessor(max_dimension=100, cache_dir=self.preprocessor.cache_dir)
+        assert other.cache_path(self.path) != self.preprocessor.cache_path(self.path)
+
+    def test_small_images_are_kept(self):
+        path = os.path.join(self.directory, 'small.png')
+        PIL.new('RGB', (10, 10)).save(path)
+        with open(self.preprocessor.process(path), 'rb') as reduced, open(path, 'rb') as original:
+            assert reduced.read() == original.read()
+
+    def test_process_many(self):
+        paths = self.preprocessor.process_many([self.path, self.path])
+        assert paths[0] == paths[1]
+        assert PIL.open(paths[0]).size == (200, 150)
+
+    def test_concurrent_callers_share_one_pool(self):
+        def slow_pool(**kwargs):
+            time.sleep(0.1)
+            return mock.Mock()
+
+        with mock.patch('ritetag.preprocess.ProcessPoolExecutor', side_effect=slow_pool) as pool:
+            threads = [threading.Thread(target=self.preprocessor._get_executor) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert pool.call_count == 1
+
+    def test_client_uploads_reduced_image(self):
+        session = mock.Mock()
+        session.request.return_value = make_response({'result': True, 'data': []})
+        api = ritetag.RiteTagApi('token', session=session, image_preprocessor=self.preprocessor)
+        api.hashtag_suggestion_for_image(self.path)
+        assert session.request.call_args[1]['data'].path == self.preprocessor.cache_path(self.path)
+
+    def test_unsupported_format(self):
+        with pytest.raises(ritetag.RiteTagException):
+            ritetag.ImagePreprocessor(image_format='GIF')
@@ -0,0 +1,55 @@
+import calendar
+import pytest
+import ritetag
+from datetime import date
+from unittest import TestCase, mock
+
+from ritetag.response import Limit
+from tests.test_api import make_response
+
+RESET = calendar.timegm(date(2021, 6, 1).timetuple())
+
+
+class TestRateLimiter(TestCase):
+
+    def test_burst_without_limits(self):
+        limiter = ritetag.RateLimiter(burst=3, clock=lambda: 0)
+        assert [limiter.reserve() for _ in range(3)] == [0, 0, 0]
+
+    def test_burst_is_capped_before_first_response(self):
+        now = [0.0]
+        limiter = ritetag.RateLimiter(burst=2, clock=lambda: now[0], initial_rate=2.0)
+        assert [limiter.reserve() for _ in range(4)] == [0, 0, 0.5, 1.0]
+        now[0] = 10.0
+        # the bucket refills up to the burst only
+        assert [limiter.reserve() for _ in range(3)] == [0, 0, 0.5]
+
+    def test_remaining_credits_are_spread_until_reset(self):
+        now = RESET - 1000
+        limiter = ritetag.RateLimiter(burst=1, clock=lambda: now)
+        limiter.update(Limit('1000', '900', '2021-06-01 00:00:00'))
+        assert limiter.rate == 0.1
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == pytest.approx(10)
+        assert limiter.reserve() == pytest.approx(20)
+
+    def test_exhausted_credits_wait_for_reset(self):
+        limiter = ritetag.RateLimiter(burst=5, clock=lambda: RESET - 60)
+        limiter.update(Limit('1000', '1000', '2021-06-01'))
+        assert limiter.reserve() == 60
+
+    def test_max_wait(self):
+        limiter = ritetag.RateLimiter(burst=1, max_wait=30, clock=lambda: RESET - 60)
+        limiter.update(Limit('1000', '1000', '2021-06-01'))
+        with pytest.raises(ritetag.RiteTagException, match=r'exhausted'):
+            limiter.reserve()
+        assert limiter.tokens == 0
+
+    def test_client_syncs_from_headers(self):
+        session = mock.Mock()
+        session.request.return_value = make_response({'result': True, 'data': []})
+        limiter = ritetag.RateLimiter()
+        client = ritetag.RiteTagApi('', session=session, rate_limiter=limiter)
+        client.history('jobs')
+        assert limiter.reset_at == RESET
+        assert limiter.rate is not None
@@ -0,0 +1,115 @@
+import calendar
+import pytest
+import requests
+import ritetag
+from datetime import date
+from unittest import TestCase, mock
+
+from ritetag.retry import RetryBudget, RetryPolicy, RetryStrategy
+from tests.test_api import LIMIT_HEADERS, make_response
+
+
+class TestRetryPolicy(TestCase):
+
+    def test_backoff_is_capped(self):
+        policy = RetryPolicy(max_retries=10, backoff=1, max_backoff=4)
+        for attempt in range(10):
+            assert 0 <= policy.delay(attempt, 503) <= min(4, 2 ** attempt)
+        assert policy.delay(10, 503) is None
+
+    def test_retry_after(self):
+        policy = RetryPolicy()
+        assert policy.delay(0, 503, {'Retry-After': '7'}) == 7
+        assert policy.delay(0, 503, {'Retry-After': 'Wed, 21 Oct 2015 07:28:10 GMT'},
+                            now=calendar.timegm((2015, 10, 21, 7, 28, 0))) == 10
+        assert policy.delay(0, 503, {'Retry-After': '600'}) is None
+
+    def test_exhausted_credits_are_not_retried(self):
+        headers = dict(LIMIT_HEADERS, **{'X-Rate-Limit-Used': '100'})
+        now = calendar.timegm(date(2021, 6, 1).timetuple()) - 30
+        assert RetryPolicy().delay(0, 429, headers, now=now) == 30
+        assert RetryPolicy().delay(0, 429, headers, now=now - 3600) is None
+
+    def test_client_errors_are_not_retried(self):
+        assert RetryPolicy().delay(0, 400) is None
+        assert RetryPolicy().delay(0, 200) is None
+
+    def test_non_idempotent(self):
+        policy = RetryPolicy(idempotent=False)
+        assert policy.delay(0, 503) is None
+        assert policy.delay(0, error=True) is None
+        assert policy.delay(0, error=True, sent=False) is not None
+        assert policy.delay(0, 429) is not None
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, capacity=1)
+        assert budget.withdraw()
+        assert not budget.withdraw()
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw()
+
+    def test_short_links_are_not_retried_blindly(self):
+        assert not RetryStrategy().policy('/v1/link/short-link').idempotent
+        assert RetryStrategy().policy('/v1/stats/history/jobs').idempotent
+
+
+class TestClientRetry(TestCase):
+
+    def setUp(self):
+        self.sleep = mock.patch('time.sleep').start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_transient_errors_are_retried(self):
+        session = mock.Mock()
+        session.request.side_effect = [
+            requests.ConnectionError('connection reset'),
+            make_response({}, status=503, headers={}),
+            make_response({'result': True, 'data': []}),
+        ]
+        client = ritetag.RiteTagApi('', session=session, retry=RetryStrategy())
+        assert client.history('jobs') == []
+        assert session.request.call_count == 3
+        assert self.sleep.call_count == 2
+
+    def test_permanent_errors_are_not_retried(self):
+        for error in [requests.exceptions.InvalidURL('bad'), requests.exceptions.MissingSchema('bad'),
+                      requests.exceptions.InvalidHeader('bad'), requests.TooManyRedirects('loop')]:
+            session = mock.Mock()
+            session.request.side_effect = error
+            client = ritetag.RiteTagApi('', session=session, retry=RetryStrategy())
+            with pytest.raises(type(error)):
+                client.history('jobs')
+            assert session.request.call_count == 1
+        assert self.sleep.call_count == 0
+
+    def test_timeouts_and_broken_bodies_are_retried(self):
+        session = mock.Mock()
+        session.request.side_effect = [
+            requests.ReadTimeout('slow'),
+            requests.exceptions.ChunkedEncodingError('broken'),
+            make_response({'result': True, 'data': []}),
+        ]
+        client = ritetag.RiteTagApi('', session=session, retry=RetryStrategy())
+        assert client.history('jobs') == []
+        assert session.request.call_count == 3
+
+    def test_no_retries_by_default(self):
+        session = mock.Mock()
+        session.request.return_value = make_response({}, status=503, headers={})
+        client = ritetag.RiteTagApi('', session=session)
+        with pytest.raises(ritetag.RiteTagException, match=r'Something went wrong'):
+            client.history('jobs')
+        assert session.request.call_count == 1
+
+    def test_shared_budget_stops_retry_storm(self):
+        session = mock.Mock()
+        session.request.side_effect = requests.ConnectionError('down')
+        retry = RetryStrategy(budget=RetryBudget(ratio=0, capacity=2))
+        client = ritetag.RiteTagApi('', session=session, retry=retry)
+        for _ in range(3):
+            with pytest.raises(requests.ConnectionError):
+                client.history('jobs')
+        assert session.request.call_count == 5
@@ -0,0 +1,197 @@
+import asyncio
+import base64
+import json
+import os
+import ritetag
+import pytest
+import requests
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from unittest import TestCase, mock
+
+from ritetag.upload import Base64JsonBody, GzipBody, RequestBody
+from tests.test_api import make_response
+
+IMAGE = os.urandom(100001)
+
+
+class TestUploadBodies(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'photo.jpg')
+        with open(self.path, 'wb') as f:
+            f.write(IMAGE)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def decode(self, body):
+        return base64.b64decode(json.loads(b''.join(body).decode('utf-8'))['image'])
+
+    def test_encodes_in_chunks(self):
+        body = Base64JsonBody(self.path, chunk_size=1000)
+        chunks = list(body)
+        assert max(len(x) for x in chunks) == 4 * 999 // 3
+        assert self.decode(chunks) == IMAGE
+        assert len(body) == len(b''.join(chunks))
+
+    def test_memory_map(self):
+        body = Base64JsonBody(self.path, use_mmap=True)
+        assert self.decode(body) == IMAGE
+        # every iteration sends the whole body, so retries work
+        assert self.decode(body) == IMAGE
+
+    def test_empty_file(self):
+        path = os.path.join(self.directory, 'empty.jpg')
+        open(path, 'wb').close()
+        body = Base64JsonBody(path, use_mmap=True)
+        assert b''.join(body) == b'{"image": ""}'
+        assert len(body) == 13
+
+    def test_gzip(self):
+        body = GzipBody(Base64JsonBody(self.path))
+        assert body.content_encoding == 'gzip'
+        assert self.decode([zlib.decompress(b''.join(body), 31)]) == IMAGE
+
+    def test_bodies_implement_iteration(self):
+        with self.assertRaises(TypeError):
+            RequestBody()
+
+    def test_client_streams_local_files(self):
+        session = mock.Mock()
+        session.request.return_value = make_response({'result': True, 'data': [{'hashtag': 'cat'}]})
+        api = ritetag.RiteTagApi('token', session=session)
+
+        result = api.hashtag_suggestion_for_image(self.path, gzip=True)
+
+        assert result[0].hashtag == 'cat'
+        kwargs = session.request.call_args[1]
+        assert kwargs['headers']['Content-Encoding'] == 'gzip'
+        assert 'json' not in kwargs
+        assert self.decode([zlib.decompress(b''.join(kwargs['data']), 31)]) == IMAGE
+
+    def test_client_sends_urls_as_json(self):
+        session = mock.Mock()
+        session.request.return_value = make_response({'result': True, 'data': []})
+        api = ritetag.RiteTagApi('token', session=session)
+        api.hashtag_suggestion_for_image('https://example.com/photo.jpg')
+        assert session.request.call_args[1]['json'] == {'image': 'https://example.com/photo.jpg'}
+
+
+def suggestion_session(delay=0.0, fail=()):
+    session = mock.Mock()
+    state = {'active': 0, 'max_active': 0}
+    lock = threading.Lock()
+
+    def request(method, url, json=None, data=None, **kwargs):
+        image = json['image'] if json is not None else 'local'
+        with lock:
+            state['active'] += 1
+            state['max_active'] = max(state['max_active'], state['active'])
+        time.sleep(delay)
+        with lock:
+            state['active'] -= 1
+        if image in fail:
+            raise requests.ConnectionError('connection reset')
+        return make_response({'result': True, 'data': [{'hashtag': image.rsplit('/', 1)[-1]}]})
+
+    session.request.side_effect = request
+    session.state = state
+    return session
+
+
+URLS = ['https://example.com/{}.jpg'.format(i) for i in range(10)]
+
+
+class TestBulkImageSuggestions(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_yields_all_results_with_bounded_concurrency(self):
+        session = suggestion_session(delay=0.01)
+        with ritetag.RiteTagApi('token', session=session, concurrency=3) as api:
+            results = dict(api.hashtag_suggestions_for_images(URLS))
+        assert sorted(results) == sorted(URLS)
+        assert results[URLS[4]][0].hashtag == '4.jpg'
+        assert 1 < session.state['max_active'] <= 3
+
+    def test_inputs_are_taken_lazily(self):
+        taken = []
+
+        def images():
+            for url in URLS:
+                taken.append(url)
+                yield url
+
+        with ritetag.RiteTagApi('token', session=suggestion_session(), concurrency=2) as api:
+            results = api.hashtag_suggestions_for_images(images(), window=3)
+            next(results)
+            assert len(taken) <= 4
+            results.close()
+
+    def test_resumes_from_checkpoint(self):
+        path = os.path.join(self.directory, 'checkpoint')
+        session = suggestion_session()
+        with ritetag.RiteTagApi('token', session=session, concurrency=1) as api:
+            with ritetag.Checkpoint(path) as checkpoint:
+                results = api.hashtag_suggestions_for_images(URLS, checkpoint, window=1)
+                first = [next(results)[0] for _ in range(4)]
+                results.close()
+            with ritetag.Checkpoint(path) as checkpoint:
+                assert len(checkpoint) == 4
+                rest = [x for x, _ in api.hashtag_suggestions_for_images(URLS, checkpoint)]
+        assert sorted(first + rest) == sorted(URLS)
+
+    def test_checkpoint_ignores_truncated_line(self):
+        path = os.path.join(self.directory, 'checkpoint')
+        with open(path, 'w') as f:
+            f.write('"a.jpg"\n"b.j')
+        with ritetag.Checkpoint(path) as checkpoint:
+            assert 'a.jpg' in checkpoint and len(checkpoint) == 1
+            checkpoint.add('c.jpg')
+        with ritetag.Checkpoint(path) as checkpoint:
+            assert 'c.jpg' in checkpoint and len(checkpoint) == 2
+
+    def test_failures(self):
+        session = suggestion_session(fail=[URLS[1]])
+        with ritetag.RiteTagApi('token', session=session) as api:
+            results = dict(api.hashtag_suggestions_for_images(URLS, return_exceptions=True))
+            assert isinstance(results[URLS[1]], requests.ConnectionError)
+            assert len(results) == 10
+            with pytest.raises(requests.ConnectionError):
+                list(api.hashtag_suggestions_for_images(URLS))
+
+    def test_local_images_are_preprocessed_in_worker_processes(self):
+        PIL = pytest.importorskip('PIL.Image')
+        paths = []
+        for i in range(3):
+            paths.append(os.path.join(self.directory, '{}.png'.format(i)))
+            PIL.frombytes('RGB', (400, 300), os.urandom(400 * 300 * 3)).save(paths[-1])
+        session = suggestion_session()
+        with ritetag.ImagePreprocessor(max_dimension=100) as preprocessor:
+            with ritetag.RiteTagApi('token', session=session, image_preprocessor=preprocessor) as api:
+                results = dict(api.hashtag_suggestions_for_images(paths))
+            sent = [x[1]['data'].path for x in session.request.call_args_list]
+            assert sorted(results) == sorted(paths)
+            assert sorted(sent) == sorted(preprocessor.cache_path(x) for x in paths)
+
+    def test_async(self):
+        pytest.importorskip('aiohttp')
+        from tests.test_aio import FakeSession
+        session = FakeSession(lambda params: {'result': True, 'data': [{'hashtag': 'cat'}]})
+
+        async def run():
+            client = ritetag.AsyncRiteTagApi('token', session=session, concurrency=2)
+            return [x async for x in client.hashtag_suggestions_for_images(URLS)]
+
+        results = asyncio.run(run())
+        assert sorted(x for x, _ in results) == sorted(URLS)
+        assert results[0][1][0].hashtag == 'cat'